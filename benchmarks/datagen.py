@@ -0,0 +1,56 @@
+"""Deterministic synthetic data for repository benchmarks.
+
+The same (size, seed) always yields the same records, ids included, so
+results from different runs and machines describe identical datasets.
+"""
+import random
+
+# Share of each record type in a generated dataset
+MIX = (("user", 0.2), ("workout", 0.1), ("exercise", 0.2), ("schedule", 0.5))
+
+_NAMES = ("Leg Day", "Chest Day", "Cardio", "Yoga", "HIIT", "Swim", "Core", "Mobility", "Back", "Arms")
+_EXERCISES = ("Pushup", "Squat", "Lunge", "Plank", "Burpee", "Row", "Deadlift", "Curl")
+
+
+def _new_id(rng):
+    return f"{rng.getrandbits(128):032x}"
+
+
+def generate_records(size, seed=0):
+    """Return `size` structured records mixing users, workouts, exercises and schedules.
+
+    Schedules only reference users and workouts generated earlier in the list.
+    """
+    rng = random.Random(seed)
+    counts = {type_: max(1, int(size * share)) for type_, share in MIX}
+    counts["schedule"] = max(0, size - sum(n for t, n in counts.items() if t != "schedule"))
+
+    records = []
+    users = []
+    workouts = []
+    for i in range(counts["user"]):
+        rid = _new_id(rng)
+        data = {"username": f"user{i:07d}", "age": rng.randint(16, 80)}
+        if rng.random() < 0.7:
+            data["height"] = round(rng.uniform(150, 200), 1)
+            data["weight"] = round(rng.uniform(45, 120), 1)
+        users.append(rid)
+        records.append({"id": rid, "type": "user", "data": data})
+    for i in range(counts["workout"]):
+        rid = _new_id(rng)
+        name = f"{rng.choice(_NAMES)} {i}"
+        workouts.append(rid)
+        records.append({"id": rid, "type": "workout", "data": {"name": name, "duration": rng.choice((20, 30, 45, 60, 90))}})
+    for _ in range(counts["exercise"]):
+        records.append({
+            "id": _new_id(rng),
+            "type": "exercise",
+            "data": {"name": rng.choice(_EXERCISES), "calories": rng.randint(20, 600)},
+        })
+    for _ in range(counts["schedule"]):
+        records.append({
+            "id": _new_id(rng),
+            "type": "schedule",
+            "data": {"user_id": rng.choice(users), "workout_id": rng.choice(workouts)},
+        })
+    return records
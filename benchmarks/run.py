@@ -0,0 +1,215 @@
+"""Repository benchmark suite.
+
+Times every IRepository method, ObjectFactory hydration and the
+schedule listing path against synthetic datasets, and writes the results
+to JSON so runs can be compared with a stored baseline.
+
+    python benchmarks/run.py --sizes 10000 100000
+    python benchmarks/run.py --sizes 1000 --save-baseline
+    python benchmarks/run.py --sizes 1000 --baseline benchmarks/baseline.json --fail-on-regression
+
+The committed benchmarks/baseline.json holds a --sizes 1000 run; only
+entries with the same backend, size and op are compared.
+"""
+import os
+import glob
+import io
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import tempfile
+import contextlib
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+SRC_DIR = os.path.abspath(os.path.join(BENCH_DIR, "..", "src"))
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+if BENCH_DIR not in sys.path:
+    sys.path.insert(0, BENCH_DIR)
+
+import main as cli
+from datagen import generate_records
+from models.factory import ObjectFactory
+from repository.codecs import CODECS
+from repository.repository import Repository
+from repository.jsonl_repository import JsonlRepository
+from repository.sqlite_repository import SqliteRepository
+from repository.partitioned_repository import PartitionedRepository
+
+BACKENDS = {
+    "json": (Repository, "data.json"),
+    "jsonl": (JsonlRepository, "data.jsonl"),
+    "sqlite": (SqliteRepository, "data.db"),
+    "partitioned": (PartitionedRepository, "data"),
+}
+DEFAULT_OUTPUT = os.path.join(BENCH_DIR, "results", "latest.json")
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, "baseline.json")
+
+
+def _timed(fn, n):
+    start = time.perf_counter()
+    for i in range(n):
+        fn(i)
+    return time.perf_counter() - start
+
+
+def _result(backend, size, op, n, total):
+    return {
+        "backend": backend,
+        "size": size,
+        "op": op,
+        "n": n,
+        "total_s": round(total, 6),
+        "mean_us": round(total / n * 1e6, 3),
+        "ops_per_s": round(n / total, 3) if total > 0 else None,
+    }
+
+
+def bench_backend(name, size, records, workdir, seed=0, codec=None):
+    """Run every benchmark for one backend and dataset size; return a list of results."""
+    cls, filename = BACKENDS[name]
+    path = os.path.join(workdir, f"{name}-{size}-{filename}")
+    rng = random.Random(seed)
+    ids = [r["id"] for r in records]
+    by_type = {}
+    for r in records:
+        by_type.setdefault(r["type"], []).append(r)
+    sample_ids = [rng.choice(ids) for _ in range(1000)]
+    domain_ids = [r["id"] for r in records if r["type"] in ("user", "workout", "exercise")]
+    object_ids = [rng.choice(domain_ids) for _ in range(1000)]
+    usernames = [r["data"]["username"] for r in by_type["user"]]
+    results = []
+
+    def run(op, fn, n):
+        total = _timed(fn, n)
+        results.append(_result(name, size, op, n, total))
+        print(f"  {name:<8} {op:<20} n={n:<6d} mean={total / n * 1e6:12.1f} us", flush=True)
+
+    repo = cls(path, codec=codec) if codec and cls is Repository else cls(path)
+    # Backends may keep the dicts they are given; never share them between runs
+    run("create_many", lambda i: repo.create_many(json.loads(json.dumps(records))), 1)
+    run("read_all", lambda i: repo.read_all(), 3)
+    run("iter_records", lambda i: sum(1 for _ in repo.iter_records()), 3)
+    run("read_by_id", lambda i: repo.read_by_id(sample_ids[i]), len(sample_ids))
+    run("read_by_id_cold", lambda i: cls(path).read_by_id(sample_ids[i]), 3)
+    if hasattr(repo, "write_snapshot"):
+        run("write_snapshot", lambda i: repo.write_snapshot(), 1)
+        run("read_by_id_snapshot", lambda i: cls(path).read_by_id(sample_ids[i]), 100)
+        # Drop it again so the write benchmarks below do not also pay for snapshot refreshes
+        for snap in glob.glob(path + ".snap") + glob.glob(os.path.join(path, "*.snap")):
+            os.remove(snap)
+    run("find_by_type", lambda i: repo.find_by_type("schedule"), 3)
+    run("find_by_type_cold", lambda i: cls(path).find_by_type("schedule"), 3)
+    run("find_by_field", lambda i: repo.find_by_field("user", "username", usernames[i % len(usernames)]), 100)
+    run("get_object_by_id", lambda i: repo.get_object_by_id(object_ids[i]), len(object_ids))
+    run("get_objects_by_ids", lambda i: repo.get_objects_by_ids(object_ids[i * 50:(i + 1) * 50]), 20)
+
+    def list_schedules(i):
+        cli.repo = repo
+        with contextlib.redirect_stdout(io.StringIO()):
+            cli.cli_list_schedules(None)
+
+    run("list_schedules", list_schedules, 1)
+
+    # Writes last: they change the dataset
+    run("create", lambda i: repo.create({"username": f"bench{i}", "age": 30}, type_="user"), 5)
+    run("update", lambda i: repo.update(ids[i], {"username": f"upd{i}", "age": 31}), 5)
+    run("update_many", lambda i: repo.update_many(ids[100 + i * 100:200 + i * 100], {"bumped": True}), 3)
+    run("delete", lambda i: repo.delete(ids[-1 - i]), 5)
+    run("delete_many", lambda i: repo.delete_many(ids[-1000 + i * 100:-900 + i * 100]), 3)
+    # A consumer catching up on the latest writes, behind a feed holding the whole dataset
+    last = repo.changes_since(0)[-1]["seq"]
+    run("changes_since_tail", lambda i: repo.changes_since(last - 100), 100)
+    if hasattr(repo, "close"):
+        repo.close()
+    return results
+
+
+def bench_factory(size, records):
+    domain = [r for r in records if r["type"] in ("user", "workout", "exercise")]
+    results = []
+    for op, fn in (
+        ("create_from_record", lambda i: ObjectFactory.create_from_record(domain[i])),
+        # One batch call per run; reported per record like create_from_record
+        ("hydrate_many", lambda i: ObjectFactory.hydrate_many(domain)),
+        ("hydrate_many_lazy", lambda i: ObjectFactory.hydrate_many(domain, lazy=True)),
+    ):
+        n = len(domain) if op == "create_from_record" else 1
+        total = _timed(fn, n)
+        print(f"  {'-':<8} {op:<20} n={len(domain):<6d} mean={total / len(domain) * 1e6:12.1f} us")
+        results.append(_result("factory", size, op, len(domain), total))
+    return results
+
+
+def compare(results, baseline, threshold):
+    """Print mean latency against the baseline; return the list of regressed entries."""
+    base = {(r["backend"], r["size"], r["op"]): r for r in baseline.get("results", [])}
+    regressions = []
+    print(f"\n{'backend':<8} {'size':<9} {'op':<20} {'base us':>12} {'now us':>12} {'ratio':>8}")
+    for r in results:
+        b = base.get((r["backend"], r["size"], r["op"]))
+        if b is None or not b["mean_us"]:
+            continue
+        ratio = r["mean_us"] / b["mean_us"]
+        flag = "  REGRESSION" if ratio > threshold else ""
+        print(f"{r['backend']:<8} {r['size']:<9d} {r['op']:<20} {b['mean_us']:12.1f} {r['mean_us']:12.1f} {ratio:8.2f}{flag}")
+        if ratio > threshold:
+            regressions.append(r)
+    return regressions
+
+
+def build_parser():
+    p = argparse.ArgumentParser(description="Fitness Tracker repository benchmarks")
+    p.add_argument("--sizes", type=int, nargs="+", default=[10000], help="Dataset sizes (records)")
+    p.add_argument("--backends", nargs="+", choices=sorted(BACKENDS), default=sorted(BACKENDS))
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--codec", choices=sorted(CODECS), help="Serialization codec for the json backend")
+    p.add_argument("--output", default=DEFAULT_OUTPUT, help="Where to write the results JSON")
+    p.add_argument("--baseline", help="Baseline results JSON to compare against")
+    p.add_argument("--save-baseline", action="store_true", help="Also write the results to benchmarks/baseline.json")
+    p.add_argument("--threshold", type=float, default=1.25, help="Slowdown ratio reported as a regression")
+    p.add_argument("--fail-on-regression", action="store_true", help="Exit with status 1 if any op regressed")
+    return p
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    results = []
+    with tempfile.TemporaryDirectory(prefix="ft-bench-") as workdir:
+        for size in args.sizes:
+            records = generate_records(size, seed=args.seed)
+            print(f"size={size}", flush=True)
+            results.extend(bench_factory(size, records))
+            for name in args.backends:
+                results.extend(bench_backend(name, size, records, workdir, seed=args.seed, codec=args.codec))
+
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "seed": args.seed,
+            "codec": args.codec,
+        },
+        "results": results,
+    }
+    targets = [args.output] + ([DEFAULT_BASELINE] if args.save_baseline else [])
+    for target in targets:
+        os.makedirs(os.path.dirname(os.path.abspath(target)), exist_ok=True)
+        with open(target, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Wrote {target}")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        if regressions and args.fail_on_regression:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
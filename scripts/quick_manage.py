@@ -2,6 +2,7 @@ import os
 import sys
 import json
 import argparse
+import textwrap
 import logging
 
 # Ensure src is importable when running from repo root
@@ -38,21 +39,32 @@ repo = Repository()
 
 
 def list_all():
-    records = repo.read_all()
-    print(json.dumps(records, indent=2, ensure_ascii=False))
+    # Stream the array one record at a time; output matches json.dumps(records, indent=2)
+    first = True
+    for r in repo.iter_records():
+        print("[" if first else ",")
+        print(textwrap.indent(json.dumps(r, indent=2, ensure_ascii=False), "  "), end="")
+        first = False
+    print("[]" if first else "\n]")
 
 
 def list_schedules():
-    schedules = repo.find_by_type("schedule")
-    if not schedules:
+    ref_ids = set()
+    found = False
+    for s in repo.iter_records("schedule"):
+        found = True
+        data = s.get("data", {})
+        ref_ids.update(v for v in (data.get("user_id"), data.get("workout_id")) if v)
+    if not found:
         print("No schedules found")
         return
-    for s in schedules:
+    objects = repo.get_objects_by_ids(ref_ids)
+    for s in repo.iter_records("schedule"):
         data = s.get("data", {})
         user_id = data.get("user_id")
         workout_id = data.get("workout_id")
-        user = repo.get_object_by_id(user_id) if user_id else None
-        workout = repo.get_object_by_id(workout_id) if workout_id else None
+        user = objects.get(user_id)
+        workout = objects.get(workout_id)
         user_summary = user.get_info() if user and hasattr(user, "get_info") else (user_id or "Unknown user")
         workout_summary = workout.get_summary() if workout and hasattr(workout, "get_summary") else (workout_id or "Unknown workout")
         print(f"Schedule id={s.get('id')}: {user_summary} -> {workout_summary}")
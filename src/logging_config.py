@@ -1,13 +1,84 @@
+import atexit
+import itertools
 import logging
 import os
-from logging.handlers import RotatingFileHandler
+import queue
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 
+# Listener of the active async configuration (None when logging synchronously)
+_listener = None
 
-def configure_logging(level=logging.INFO, log_dir=None, logfile_name="fitness_tracker.log"):
+
+class SamplingFilter(logging.Filter):
+    """Let through only one in every N records at or below `max_level` for selected loggers.
+
+    `rates` maps a logger name (or dotted prefix) to N; records from other loggers,
+    and records above `max_level`, always pass.
+    """
+
+    def __init__(self, rates, max_level=logging.DEBUG):
+        super().__init__()
+        self.rates = dict(rates)
+        self.max_level = max_level
+        self._counters = {}
+
+    def _rate_for(self, name):
+        while name:
+            if name in self.rates:
+                return name, self.rates[name]
+            name = name.rpartition(".")[0]
+        return None, 1
+
+    def filter(self, record):
+        if record.levelno > self.max_level:
+            return True
+        key, rate = self._rate_for(record.name)
+        if rate <= 1:
+            return True
+        counter = self._counters.setdefault(key, itertools.count())
+        return next(counter) % rate == 0
+
+
+class BoundedQueueHandler(QueueHandler):
+    """QueueHandler for a bounded queue with an overflow policy.
+
+    - overflow="drop": discard the record when the queue is full and count it.
+    - overflow="block": wait for room, applying backpressure to the caller.
+
+    Records are queued unformatted; formatting happens on the listener thread.
+    """
+
+    def __init__(self, q, overflow="drop"):
+        if overflow not in ("drop", "block"):
+            raise ValueError(f"Unknown overflow policy: {overflow}")
+        super().__init__(q)
+        self.overflow = overflow
+        self.dropped = 0
+
+    def prepare(self, record):
+        return record
+
+    def enqueue(self, record):
+        if self.overflow == "block":
+            self.queue.put(record)
+            return
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def configure_logging(level=logging.INFO, log_dir=None, logfile_name="fitness_tracker.log",
+                      async_mode=False, queue_size=10000, overflow="drop", sample_rates=None):
     """Configure root logger with console and rotating file handlers.
 
     - level: logging level (default INFO)
     - log_dir: directory to store log files (defaults to project root `logs/`)
+    - async_mode: hand records to a background thread through a bounded queue
+      (`QueueHandler`/`QueueListener`) so callers never wait on console/file I/O
+    - queue_size / overflow: queue bound and what to do when it is full ("drop" or "block")
+    - sample_rates: {logger name: N} keeps one in N DEBUG records from those loggers,
+      e.g. {"repository": 100} for hot repository debug messages
     Returns the root logger.
     """
     fmt = "%(asctime)s.%(msecs)03d %(levelname)-7s %(name)s: %(message)s"
@@ -15,6 +86,7 @@ def configure_logging(level=logging.INFO, log_dir=None, logfile_name="fitness_tr
 
     root = logging.getLogger()
     # avoid adding handlers multiple times if configure_logging is called more than once
+    shutdown_logging()
     if root.handlers:
         for h in list(root.handlers):
             root.removeHandler(h)
@@ -24,7 +96,6 @@ def configure_logging(level=logging.INFO, log_dir=None, logfile_name="fitness_tr
     console = logging.StreamHandler()
     console.setLevel(level)
     console.setFormatter(logging.Formatter(fmt, datefmt=datefmt))
-    root.addHandler(console)
 
     # File logger
     if log_dir is None:
@@ -33,10 +104,24 @@ def configure_logging(level=logging.INFO, log_dir=None, logfile_name="fitness_tr
         log_dir = os.path.join(base, "logs")
     os.makedirs(log_dir, exist_ok=True)
     logfile = os.path.join(log_dir, logfile_name)
-    file_handler = RotatingFileHandler(logfile, maxBytes=1024 * 1024, backupCount=3, encoding="utf-8")
+    # delay=True: the log file is only opened once something is written to it
+    file_handler = RotatingFileHandler(logfile, maxBytes=1024 * 1024, backupCount=3, encoding="utf-8", delay=True)
     file_handler.setLevel(level)
     file_handler.setFormatter(logging.Formatter(fmt, datefmt=datefmt))
-    root.addHandler(file_handler)
+
+    if async_mode:
+        global _listener
+        queue_handler = BoundedQueueHandler(queue.Queue(maxsize=queue_size), overflow=overflow)
+        if sample_rates:
+            queue_handler.addFilter(SamplingFilter(sample_rates))
+        root.addHandler(queue_handler)
+        _listener = QueueListener(queue_handler.queue, console, file_handler, respect_handler_level=True)
+        _listener.start()
+    else:
+        for handler in (console, file_handler):
+            if sample_rates:
+                handler.addFilter(SamplingFilter(sample_rates))
+            root.addHandler(handler)
 
     # Tame noisy third-party loggers
     logging.getLogger("urllib3").setLevel(logging.WARNING)
@@ -45,6 +130,40 @@ def configure_logging(level=logging.INFO, log_dir=None, logfile_name="fitness_tr
     return root
 
 
+def shutdown_logging():
+    """Flush and stop the async listener, if any, reporting records dropped on overflow.
+
+    Registered with atexit so queued records are written before the process exits.
+    """
+    global _listener
+    listener, _listener = _listener, None
+    if listener is None:
+        return
+    # Stop accepting records on the root logger, then drain what is already queued
+    root = logging.getLogger()
+    dropped = 0
+    for h in list(root.handlers):
+        if isinstance(h, BoundedQueueHandler) and h.queue is listener.queue:
+            dropped = h.dropped
+            root.removeHandler(h)
+    listener.stop()
+    for handler in listener.handlers:
+        if dropped:
+            handler.handle(logging.makeLogRecord({
+                "name": __name__,
+                "levelno": logging.WARNING,
+                "levelname": "WARNING",
+                "msg": "Dropped %d log records because the logging queue was full",
+                "args": (dropped,),
+            }))
+        handler.flush()
+        # Keep synchronous logging working after shutdown
+        root.addHandler(handler)
+
+
+atexit.register(shutdown_logging)
+
+
 def get_logger(name=None):
     """Convenience wrapper to get a module logger after configuration."""
     return logging.getLogger(name)
@@ -1,15 +1,30 @@
 import argparse
+import json
 import os
+import sys
+import shlex
 import logging
-from models.factory import ObjectFactory
-from repository.repository import Repository
-from services.scheduler import Scheduler
+from repository.codecs import CODECS
 from logging_config import configure_logging
 
+# Models, the repository, the scheduler and the daemon are imported where they
+# are first needed so that short commands start quickly.
+
+logger = logging.getLogger(__name__)
+
 # Will be initialized in main() after parsing CLI options so we can honor --logfile
 repo = None
 scheduler = None
 
+# Commands that always run in the invoking process, never inside a daemon
+LOCAL_COMMANDS = ("serve", "batch", "import", "export", "tail")
+# Path option of commands that may be forwarded; made absolute first, as the daemon has its own working directory
+PATH_OPTIONS = {"create-many": "--file", "update-many": "--file", "delete-many": "--file", "split": "--out"}
+# Records per page for `list --page` without --limit
+DEFAULT_PAGE_SIZE = 20
+# Change feed entries read per call by `tail`
+TAIL_BATCH = 1000
+
 
 def cli_create_user(args):
 	data = {"username": args.username, "age": args.age}
@@ -29,23 +44,80 @@ def cli_create_workout(args):
 
 
 def cli_list(args):
-	for r in repo.read_all():
+	"""Print records, optionally filtered by type and data fields, ordered and paged."""
+	if not (args.type or args.where or args.order_by or args.limit is not None or args.page is not None):
+		for r in repo.iter_records():
+			print(r)
+		return
+	limit = args.limit
+	if args.page is not None and limit is None:
+		limit = DEFAULT_PAGE_SIZE
+	offset = (args.page - 1) * limit if args.page is not None else 0
+	try:
+		records = repo.query(args.type, where=args.where, order_by=args.order_by, limit=limit, offset=offset)
+	except ValueError as e:
+		print(f"Invalid query: {e}")
+		return 1
+	for r in records:
 		print(r)
+	if args.page is not None:
+		first = offset + 1 if records else offset
+		print(f"-- page {args.page}: records {first}-{offset + len(records)} --")
+
+
+def _condition(value):
+	"""argparse type for `--where field<op>value` (op: =, !=, <, <=, >, >=)."""
+	import re
+
+	match = re.fullmatch(r"\s*([^=!<>\s]+)\s*(<=|>=|!=|=|<|>)\s*(.*)", value, re.S)
+	if not match:
+		raise argparse.ArgumentTypeError(f"invalid condition: {value!r} (expected field=value, field>value, ...)")
+	field, op, raw = match.groups()
+	return field, op, _convert_value(raw.strip())
+
+
+def _positive_int(value):
+	"""argparse type for counts that must be at least 1."""
+	try:
+		number = int(value)
+	except ValueError:
+		number = 0
+	if number < 1:
+		raise argparse.ArgumentTypeError(f"expected a positive integer, got {value!r}")
+	return number
+
+
+def _non_negative_int(value):
+	"""argparse type for counts and sequence numbers that may be 0."""
+	try:
+		number = int(value)
+	except ValueError:
+		number = -1
+	if number < 0:
+		raise argparse.ArgumentTypeError(f"expected a non-negative integer, got {value!r}")
+	return number
 
 
 def cli_list_schedules(args):
 	"""List schedule records in a human readable form."""
-	schedules = repo.find_by_type("schedule")
-	if not schedules:
+	# Resolve every referenced user and workout in one batch instead of two lookups per schedule.
+	# Schedules are streamed twice rather than held in memory.
+	ref_ids = set()
+	found = False
+	for s in repo.iter_records("schedule"):
+		found = True
+		data = s.get("data", {})
+		ref_ids.update(v for v in (data.get("user_id"), data.get("workout_id")) if v)
+	if not found:
 		print("No schedules found")
 		return
-	for s in schedules:
+	objects = repo.get_objects_by_ids(ref_ids)
+	for s in repo.iter_records("schedule"):
 		data = s.get("data", {})
 		user_id = data.get("user_id")
 		workout_id = data.get("workout_id")
-		# Try to resolve ids to summaries
-		user = repo.get_object_by_id(user_id) if user_id else None
-		workout = repo.get_object_by_id(workout_id) if workout_id else None
+		user = objects.get(user_id)
+		workout = objects.get(workout_id)
 		user_summary = user.get_info() if user and hasattr(user, "get_info") else (user_id or "Unknown user")
 		workout_summary = workout.get_summary() if workout and hasattr(workout, "get_summary") else (workout_id or "Unknown workout")
 		print(f"Schedule id={s.get('id')}: {user_summary} -> {workout_summary}")
@@ -89,13 +161,75 @@ def cli_get(args):
 			print(obj.burn_info())
 
 
+def _iso_time(value):
+	"""argparse type for ISO-8601 times."""
+	from datetime import datetime
+
+	try:
+		return datetime.fromisoformat(value)
+	except ValueError:
+		raise argparse.ArgumentTypeError(f"invalid ISO-8601 time: {value!r}") from None
+
+
 def cli_schedule(args):
 	user_obj = repo.get_object_by_id(args.user_id)
 	workout_obj = repo.get_object_by_id(args.workout_id)
 	if not user_obj or not workout_obj:
 		print("User or workout not found")
 		return
+	if args.start is None:
+		print(scheduler.schedule_workout(user_obj, workout_obj))
+		return
+	from datetime import timedelta
+	from services.scheduler import Scheduler, ScheduleConflict
+
+	# Only this user's sessions matter for conflicts; the schedule user_id index finds them
+	planner = Scheduler()
+	planner.load(repo.find_by_field("schedule", "user_id", args.user_id))
+	try:
+		sessions = planner.schedule_recurring(
+			args.user_id, args.workout_id, args.start, workout_obj.duration,
+			count=args.repeat, every=timedelta(days=args.every_days),
+		)
+	except ScheduleConflict as e:
+		print(f"Not scheduled: {e}")
+		return 1
+	repo.create_many([{"id": s.id, "type": "schedule", "data": s.to_data()} for s in sessions])
 	print(scheduler.schedule_workout(user_obj, workout_obj))
+	for s in sessions:
+		print(f"Schedule id={s.id}: {s.start:%Y-%m-%d %H:%M} ({s.duration} min)")
+
+
+def cli_next(args):
+	"""Show the next upcoming scheduled sessions, optionally for one user."""
+	from services.scheduler import Scheduler
+
+	planner = Scheduler()
+	if args.user_id:
+		planner.load(repo.find_by_field("schedule", "user_id", args.user_id))
+	else:
+		planner.load(repo.iter_records("schedule"))
+	sessions = planner.next_sessions(args.count, user_id=args.user_id)
+	if not sessions:
+		print("No upcoming sessions")
+		return
+	records = repo.read_by_ids({ref for s in sessions for ref in (s.user_id, s.workout_id) if ref})
+	for s in sessions:
+		user = (records.get(s.user_id) or {}).get("data", {}).get("username") or s.user_id
+		workout = (records.get(s.workout_id) or {}).get("data", {}).get("name") or s.workout_id
+		print(f"{s.start:%Y-%m-%d %H:%M} ({s.duration} min) {user} -> {workout} [schedule id={s.id}]")
+
+
+def _convert_value(v):
+	"""Convert a CLI string to int/float/bool when appropriate."""
+	if v.lower() in ("true", "false"):
+		return v.lower() == "true"
+	try:
+		if "." in v:
+			return float(v)
+		return int(v)
+	except ValueError:
+		return v
 
 
 def cli_update(args):
@@ -115,21 +249,7 @@ def cli_update(args):
 			print(f"Ignoring invalid set value: {s}")
 			continue
 		k, v = s.split("=", 1)
-		k = k.strip()
-		v = v.strip()
-		# Try to convert to int/float/bool when appropriate
-		converted = v
-		if v.lower() in ("true", "false"):
-			converted = v.lower() == "true"
-		else:
-			try:
-				if "." in v:
-					converted = float(v)
-				else:
-					converted = int(v)
-			except ValueError:
-				converted = v
-		updates[k] = converted
+		updates[k.strip()] = _convert_value(v.strip())
 	merged = dict(record.get("data", {}))
 	merged.update(updates)
 	ok = repo.update(args.id, merged)
@@ -138,6 +258,20 @@ def cli_update(args):
 		print(repo.read_by_id(args.id))
 
 
+def cli_find(args):
+	"""Find records of a type by a data field value using the secondary indexes."""
+	converted = _convert_value(args.value)
+	records = repo.find_by_field(args.type, args.field, converted)
+	if not records and converted != args.value:
+		# e.g. a numeric-looking username stored as a string
+		records = repo.find_by_field(args.type, args.field, args.value)
+	if not records:
+		print("No records found")
+		return
+	for r in records:
+		print(r)
+
+
 def cli_delete(args):
 	record = repo.read_by_id(args.id)
 	if not record:
@@ -188,10 +322,331 @@ def cli_update_workout(args):
 		print(repo.read_by_id(args.id))
 
 
+def _read_items(path):
+	"""Read a list of items from a JSON array file or a JSON Lines file."""
+	with open(path, "r", encoding="utf-8") as f:
+		text = f.read()
+	if text.lstrip().startswith("["):
+		return json.loads(text)
+	return [json.loads(line) for line in text.splitlines() if line.strip()]
+
+
+def _print_failures(results, label):
+	failed = [rid for rid, ok in results.items() if not ok]
+	print(f"{label}: {len(results) - len(failed)}/{len(results)}")
+	for rid in failed:
+		print(f"Not found: {rid}")
+
+
+def cli_create_many(args):
+	"""Create one record per item in a JSON/JSONL file with a single write."""
+	items = _read_items(args.file)
+	ids = repo.create_many(items, type_=args.type)
+	print(f"Created {len(ids)} records")
+
+
+def cli_update_many(args):
+	"""Apply {"id": ..., "data": {...}} items from a JSON/JSONL file with a single write."""
+	items = _read_items(args.file)
+	updates = {item["id"]: item.get("data", {}) for item in items}
+	if args.merge:
+		results = repo.update_many(list(updates), lambda r: {**r.get("data", {}), **updates[r["id"]]})
+	else:
+		results = repo.update_many(updates)
+	_print_failures(results, "Updated")
+
+
+def cli_delete_many(args):
+	"""Delete the ids (or {"id": ...} items) listed in a JSON/JSONL file with a single write."""
+	ids = [item["id"] if isinstance(item, dict) else item for item in _read_items(args.file)]
+	if not args.yes:
+		confirm = input(f"Delete {len(ids)} records? (y/N): ").strip().lower()
+		if confirm != "y":
+			print("Aborted")
+			return
+	results = repo.delete_many(ids)
+	_print_failures(results, "Deleted")
+
+
+def _progress_printer(render):
+	"""Return a progress callback printing `render(value)` to stderr at most once per second."""
+	import time
+
+	last = [0.0]
+
+	def progress(value):
+		now = time.monotonic()
+		if now - last[0] >= 1.0:
+			last[0] = now
+			print(render(value), file=sys.stderr, flush=True)
+
+	return progress
+
+
+def cli_import(args):
+	"""Import records from a CSV or JSONL file, validated in a process pool and saved with one write."""
+	from services import bulk_io
+
+	rejects = args.rejects or args.file + ".rejects.jsonl"
+	progress = _progress_printer(
+		lambda st: f"... {st.rows} rows read, {st.accepted} valid, {st.rejected} rejected ({st.rate:,.0f} rows/s)"
+	)
+	try:
+		stats = bulk_io.import_file(
+			repo, args.file, fmt=args.format, default_type=args.type, chunk_size=args.chunk_size,
+			workers=args.workers, rejects_path=rejects, progress=progress, dry_run=args.dry_run,
+		)
+	except (OSError, ValueError) as e:
+		print(f"Import failed: {e}")
+		return 1
+	verb = "Validated" if args.dry_run else "Imported"
+	print(f"{verb} {stats.accepted}/{stats.rows} rows from {args.file}")
+	if stats.rejected:
+		print(f"Rejected {stats.rejected} rows; see {rejects}")
+		return 1
+
+
+def cli_export(args):
+	"""Export records (optionally of one type) to a CSV or JSONL file."""
+	from services import bulk_io
+
+	progress = _progress_printer(lambda n: f"... {n} records written")
+	try:
+		count = bulk_io.export_file(repo, args.file, fmt=args.format, type_=args.type, chunk_size=args.chunk_size, progress=progress)
+	except (OSError, ValueError) as e:
+		print(f"Export failed: {e}")
+		return 1
+	print(f"Exported {count} records to {args.file}")
+
+
+def cli_tail(args):
+	"""Print the change feed entries after --since as JSON lines, optionally waiting for new ones."""
+	import time
+
+	last = args.since
+	try:
+		while True:
+			changes = repo.changes_since(last, limit=TAIL_BATCH)
+			for change in changes:
+				print(json.dumps(change, ensure_ascii=False))
+			if changes:
+				last = changes[-1]["seq"]
+				sys.stdout.flush()
+				continue
+			if not args.follow:
+				return
+			time.sleep(args.interval)
+	except NotImplementedError as e:
+		print(f"Cannot tail: {e}")
+		return 1
+	except KeyboardInterrupt:
+		pass
+
+
+def cli_convert(args):
+	"""Rewrite the data file with another serialization codec."""
+	count = repo.convert(args.to)
+	print(f"Converted {count} records to {args.to}")
+
+
+def cli_snapshot(args):
+	"""Generate the memory-mapped snapshot used for fast cold lookups; later writes keep it current."""
+	count = repo.write_snapshot()
+	print(f"Snapshot written ({count} records)")
+
+
+def cli_split(args):
+	"""Copy data.json into a type-partitioned store (one file per record type plus a manifest)."""
+	from repository.partitioned_repository import PartitionedRepository
+
+	if isinstance(repo, PartitionedRepository):
+		print("Already using a partitioned store; run split without --partitions")
+		return 1
+	try:
+		counts = PartitionedRepository.split(repo, args.out)
+	except ValueError as e:
+		print(f"Not split: {e}")
+		return 1
+	for type_, count in counts.items():
+		print(f"{type_}: {count} records")
+	print(f"Split {sum(counts.values())} records into {len(counts)} partitions in {args.out}; use --partitions {args.out} to work with them")
+
+
+def _format_totals(t):
+	rate = t["calories_per_minute"]
+	rate = f"{rate:.2f}" if rate is not None else "n/a"
+	return f"{t['sessions']} sessions, {t['minutes']:g} min, {t['calories']:g} kcal, {rate} kcal/min"
+
+
+def cli_stats(args):
+	"""Show session, minute and calorie totals per user, optionally rolled up by ISO week."""
+	from services import analytics
+
+	columns = analytics.load_sessions(repo)
+	totals = analytics.user_totals(columns)
+	weekly = analytics.weekly_totals(columns) if args.weekly else {}
+	if args.user:
+		if args.user not in totals:
+			print("No sessions found for user")
+			return
+		user_ids = [args.user]
+	else:
+		user_ids = list(totals)
+	if args.json:
+		users = {uid: dict(totals[uid], weeks=weekly.get(uid, {})) if args.weekly else totals[uid] for uid in user_ids}
+		print(json.dumps({"overall": analytics.overall_totals(columns), "users": users}, indent=2))
+		return
+	if not user_ids:
+		print("No sessions found")
+		return
+	records = repo.read_by_ids([uid for uid in user_ids if uid])
+	for uid in user_ids:
+		username = (records.get(uid) or {}).get("data", {}).get("username")
+		print(f"{username or uid or 'Unknown user'}: {_format_totals(totals[uid])}")
+		for week, week_totals in weekly.get(uid, {}).items():
+			print(f"  {week}: {_format_totals(week_totals)}")
+	if not args.user:
+		print(f"All users: {_format_totals(analytics.overall_totals(columns))}")
+
+
+def cli_summary(args):
+	"""Show the materialized aggregates: records per type, or one user's or workout's counters."""
+	if args.rebuild:
+		repo.rebuild_aggregates()
+	if args.user_id or args.workout_id:
+		if args.user_id:
+			schedules = repo.aggregate("schedules_per_user", args.user_id)
+			minutes = repo.aggregate("minutes_per_user", args.user_id)
+			print(f"User {args.user_id}: {schedules} schedules, {minutes:g} scheduled minutes")
+		if args.workout_id:
+			print(f"Workout {args.workout_id}: {repo.aggregate('schedules_per_workout', args.workout_id)} schedules")
+		return
+	summary = repo.summary()
+	if args.json:
+		print(json.dumps(summary, indent=2))
+		return
+	types = summary["types"]
+	print(f"Records: {sum(types.values())}")
+	for type_, count in sorted(types.items()):
+		print(f"  {type_}: {count}")
+	print(f"Users with schedules: {len(summary['schedules_per_user'])}")
+	print(f"Scheduled minutes: {sum(summary['minutes_per_user'].values()):g}")
+	print(f"Workouts with schedules: {len(summary['schedules_per_workout'])}")
+
+
+def _state_path():
+	"""State file advertising the daemon serving the current data file."""
+	return repo.filename + ".serve.json"
+
+
+def _absolute_paths(argv, args):
+	"""Return `argv` with the command's path option (see PATH_OPTIONS) made absolute for forwarding."""
+	argv = list(argv)
+	option = PATH_OPTIONS.get(args.cmd)
+	if option is None:
+		return argv
+	path = os.path.abspath(getattr(args, option.lstrip("-")))
+	for i in range(argv.index(args.cmd) + 1, len(argv)):
+		# argparse also accepts --opt=value and unambiguous prefixes such as --fi
+		name, eq, _ = argv[i].partition("=")
+		if len(name) > 2 and option.startswith(name):
+			if eq:
+				argv[i] = f"{name}={path}"
+			elif i + 1 < len(argv):
+				argv[i + 1] = path
+	return argv
+
+
+def _needs_prompt(args):
+	return args.cmd in ("delete", "delete-many") and not args.yes
+
+
+def run_argv(argv, parser=None):
+	"""Parse and run one command line against the already initialized repository.
+
+	Used by the daemon and by `batch`; returns the command's exit status.
+	"""
+	args = (parser or build_parser()).parse_args(argv)
+	if args.cmd in LOCAL_COMMANDS:
+		print(f"Cannot run `{args.cmd}` from here")
+		return 1
+	if _needs_prompt(args):
+		# Neither the daemon nor a batch has a terminal to ask on
+		print("Refusing to prompt for confirmation; pass --yes")
+		return 1
+	if hasattr(args, "func"):
+		return args.func(args) or 0
+	return 0
+
+
+def _stop_serving(signum, frame):
+	# Unwind serve_forever like Ctrl+C so the state file is removed
+	raise KeyboardInterrupt
+
+
+def cli_serve(args):
+	"""Keep the repository hot in memory and run forwarded commands until interrupted."""
+	import signal
+	from services import daemon
+
+	pid = daemon.running_pid(_state_path())
+	if pid is not None:
+		print(f"A daemon (pid {pid}) is already serving {repo.filename}")
+		return
+	server = daemon.CommandServer(run_argv, _state_path(), host=args.host, port=args.port)
+	# Parse the data file and load the field indexes once, up front
+	repo.read_all()
+	host, port = server.address
+	print(f"Serving {repo.filename} on {host}:{port} (Ctrl+C to stop)", flush=True)
+	signal.signal(signal.SIGTERM, _stop_serving)
+	try:
+		server.serve_forever()
+	except KeyboardInterrupt:
+		pass
+
+
+def cli_batch(args):
+	"""Run one command per line from a file or stdin, persisting all their writes once at the end.
+
+	Blank lines and lines starting with `#` are skipped. A failing line is
+	reported and the rest still run.
+	"""
+	parser = build_parser()
+	failed = total = 0
+	stream = open(args.file, "r", encoding="utf-8") if args.file else sys.stdin
+	try:
+		with repo.deferred():
+			for lineno, line in enumerate(stream, 1):
+				line = line.strip()
+				if not line or line.startswith("#"):
+					continue
+				total += 1
+				try:
+					status = run_argv(shlex.split(line), parser)
+				except SystemExit as e:
+					# argparse reports bad arguments by exiting
+					status = e.code if isinstance(e.code, int) else 1
+				except Exception as e:
+					logger.exception("Batch line %d failed: %s", lineno, line)
+					print(f"Error: {e}")
+					status = 1
+				if status:
+					failed += 1
+					print(f"Line {lineno} failed: {line}")
+	finally:
+		if stream is not sys.stdin:
+			stream.close()
+	print(f"Batch done: {total - failed}/{total} commands succeeded")
+	return 1 if failed else 0
+
+
 def build_parser():
 	p = argparse.ArgumentParser(description="Fitness Tracker CLI")
 	# Global options
 	p.add_argument("--logfile", help="Path to logfile. If provided, overrides default logs/fitness_tracker.log")
+	p.add_argument("--async-logging", action="store_true", help="Write logs from a background thread through a bounded queue")
+	p.add_argument("--no-daemon", action="store_true", help="Run the command in this process even if a `serve` daemon is running")
+	p.add_argument("--partitions", metavar="DIR", help="Use the type-partitioned store in DIR (created by `split`) instead of data.json")
 	sub = p.add_subparsers(dest="cmd")
 
 	cu = sub.add_parser("create-user")
@@ -206,7 +661,15 @@ def build_parser():
 	cw.add_argument("--duration", type=int, required=True)
 	cw.set_defaults(func=cli_create_workout)
 
-	ls = sub.add_parser("list")
+	ls = sub.add_parser("list", help="List records, optionally filtered, ordered and paged")
+	ls.add_argument("--type", help="Only records of this type")
+	ls.add_argument(
+		"--where", action="append", type=_condition, metavar="FIELD<OP>VALUE",
+		help="Data field condition, e.g. age>=30 or username=alice (repeatable; all must hold)",
+	)
+	ls.add_argument("--order-by", metavar="FIELD", help="Data field to order by; prefix with - for descending (--order-by=-age)")
+	ls.add_argument("--limit", type=_positive_int, help="Maximum number of records (page size with --page)")
+	ls.add_argument("--page", type=_positive_int, help=f"1-based page number (default page size: {DEFAULT_PAGE_SIZE})")
 	ls.set_defaults(func=cli_list)
 
 	g = sub.add_parser("get")
@@ -216,8 +679,16 @@ def build_parser():
 	sch = sub.add_parser("schedule")
 	sch.add_argument("--user-id", required=True)
 	sch.add_argument("--workout-id", required=True)
+	sch.add_argument("--start", type=_iso_time, help="ISO-8601 start time, e.g. 2024-05-01T18:30; stores the session (duration from the workout)")
+	sch.add_argument("--repeat", type=int, default=1, help="Number of sessions to schedule (with --start)")
+	sch.add_argument("--every-days", type=int, default=7, help="Days between repeated sessions (default: 7)")
 	sch.set_defaults(func=cli_schedule)
 
+	nx = sub.add_parser("next", help="Show the next upcoming scheduled sessions")
+	nx.add_argument("--user-id")
+	nx.add_argument("-n", "--count", type=int, default=5)
+	nx.set_defaults(func=cli_next)
+
 	lsch = sub.add_parser("list-schedules")
 	lsch.set_defaults(func=cli_list_schedules)
 
@@ -230,6 +701,12 @@ def build_parser():
 	upd.add_argument("--set", "-s", action="append", help="Set a field: key=value. Repeat for multiple fields.")
 	upd.set_defaults(func=cli_update)
 
+	fd = sub.add_parser("find", help="Find records by a data field value")
+	fd.add_argument("--type", required=True)
+	fd.add_argument("--field", required=True)
+	fd.add_argument("--value", required=True)
+	fd.set_defaults(func=cli_find)
+
 	delp = sub.add_parser("delete")
 	delp.add_argument("--id", required=True)
 	delp.add_argument("--yes", action="store_true", help="Skip confirmation")
@@ -249,28 +726,111 @@ def build_parser():
 	uw.add_argument("--duration", type=int)
 	uw.set_defaults(func=cli_update_workout)
 
+	cm = sub.add_parser("create-many", help="Create records from a JSON array or JSON Lines file")
+	cm.add_argument("--file", required=True)
+	cm.add_argument("--type", help="Record type for items that do not carry one")
+	cm.set_defaults(func=cli_create_many)
+
+	um = sub.add_parser("update-many", help="Update records from a file of {\"id\": ..., \"data\": {...}} items")
+	um.add_argument("--file", required=True)
+	um.add_argument("--merge", action="store_true", help="Merge fields into existing data instead of replacing it")
+	um.set_defaults(func=cli_update_many)
+
+	dm = sub.add_parser("delete-many", help="Delete the record ids listed in a file")
+	dm.add_argument("--file", required=True)
+	dm.add_argument("--yes", action="store_true", help="Skip confirmation")
+	dm.set_defaults(func=cli_delete_many)
+
+	im = sub.add_parser("import", help="Import records from a CSV or JSONL file with a single write")
+	im.add_argument("--file", required=True)
+	im.add_argument("--format", choices=("csv", "jsonl"), help="Input format (default: from the file extension)")
+	im.add_argument("--type", help="Record type for every row (default: the row's type column/key)")
+	im.add_argument("--rejects", help="Where to write rejected rows as JSONL (default: <file>.rejects.jsonl)")
+	im.add_argument("--workers", type=int, help="Validation processes (default: CPU count; 0 or 1 validates in this process)")
+	im.add_argument("--chunk-size", type=_positive_int, default=10000, help="Rows per validation chunk (default: 10000)")
+	im.add_argument("--dry-run", action="store_true", help="Validate and report without saving")
+	im.set_defaults(func=cli_import)
+
+	ex = sub.add_parser("export", help="Export records to a CSV or JSONL file")
+	ex.add_argument("--file", required=True)
+	ex.add_argument("--format", choices=("csv", "jsonl"), help="Output format (default: from the file extension)")
+	ex.add_argument("--type", help="Only export records of this type")
+	ex.add_argument("--chunk-size", type=_positive_int, default=10000, help="Records per buffered write (default: 10000)")
+	ex.set_defaults(func=cli_export)
+
+	tl = sub.add_parser("tail", help="Print changes (JSON lines with increasing seq) made after a sequence number")
+	tl.add_argument("--since", type=_non_negative_int, default=0, help="Last sequence number already seen (default: 0, the whole feed)")
+	tl.add_argument("-f", "--follow", action="store_true", help="Keep waiting for new changes until interrupted")
+	tl.add_argument("--interval", type=float, default=1.0, help="Seconds between polls with --follow (default: 1)")
+	tl.set_defaults(func=cli_tail)
+
+	cv = sub.add_parser("convert", help="Rewrite the data file with another serialization codec")
+	cv.add_argument("--to", required=True, choices=sorted(CODECS))
+	cv.set_defaults(func=cli_convert)
+
+	sn = sub.add_parser("snapshot", help="Generate a memory-mapped snapshot for fast cold-start lookups")
+	sn.set_defaults(func=cli_snapshot)
+
+	spl = sub.add_parser("split", help="Split data.json into one file per record type for --partitions")
+	spl.add_argument("--out", required=True, metavar="DIR", help="Directory for the partitions and manifest.json")
+	spl.set_defaults(func=cli_split)
+
+	sv = sub.add_parser("serve", help="Run a local daemon that keeps the repository in memory; other invocations forward to it")
+	sv.add_argument("--host", default="127.0.0.1")
+	sv.add_argument("--port", type=int, default=0, help="Port to listen on (default: any free port)")
+	sv.set_defaults(func=cli_serve)
+
+	st = sub.add_parser("stats", help="Show per-user workout minutes and calories")
+	st.add_argument("--user", help="Only show this user id")
+	st.add_argument("--weekly", action="store_true", help="Add ISO-week rollups for schedules with a start time")
+	st.add_argument("--json", action="store_true", help="Print machine-readable JSON")
+	st.set_defaults(func=cli_stats)
+
+	sm = sub.add_parser("summary", help="Show record counts and per-user/per-workout totals kept up to date on every write")
+	sm.add_argument("--user-id", help="Show schedule count and scheduled minutes of one user")
+	sm.add_argument("--workout-id", help="Show how many schedules reference one workout")
+	sm.add_argument("--rebuild", action="store_true", help="Recompute the aggregates from the data first")
+	sm.add_argument("--json", action="store_true", help="Print every aggregate as JSON")
+	sm.set_defaults(func=cli_summary)
+
+	bt = sub.add_parser("batch", help="Run many commands (one per line) in one process with a single final write")
+	bt.add_argument("--file", help="File of command lines (default: read stdin)")
+	bt.set_defaults(func=cli_batch)
+
 	return p
 
 
-def main():
+def main(argv=None):
+	argv = sys.argv[1:] if argv is None else argv
 	parser = build_parser()
-	args = parser.parse_args()
+	args = parser.parse_args(argv)
 	# Configure logging now that we have CLI options (e.g. --logfile)
 	logfile = getattr(args, "logfile", None)
 	if logfile:
 		# If user provided a full path, split dir/name. If only a name, leave dir default.
 		log_dir = os.path.dirname(logfile) or None
 		log_name = os.path.basename(logfile)
-		configure_logging(level=logging.INFO, log_dir=log_dir, logfile_name=log_name)
+		configure_logging(level=logging.INFO, log_dir=log_dir, logfile_name=log_name, async_mode=args.async_logging)
 	else:
-		configure_logging()
+		configure_logging(async_mode=args.async_logging)
 
 	# Initialize repository and services after logging is configured
+	from services.scheduler import Scheduler
+
 	global repo, scheduler
-	repo = Repository()
+	if args.partitions:
+		from repository.partitioned_repository import PartitionedRepository
+
+		repo = PartitionedRepository(args.partitions)
+	else:
+		from repository.repository import Repository
+
+		repo = Repository()
 	scheduler = Scheduler()
 	if not vars(args):
 		# no args provided; run default demo
+		from models.factory import ObjectFactory
+
 		user = ObjectFactory.create_object("user", "Ruzi", 21)
 		workout = ObjectFactory.create_object("workout", "Chest Day", 45)
 		print(user.get_info())
@@ -281,9 +841,18 @@ def main():
 		print(scheduler.schedule_workout(user, workout))
 	else:
 		if hasattr(args, "func"):
-			args.func(args)
+			if args.cmd not in LOCAL_COMMANDS and not args.no_daemon and not _needs_prompt(args) and os.path.exists(_state_path()):
+				# Hand the command to a running daemon, which already has the data parsed
+				from services import daemon
+
+				result = daemon.forward(_absolute_paths(argv, args), _state_path())
+				if result is not None:
+					print(result["output"], end="")
+					return result["status"]
+			return args.func(args) or 0
+	return 0
 
 
 if __name__ == "__main__":
-	main()
+	sys.exit(main())
 
@@ -1,4 +1,6 @@
 class Exercise:
+    __slots__ = ("_name", "_calories")
+
     def __init__(self, name, calories):
         self._name = name
         self._calories = calories
@@ -1,28 +1,105 @@
+import logging
 from .user import User
 from .workout import Workout
 from .exercise import Exercise
 
+logger = logging.getLogger(__name__)
+
+
+class LazyObject:
+    """Stand-in for a domain object that is only constructed when first used.
+
+    `isinstance(proxy, User)` works without constructing it; any other
+    attribute access builds the object from the record data and delegates to it.
+
+    The proxy reports the domain class through an overridden `__class__`, so
+    `isinstance` and `proxy.__class__` see `User` while `type(proxy)` is still
+    `LazyObject`. Code that dispatches on `type()` (or uses it as a dict key)
+    must use `isinstance` or hydrate with `lazy=False` instead.
+    """
+
+    __slots__ = ("_cls", "_data", "_obj")
+
+    def __init__(self, cls, data):
+        # Slot descriptors directly: __setattr__ forwards to the built object
+        _set_cls(self, cls)
+        _set_data(self, data)
+        _set_obj(self, None)
+
+    @property
+    def __class__(self):
+        return self._cls
+
+    def _resolve(self):
+        obj = self._obj
+        if obj is None:
+            obj = self._cls(**self._data)
+            _set_obj(self, obj)
+        return obj
+
+    def __getattr__(self, name):
+        return getattr(self._resolve(), name)
+
+    def __setattr__(self, name, value):
+        setattr(self._resolve(), name, value)
+
+    def __repr__(self):
+        if self._obj is None:
+            return f"<lazy {self._cls.__name__}>"
+        return repr(self._obj)
+
+
+_set_cls = LazyObject._cls.__set__
+_set_data = LazyObject._data.__set__
+_set_obj = LazyObject._obj.__set__
+
 
 class ObjectFactory:
-    @staticmethod
-    def create_object(object_type, *args, **kwargs):
+    # Record/object type name -> model class; extend with `register`
+    _registry = {}
+
+    @classmethod
+    def register(cls, type_name: str, model=None):
+        """Register `model` as the class built for `type_name`.
+
+        Usable directly (`ObjectFactory.register("meal", Meal)`) or as a class
+        decorator (`@ObjectFactory.register("meal")`). Re-registering a name
+        replaces the previous class.
+        """
+        if model is None:
+            def decorator(model_cls):
+                cls._registry[type_name] = model_cls
+                return model_cls
+
+            return decorator
+        cls._registry[type_name] = model
+        return model
+
+    @classmethod
+    def registered_types(cls) -> tuple:
+        return tuple(cls._registry)
+
+    @classmethod
+    def _model_for(cls, type_name):
+        try:
+            return cls._registry[type_name]
+        except KeyError:
+            raise ValueError(f"Unknown record type: {type_name}") from None
+
+    @classmethod
+    def create_object(cls, object_type, *args, **kwargs):
         """Create an object by type using positional or keyword args.
 
         Examples:
             create_object('user', 'alice', 30)
             create_object('user', username='alice', age=30)
         """
-        if object_type == "user":
-            return User(*args, **kwargs)
-        elif object_type == "workout":
-            return Workout(*args, **kwargs)
-        elif object_type == "exercise":
-            return Exercise(*args, **kwargs)
-        else:
+        if object_type not in cls._registry:
             raise ValueError("Unknown object type")
+        return cls._registry[object_type](*args, **kwargs)
 
-    @staticmethod
-    def create_from_record(record: dict):
+    @classmethod
+    def create_from_record(cls, record: dict):
         """Create a domain object from a structured record.
 
         The record is expected to have keys: 'type' and 'data', where 'data'
@@ -30,15 +107,39 @@ class ObjectFactory:
         """
         if not isinstance(record, dict):
             raise ValueError("record must be a dict")
+        return cls._model_for(record.get("type"))(**(record.get("data") or {}))
+
+    @classmethod
+    def hydrate_many(cls, records, lazy=False, strict=True) -> list:
+        """Build domain objects for many records, in order.
+
+        Each record type's class is resolved once for the whole batch. With
+        `lazy=True` the result holds `LazyObject` proxies that construct the
+        object on first attribute access. With `strict=False` a record that
+        cannot be built (unknown type, bad data) is logged and yields None
+        instead of raising; lazy proxies can only report bad data when used.
+        """
+        models = {}
+        objects = []
+        for record in records:
+            try:
+                if not isinstance(record, dict):
+                    raise ValueError(f"record must be a dict, not {type(record).__name__}")
+                rec_type = record.get("type")
+                model = models.get(rec_type)
+                if model is None:
+                    model = models[rec_type] = cls._model_for(rec_type)
+                data = record.get("data") or {}
+                objects.append(LazyObject(model, data) if lazy else model(**data))
+            except Exception:
+                if strict:
+                    raise
+                rid = record.get("id") if isinstance(record, dict) else None
+                logger.exception("Failed to build domain object from record id=%s", rid)
+                objects.append(None)
+        return objects
+
 
-        rec_type = record.get("type")
-        data = record.get("data") or {}
-
-        if rec_type == "user":
-            return User(**data)
-        elif rec_type == "workout":
-            return Workout(**data)
-        elif rec_type == "exercise":
-            return Exercise(**data)
-        else:
-            raise ValueError(f"Unknown record type: {rec_type}")
\ No newline at end of file
+ObjectFactory.register("user", User)
+ObjectFactory.register("workout", Workout)
+ObjectFactory.register("exercise", Exercise)
@@ -0,0 +1,231 @@
+import sys
+import math
+from array import array
+from .user import User
+from .workout import Workout
+from .exercise import Exercise
+
+
+class _StringColumn:
+    """Dictionary-encoded string column: one small int code per row plus a table of interned values."""
+
+    __slots__ = ("codes", "values", "_lookup")
+
+    def __init__(self):
+        self.codes = array("l")
+        self.values = []
+        self._lookup = {}
+
+    def append(self, value):
+        code = self._lookup.get(value)
+        if code is None:
+            code = len(self.values)
+            if isinstance(value, str):
+                value = sys.intern(value)
+            self.values.append(value)
+            self._lookup[value] = code
+        self.codes.append(code)
+
+    def pop(self):
+        self.codes.pop()
+
+    def __getitem__(self, i):
+        return self.values[self.codes[i]]
+
+    def __len__(self):
+        return len(self.codes)
+
+
+class _FloatColumn:
+    """Nullable float column; None is stored as NaN.
+
+    Cells given as ints (e.g. a weight of 80) are flagged in `ints` and read
+    back as ints, so row output matches the model built from the same data.
+    """
+
+    __slots__ = ("data", "ints")
+
+    def __init__(self):
+        self.data = array("d")
+        self.ints = bytearray()
+
+    def append(self, value):
+        self.data.append(math.nan if value is None else float(value))
+        self.ints.append(type(value) is int)
+
+    def pop(self):
+        self.data.pop()
+        self.ints.pop()
+
+    def __getitem__(self, i):
+        value = self.data[i]
+        if math.isnan(value):
+            return None
+        return int(value) if self.ints[i] else value
+
+    def __len__(self):
+        return len(self.data)
+
+
+class _IntColumn:
+    """Nullable int column; None is stored as `MISSING` (the smallest 64-bit integer).
+
+    Values with a fractional part raise ValueError rather than being truncated.
+    """
+
+    __slots__ = ("data",)
+
+    MISSING = -(2 ** 63)
+
+    def __init__(self):
+        self.data = array("q")
+
+    def append(self, value):
+        if value is None:
+            self.data.append(self.MISSING)
+            return
+        if isinstance(value, float) and not value.is_integer():
+            raise ValueError(f"{value!r} is not an integer; use a float column")
+        self.data.append(int(value))
+
+    def pop(self):
+        self.data.pop()
+
+    def __getitem__(self, i):
+        value = self.data[i]
+        return None if value == self.MISSING else value
+
+    def __len__(self):
+        return len(self.data)
+
+
+_COLUMN_KINDS = {"str": _StringColumn, "int": _IntColumn, "float": _FloatColumn}
+
+
+def _column(name):
+    """Row view property reading `name` from the row's table."""
+    return property(lambda row: row._table.columns[name][row._index])
+
+
+class _RowView:
+    """Lightweight view of one table row; fields are read from the table's columns."""
+
+    __slots__ = ("_table", "_index")
+
+    def __init__(self, table, index):
+        self._table = table
+        self._index = index
+
+    @property
+    def id(self):
+        return self._table.ids[self._index]
+
+    def to_dict(self):
+        return {name: self._table.columns[name][self._index] for name, _ in self._table.schema}
+
+
+class _Table:
+    """Columnar container storing one compact array per field instead of one object per row."""
+
+    schema = ()
+    row_class = _RowView
+    record_type = None
+
+    def __init__(self):
+        self.ids = []
+        self.columns = {name: _COLUMN_KINDS[kind]() for name, kind in self.schema}
+
+    def append(self, *args, record_id=None, **kwargs) -> int:
+        """Append a row using the model constructor's arguments; return its index."""
+        names = [name for name, _ in self.schema]
+        values = dict(zip(names, args))
+        values.update(kwargs)
+        done = []
+        try:
+            for name in names:
+                self.columns[name].append(values.get(name))
+                done.append(name)
+        except (TypeError, ValueError):
+            # Keep every column the same length as `ids`
+            for name in done:
+                self.columns[name].pop()
+            raise
+        self.ids.append(record_id)
+        return len(self.ids) - 1
+
+    def extend_records(self, records):
+        """Append structured records of this table's type; other types are skipped."""
+        for r in records:
+            if r.get("type") == self.record_type:
+                self.append(record_id=r.get("id"), **(r.get("data") or {}))
+
+    @classmethod
+    def from_records(cls, records):
+        table = cls()
+        table.extend_records(records)
+        return table
+
+    def column(self, name):
+        """Return the raw storage of a numeric column (an `array`) for bulk analytics.
+
+        Arrays support the buffer protocol, so `numpy.frombuffer` can wrap them without copying.
+        Missing values are NaN in float columns and `_IntColumn.MISSING` in int columns.
+        """
+        return self.columns[name].data
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("row index out of range")
+        return self.row_class(self, index)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self.row_class(self, i)
+
+
+class UserRow(_RowView):
+    __slots__ = ()
+    username = _column("username")
+    age = _column("age")
+    height = _column("height")
+    weight = _column("weight")
+    get_info = User.get_info
+
+
+class WorkoutRow(_RowView):
+    __slots__ = ()
+    name = _column("name")
+    duration = _column("duration")
+    get_summary = Workout.get_summary
+
+
+class ExerciseRow(_RowView):
+    __slots__ = ()
+    # Exercise keeps its fields private; mirror the names its methods read
+    _name = _column("name")
+    _calories = _column("calories")
+    burn_info = Exercise.burn_info
+
+
+class UserTable(_Table):
+    schema = (("username", "str"), ("age", "int"), ("height", "float"), ("weight", "float"))
+    row_class = UserRow
+    record_type = "user"
+
+
+class WorkoutTable(_Table):
+    schema = (("name", "str"), ("duration", "int"))
+    row_class = WorkoutRow
+    record_type = "workout"
+
+
+class ExerciseTable(_Table):
+    # Calories may be fractional (Exercise keeps whatever it is given)
+    schema = (("name", "str"), ("calories", "float"))
+    row_class = ExerciseRow
+    record_type = "exercise"
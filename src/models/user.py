@@ -1,4 +1,6 @@
 class User:
+    __slots__ = ("username", "age", "height", "weight")
+
     def __init__(self, username, age, height=None, weight=None):
         self.username = username
         self.age = age
@@ -1,7 +1,11 @@
 class Workout:
-    def __init__(self, name, duration):
+    __slots__ = ("name", "duration", "exercise_ids")
+
+    def __init__(self, name, duration, exercise_ids=None):
         self.name = name
         self.duration = duration
+        # Ids of the exercise records this workout is made of
+        self.exercise_ids = list(exercise_ids) if exercise_ids else []
 
     def get_summary(self):
         return f"Workout: {self.name}, Duration: {self.duration} minutes"
@@ -0,0 +1,86 @@
+import json
+from .atomic import atomic_write
+
+# Materialized aggregates, each a {key: number} map:
+#   types                  record count per type
+#   schedules_per_user     schedule count per data.user_id
+#   minutes_per_user       total schedule data.duration per data.user_id
+#   schedules_per_workout  schedule count per data.workout_id
+AGGREGATES = ("types", "schedules_per_user", "minutes_per_user", "schedules_per_workout")
+
+
+def _minutes(value):
+    return value if isinstance(value, (int, float)) and not isinstance(value, bool) else 0
+
+
+def _bump(counts, key, delta):
+    if not delta:
+        return
+    value = counts.get(key, 0) + delta
+    if value:
+        counts[key] = value
+    else:
+        # Keep the maps as small as the data: zero means absent
+        counts.pop(key, None)
+
+
+class Aggregates:
+    """Counters and sums over the records, kept current by applying each change.
+
+    Same maintenance interface as `FieldIndex` (add/remove/rebuild/save/load),
+    so the repository updates both the same way. Keys are stored as strings
+    (JSON object keys).
+    """
+
+    def __init__(self):
+        self.values = {name: {} for name in AGGREGATES}
+
+    def get(self, name: str, key) -> float:
+        """Return one aggregate value, 0 when absent. Raises KeyError for an unknown aggregate."""
+        return self.values[name].get(str(key), 0)
+
+    def add(self, record):
+        self._apply(record, 1)
+
+    def remove(self, record):
+        self._apply(record, -1)
+
+    def _apply(self, record, sign):
+        type_ = record.get("type")
+        _bump(self.values["types"], str(type_), sign)
+        if type_ != "schedule":
+            return
+        data = record.get("data") or {}
+        user_id = data.get("user_id")
+        if user_id is not None:
+            _bump(self.values["schedules_per_user"], str(user_id), sign)
+            _bump(self.values["minutes_per_user"], str(user_id), sign * _minutes(data.get("duration")))
+        workout_id = data.get("workout_id")
+        if workout_id is not None:
+            _bump(self.values["schedules_per_workout"], str(workout_id), sign)
+
+    def rebuild(self, records):
+        self.values = {name: {} for name in AGGREGATES}
+        for r in records:
+            self.add(r)
+
+    def save(self, path, stamp):
+        """Atomically write the aggregates to `path`, tagged with the data file stamp they reflect."""
+        payload = {"stamp": list(stamp) if stamp else None, "values": self.values}
+        with atomic_write(path) as f:
+            json.dump(payload, f, separators=(",", ":"), ensure_ascii=False)
+
+    def load(self, path, stamp) -> bool:
+        """Load the aggregates from `path` if they were saved for `stamp`."""
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                payload = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return False
+        if payload.get("stamp") != (list(stamp) if stamp else None):
+            return False
+        values = payload.get("values") or {}
+        if sorted(values) != sorted(AGGREGATES):
+            return False
+        self.values = values
+        return True
@@ -0,0 +1,142 @@
+import copy
+import asyncio
+import logging
+from abc import ABC, abstractmethod
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncIRepository(ABC):
+    """asyncio counterpart of `IRepository`: the same operations as coroutines."""
+
+    @abstractmethod
+    async def create(self, item_dict: dict, type_: str = None) -> str:
+        """Create a new record and return its id."""
+
+    @abstractmethod
+    async def read_all(self) -> list:
+        """Return all records as a list."""
+
+    @abstractmethod
+    async def read_by_id(self, record_id: str) -> dict:
+        """Return a single record by id or None."""
+
+    @abstractmethod
+    async def update(self, record_id: str, new_data: dict) -> bool:
+        """Update record data by id. Return True if updated."""
+
+    @abstractmethod
+    async def delete(self, record_id: str) -> bool:
+        """Delete a record by id. Return True if deleted."""
+
+    @abstractmethod
+    async def find_by_type(self, type_: str) -> list:
+        """Return records matching the provided type."""
+
+
+class AsyncRepositoryAdapter(AsyncIRepository):
+    """Run a synchronous `IRepository` off the event loop.
+
+    - Every call executes in `executor` (the loop's default thread pool when None),
+      so file I/O never blocks the loop.
+    - Concurrent identical reads share one backend call: a read that is already
+      in flight for the same snapshot is awaited instead of started again.
+      Every waiter gets its own copy of a list or dict result; the records in
+      it are shared, as with the backend, so treat them as read-only.
+    - Writes are serialized through an asyncio.Lock and never overlap a read,
+      and each write starts a new snapshot so later reads see its effect.
+
+    Any other backend method (e.g. `find_by_field`, `create_many`) is reachable
+    as `await adapter.call("name", *args)` with the same read/write rules.
+    `iter_records` is drained in the pool and returned as a list.
+    """
+
+    # Backend methods that only read; everything else is treated as a write
+    READ_METHODS = frozenset({
+        "read_all", "read_by_id", "read_by_ids", "find_by_type", "find_by_field",
+        "get_object_by_id", "get_objects_by_ids", "query", "iter_records",
+        "changes_since", "summary", "aggregate",
+    })
+
+    def __init__(self, repo, executor=None):
+        self.repo = repo
+        self.executor = executor
+        self._write_lock = asyncio.Lock()
+        # Bumped by every write; in-flight reads are keyed by it
+        self._generation = 0
+        self._inflight = {}
+        self._active_reads = 0
+        self._reads_done = None
+
+    async def create(self, item_dict: dict, type_: str = None) -> str:
+        return await self._write("create", item_dict, type_)
+
+    async def read_all(self) -> list:
+        return await self._read("read_all")
+
+    async def read_by_id(self, record_id: str) -> dict:
+        return await self._read("read_by_id", record_id)
+
+    async def update(self, record_id: str, new_data: dict) -> bool:
+        return await self._write("update", record_id, new_data)
+
+    async def delete(self, record_id: str) -> bool:
+        return await self._write("delete", record_id)
+
+    async def find_by_type(self, type_: str) -> list:
+        return await self._read("find_by_type", type_)
+
+    async def call(self, method: str, *args):
+        """Invoke any backend method, treating it as a read or a write by name."""
+        if method in self.READ_METHODS:
+            return await self._read(method, *args)
+        return await self._write(method, *args)
+
+    def _run(self, method, *args):
+        loop = asyncio.get_running_loop()
+        fn = getattr(self.repo, method)
+        if method == "iter_records":
+            # A generator would do its reading on the loop thread; drain it in the pool
+            return loop.run_in_executor(self.executor, lambda: list(fn(*args)))
+        return loop.run_in_executor(self.executor, fn, *args)
+
+    async def _read(self, method, *args):
+        # Wait for a write in progress; reads then run concurrently with each other
+        while self._write_lock.locked():
+            async with self._write_lock:
+                pass
+        try:
+            key = (self._generation, method, args)
+            hash(key)
+        except TypeError:
+            # Unhashable arguments (e.g. a list of ids) cannot be coalesced
+            key = None
+        future = self._inflight.get(key) if key is not None else None
+        if future is None:
+            # Count the read before yielding to the loop, so a write scheduled next waits for it
+            self._active_reads += 1
+            future = self._run(method, *args)
+            future.add_done_callback(self._read_finished)
+            if key is not None:
+                self._inflight[key] = future
+                future.add_done_callback(lambda f, k=key: self._inflight.pop(k, None))
+        # shield: one cancelled waiter must not cancel the shared call
+        result = await asyncio.shield(future)
+        # Coalesced waiters must not see each other's changes to the container
+        return copy.copy(result) if isinstance(result, (list, dict)) else result
+
+    def _read_finished(self, future):
+        self._active_reads -= 1
+        if self._active_reads == 0 and self._reads_done is not None:
+            self._reads_done.set()
+
+    async def _write(self, method, *args):
+        async with self._write_lock:
+            # Let reads already running in the pool finish before changing the data
+            while self._active_reads:
+                self._reads_done = asyncio.Event()
+                await self._reads_done.wait()
+            self._reads_done = None
+            self._generation += 1
+            logger.debug("Async %s (generation %d)", method, self._generation)
+            return await self._run(method, *args)
@@ -0,0 +1,173 @@
+import os
+import json
+import logging
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows has no fcntl; run without locking
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# Bytes left to scan linearly once the binary search has narrowed the range
+_SCAN_WINDOW = 4096
+
+
+def change_entry(seq, old, new) -> dict:
+    """The feed entry for one record change (old record -> new record, None for absent)."""
+    record = new if new is not None else old
+    op = "create" if old is None else "delete" if new is None else "update"
+    return {"seq": seq, "op": op, "id": record.get("id"), "type": record.get("type"),
+            "data": new.get("data") if new is not None else None}
+
+
+def reset_entry(seq) -> dict:
+    """The feed entry telling consumers that changes before it were lost and they must resync fully."""
+    return {"seq": seq, "op": "reset", "id": None, "type": None, "data": None}
+
+
+class ChangeFeed:
+    """Append-only JSON Lines log of record changes with increasing sequence numbers.
+
+    Each line is {"seq": n, "op": "create"|"update"|"delete", "id", "type", "data"}
+    (`data` is the new data, None for deletes). An "op": "reset" entry marks
+    changes that were committed but never recorded (a writer crashed between
+    replacing the data file and appending, or wrote with the feed disabled):
+    a consumer reaching it reloads everything and continues from its `seq`.
+
+    Entries are only appended for committed writes and never removed, so a
+    sequence number is handed out once. Writers serialize `append` either by
+    holding the data file's exclusive lock or, for a feed shared by several
+    files, through `lock_path`. Readers need no lock and ignore a trailing
+    line that is still being written.
+    """
+
+    def __init__(self, path, lock_path=None):
+        self.path = path
+        self.lock_path = lock_path
+
+    def last_seq(self) -> int:
+        """Sequence number of the last complete entry, 0 when the feed is empty."""
+        try:
+            with open(self.path, "rb") as f:
+                f.seek(0, os.SEEK_END)
+                end = f.tell()
+                # Read backwards until the last complete line is in the buffer
+                chunk = b""
+                pos = end
+                while pos > 0:
+                    step = min(_SCAN_WINDOW, pos)
+                    pos -= step
+                    f.seek(pos)
+                    chunk = f.read(step) + chunk
+                    # The last piece is unterminated, the first one may be cut off by `pos`
+                    lines = chunk.split(b"\n")[(1 if pos else 0):-1]
+                    complete = [line for line in lines if line.strip()]
+                    if complete:
+                        return json.loads(complete[-1])["seq"]
+        except FileNotFoundError:
+            pass
+        return 0
+
+    def append(self, changes, reset=False) -> int:
+        """Append one entry per (old, new) change, after a reset entry if `reset`; return the last sequence number."""
+        with self._locked():
+            seq = self.last_seq()
+            entries = []
+            if reset:
+                seq += 1
+                entries.append(reset_entry(seq))
+            for old, new in changes:
+                seq += 1
+                entries.append(change_entry(seq, old, new))
+            if entries:
+                self._drop_torn_tail()
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.writelines(json.dumps(e, separators=(",", ":"), ensure_ascii=False) + "\n" for e in entries)
+                    f.flush()
+                    os.fsync(f.fileno())
+            return seq
+
+    @contextmanager
+    def _locked(self):
+        if self.lock_path is None or fcntl is None:
+            yield
+            return
+        with open(self.lock_path, "a+", encoding="utf-8") as lock:
+            fcntl.flock(lock.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock.fileno(), fcntl.LOCK_UN)
+
+    def _drop_torn_tail(self):
+        """Cut an unterminated last line left by a writer that died mid-append."""
+        try:
+            with open(self.path, "r+b") as f:
+                end = f.seek(0, os.SEEK_END)
+                pos = end
+                while pos > 0:
+                    step = min(_SCAN_WINDOW, pos)
+                    f.seek(pos - step)
+                    chunk = f.read(step)
+                    newline = chunk.rfind(b"\n")
+                    if newline >= 0:
+                        pos = pos - step + newline + 1
+                        break
+                    pos -= step
+                if pos != end:
+                    logger.warning("Dropping %d bytes of a torn entry at the end of %s", end - pos, self.path)
+                    f.truncate(pos)
+        except FileNotFoundError:
+            pass
+
+    def since(self, seq: int, limit: int = None) -> list:
+        """Return the entries with a sequence number above `seq`, oldest first.
+
+        The start is found by binary search over byte offsets, so the cost
+        depends on the number of changes returned, not on the feed length.
+        """
+        entries = []
+        try:
+            with open(self.path, "rb") as f:
+                f.seek(self._offset_after(f, seq))
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        # Entry still being appended
+                        break
+                    if not line.strip():
+                        continue
+                    entry = json.loads(line)
+                    if entry["seq"] <= seq:
+                        continue
+                    entries.append(entry)
+                    if limit is not None and len(entries) >= limit:
+                        break
+        except FileNotFoundError:
+            pass
+        return entries
+
+    @staticmethod
+    def _offset_after(f, seq) -> int:
+        """Byte offset of a line start at or before the first entry with a sequence number above `seq`."""
+        f.seek(0, os.SEEK_END)
+        lo, hi = 0, f.tell()
+        # Invariant: entries starting before `lo` have seq <= `seq`; the first one above starts at or before `hi`
+        while hi - lo > _SCAN_WINDOW:
+            mid = (lo + hi) // 2
+            f.seek(mid)
+            f.readline()
+            start = f.tell()
+            line = f.readline()
+            if start >= hi or not line.endswith(b"\n"):
+                break
+            try:
+                current = json.loads(line)["seq"]
+            except (ValueError, KeyError):
+                break
+            if current <= seq:
+                lo = f.tell()
+            else:
+                hi = start
+        return lo
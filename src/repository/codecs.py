@@ -0,0 +1,137 @@
+import json
+import marshal
+import zlib
+
+# Binary formats start with MAGIC, a format version byte and a codec tag byte.
+# JSON formats have no header: a file starting with anything else is JSON text.
+MAGIC = b"FTRK"
+HEADER_VERSION = 1
+HEADER_SIZE = len(MAGIC) + 2
+
+
+class Codec:
+    """Serializes a list of records to bytes and back."""
+
+    name = None
+    tag = None  # header tag byte; None for headerless JSON text
+    streamable = False  # True if `jsonstream.iter_json_array` can walk the file
+
+    def encode(self, records) -> bytes:
+        payload = self._dumps(records)
+        if self.tag is None:
+            return payload
+        return MAGIC + bytes((HEADER_VERSION, self.tag)) + payload
+
+    def decode(self, raw: bytes):
+        if self.tag is not None:
+            raw = raw[HEADER_SIZE:]
+        return self._loads(raw)
+
+    def _dumps(self, records) -> bytes:
+        raise NotImplementedError
+
+    def _loads(self, payload: bytes):
+        raise NotImplementedError
+
+
+class JsonCodec(Codec):
+    """Pretty-printed JSON array (indent=4), the original data.json format."""
+
+    name = "json"
+    streamable = True
+
+    def _dumps(self, records):
+        return json.dumps(records, indent=4).encode("utf-8")
+
+    def _loads(self, payload):
+        return json.loads(payload.decode("utf-8")) if payload.strip() else []
+
+
+class CompactJsonCodec(JsonCodec):
+    """JSON array without indentation or spaces after separators."""
+
+    name = "json-compact"
+
+    def _dumps(self, records):
+        return json.dumps(records, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+class MarshalCodec(Codec):
+    name = "marshal"
+    tag = 1
+
+    def _dumps(self, records):
+        return marshal.dumps(records)
+
+    def _loads(self, payload):
+        return marshal.loads(payload)
+
+
+class PickleCodec(Codec):
+    """Pickle protocol 5. Only load files you trust: unpickling can run arbitrary code."""
+
+    name = "pickle"
+    tag = 2
+
+    # pickle and lzma are imported on first use to keep CLI startup fast
+    def _dumps(self, records):
+        import pickle
+
+        return pickle.dumps(records, protocol=5)
+
+    def _loads(self, payload):
+        import pickle
+
+        return pickle.loads(payload)
+
+
+class ZlibJsonCodec(CompactJsonCodec):
+    name = "json-zlib"
+    tag = 3
+    streamable = False
+
+    def _dumps(self, records):
+        return zlib.compress(super()._dumps(records), 6)
+
+    def _loads(self, payload):
+        return super()._loads(zlib.decompress(payload))
+
+
+class LzmaJsonCodec(CompactJsonCodec):
+    name = "json-lzma"
+    tag = 4
+    streamable = False
+
+    def _dumps(self, records):
+        import lzma
+
+        return lzma.compress(super()._dumps(records))
+
+    def _loads(self, payload):
+        import lzma
+
+        return super()._loads(lzma.decompress(payload))
+
+
+CODECS = {c.name: c() for c in (JsonCodec, CompactJsonCodec, MarshalCodec, PickleCodec, ZlibJsonCodec, LzmaJsonCodec)}
+_BY_TAG = {c.tag: c for c in CODECS.values() if c.tag is not None}
+
+
+def get_codec(name: str) -> Codec:
+    try:
+        return CODECS[name]
+    except KeyError:
+        raise ValueError(f"Unknown codec: {name} (choose from {', '.join(CODECS)})") from None
+
+
+def detect_codec(head: bytes) -> Codec:
+    """Return the codec of a file from its first bytes (at least HEADER_SIZE when available)."""
+    if head.startswith(MAGIC):
+        if len(head) < HEADER_SIZE or head[len(MAGIC)] != HEADER_VERSION or head[len(MAGIC) + 1] not in _BY_TAG:
+            raise ValueError("Unsupported data file header")
+        return _BY_TAG[head[len(MAGIC) + 1]]
+    # JSON text: indented files have whitespace right after "[" (or are "[]")
+    text = head.lstrip()
+    if text.startswith(b"[") and text[1:2] not in (b"", b"]") and not text[1:2].isspace():
+        return CODECS["json-compact"]
+    return CODECS["json"]
@@ -0,0 +1,91 @@
+import json
+from .atomic import atomic_write
+
+# (record type, data field) pairs indexed by default
+DEFAULT_FIELD_INDEXES = (
+    ("user", "username"),
+    ("workout", "name"),
+    ("schedule", "user_id"),
+    ("schedule", "workout_id"),
+)
+
+
+class FieldIndex:
+    """Secondary indexes mapping (type, data field, value) to record ids.
+
+    Values are keyed by their JSON encoding, so lookups match on the JSON
+    value (e.g. 30 and "30" are different keys). Each key maps to an
+    insertion-ordered dict of ids, which makes add/remove O(1).
+    """
+
+    def __init__(self, fields=DEFAULT_FIELD_INDEXES):
+        self.fields = tuple((t, f) for t, f in fields)
+        self._by_type = {}
+        for type_, field in self.fields:
+            self._by_type.setdefault(type_, []).append(field)
+        self._maps = {pair: {} for pair in self.fields}
+
+    @staticmethod
+    def key(value) -> str:
+        return json.dumps(value, sort_keys=True, ensure_ascii=False)
+
+    def covers(self, type_: str, field: str) -> bool:
+        return (type_, field) in self._maps
+
+    def lookup(self, type_: str, field: str, value) -> list:
+        """Return the ids of records of `type_` whose data[field] equals value."""
+        return list(self._maps[(type_, field)].get(self.key(value), ()))
+
+    def add(self, record):
+        fields = self._by_type.get(record.get("type"))
+        if not fields:
+            return
+        data = record.get("data") or {}
+        for field in fields:
+            if field in data:
+                self._maps[(record["type"], field)].setdefault(self.key(data[field]), {})[record.get("id")] = None
+
+    def remove(self, record):
+        fields = self._by_type.get(record.get("type"))
+        if not fields:
+            return
+        data = record.get("data") or {}
+        for field in fields:
+            if field not in data:
+                continue
+            entries = self._maps[(record["type"], field)]
+            k = self.key(data[field])
+            ids = entries.get(k)
+            if ids is not None:
+                ids.pop(record.get("id"), None)
+                if not ids:
+                    del entries[k]
+
+    def rebuild(self, records):
+        self._maps = {pair: {} for pair in self.fields}
+        for r in records:
+            self.add(r)
+
+    def save(self, path, stamp):
+        """Atomically write the index to `path`, tagged with the data file stamp it reflects."""
+        payload = {
+            "stamp": list(stamp) if stamp else None,
+            "fields": [list(pair) for pair in self.fields],
+            "entries": [[t, f, {k: list(ids) for k, ids in self._maps[(t, f)].items()}] for t, f in self.fields],
+        }
+        with atomic_write(path) as f:
+            json.dump(payload, f, separators=(",", ":"), ensure_ascii=False)
+
+    def load(self, path, stamp) -> bool:
+        """Load the index from `path` if it was saved for `stamp` with the same fields."""
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                payload = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return False
+        if payload.get("stamp") != (list(stamp) if stamp else None):
+            return False
+        if [tuple(p) for p in payload.get("fields", [])] != list(self.fields):
+            return False
+        self._maps = {(t, f): {k: dict.fromkeys(ids) for k, ids in entries.items()} for t, f, entries in payload["entries"]}
+        return True
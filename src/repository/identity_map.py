@@ -0,0 +1,85 @@
+import threading
+from collections import OrderedDict
+
+
+class IdentityMap:
+    """Bounded {record id: domain object} cache with least-recently-used eviction.
+
+    Repositories keep the objects built by `get_object_by_id` here so a hot
+    record is hydrated once and the same instance is handed out until the
+    record changes. `token` identifies the stored data the objects were built
+    from (e.g. a file stamp); `validate` drops everything when it moves on.
+    `maxsize=0` disables caching. Safe to share between threads.
+    """
+
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.token = None
+        self._objects = OrderedDict()
+        self._lock = threading.Lock()
+        # Bumped by every invalidation so a lookup racing with a write does not cache a stale object
+        self._generation = 0
+
+    def __len__(self):
+        return len(self._objects)
+
+    def __contains__(self, record_id):
+        return record_id in self._objects
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    def get(self, record_id):
+        """Return the cached object (marking it recently used) or None, counting the hit or miss."""
+        with self._lock:
+            obj = self._objects.get(record_id)
+            if obj is None:
+                self.misses += 1
+                return None
+            self._objects.move_to_end(record_id)
+            self.hits += 1
+            return obj
+
+    def put(self, record_id, obj, generation=None):
+        """Cache `obj`, evicting the least recently used entries beyond `maxsize`.
+
+        Ignored when `generation` (from before the record was read) is out of date.
+        """
+        if self.maxsize <= 0 or obj is None:
+            return
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return
+            self._objects[record_id] = obj
+            self._objects.move_to_end(record_id)
+            while len(self._objects) > self.maxsize:
+                self._objects.popitem(last=False)
+
+    def discard(self, record_id):
+        """Forget the object for a record that changed or was deleted."""
+        with self._lock:
+            self._generation += 1
+            self._objects.pop(record_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._objects.clear()
+
+    def validate(self, token):
+        """Drop every object if the data changed since they were built (`token` differs)."""
+        if token != self.token:
+            self.clear()
+            self.token = token
+
+    def advance(self, old_token, new_token):
+        """Move on to `new_token` after a write of our own, keeping the objects if they were current."""
+        if self.token != old_token:
+            self.clear()
+        self.token = new_token
+
+    def stats(self) -> dict:
+        return {"size": len(self._objects), "maxsize": self.maxsize, "hits": self.hits, "misses": self.misses}
@@ -1,7 +1,34 @@
+import uuid
+import logging
 from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from .aggregates import Aggregates
+from .identity_map import IdentityMap
+from .query import normalize_where, select
+
+logger = logging.getLogger(__name__)
+
+_object_factory = None
+
+
+def _factory():
+    """Return `models.factory.ObjectFactory`, imported on first use.
+
+    Importing it at module level would load the whole models package with
+    any repository (and risks a circular import), so it is resolved once here.
+    """
+    global _object_factory
+    if _object_factory is None:
+        from models.factory import ObjectFactory
+
+        _object_factory = ObjectFactory
+    return _object_factory
 
 
 class IRepository(ABC):
+    # Domain objects kept by get_object_by_id / get_objects_by_ids (0 disables the cache)
+    object_cache_size = 1024
+
     @abstractmethod
     def create(self, item_dict: dict, type_: str = None) -> str:
         """Create a new record and return its id."""
@@ -25,3 +52,188 @@ class IRepository(ABC):
     @abstractmethod
     def find_by_type(self, type_: str) -> list:
         """Return records matching the provided type."""
+
+    def iter_records(self, type_: str = None):
+        """Yield records one at a time, optionally only those of the given type."""
+        yield from self.read_all() if type_ is None else self.find_by_type(type_)
+
+    def find_by_field(self, type_: str, field: str, value) -> list:
+        """Return records of `type_` whose data[field] equals value."""
+        found = []
+        for r in self.iter_records(type_):
+            data = r.get("data") or {}
+            if field in data and data[field] == value:
+                found.append(r)
+        return found
+
+    def query(self, type_: str = None, where=None, order_by: str = None, limit: int = None, offset: int = 0) -> list:
+        """Return the records matching a query, optionally ordered and paged.
+
+        `where` is a {field: value} dict of equalities on record data, or a list
+        of (field, op, value) conditions with op one of =, !=, <, <=, >, >=.
+        `order_by` names a data field, prefixed with "-" for descending order;
+        records without the field come last. Without `order_by` results follow
+        the backend's natural order. The default scans `iter_records`.
+        """
+        return select(self.iter_records(type_), normalize_where(where), order_by, limit, offset)
+
+    def create_many(self, items, type_: str = None) -> list:
+        """Create a record for each item and return the new ids in order."""
+        return [self.create(item, type_=type_) for item in items]
+
+    def update_many(self, targets, new_data=None) -> dict:
+        """Update several records and return {record_id: updated}.
+
+        `targets` is either a dict mapping id -> new data, or an iterable of
+        ids / a predicate taking a record, combined with `new_data` (a dict,
+        or a callable taking the current record and returning the new data).
+        Ids that do not exist map to False; a predicate only reports matches.
+        """
+        return {
+            rid: self.update(rid, self._new_data_for(record, targets, new_data)) if record else False
+            for rid, record in self._select(targets)
+        }
+
+    def delete_many(self, targets) -> dict:
+        """Delete records given an iterable of ids or a predicate; return {record_id: deleted}."""
+        return {rid: self.delete(rid) if record else False for rid, record in self._select(targets)}
+
+    def summary(self) -> dict:
+        """Return the aggregates described in `aggregates.AGGREGATES` as {name: {key: value}}.
+
+        The default computes them with a full scan; backends may keep them materialized.
+        """
+        aggregates = Aggregates()
+        aggregates.rebuild(self.iter_records())
+        return aggregates.values
+
+    def aggregate(self, name: str, key) -> float:
+        """Return one aggregate value (0 when absent), e.g. aggregate("types", "user")."""
+        try:
+            return self.summary()[name].get(str(key), 0)
+        except KeyError:
+            raise ValueError(f"Unknown aggregate: {name}") from None
+
+    def changes_since(self, seq: int = 0, limit: int = None) -> list:
+        """Return the changes made after sequence number `seq`, oldest first (at most `limit`).
+
+        Each entry is {"seq", "op": "create"|"update"|"delete", "id", "type",
+        "data"}, with `data` None for deletes. Consumers keep the last `seq`
+        they applied and pass it back to sync incrementally. Backends that do
+        not record a change feed raise NotImplementedError.
+        """
+        raise NotImplementedError(f"{type(self).__name__} does not record a change feed")
+
+    @contextmanager
+    def deferred(self):
+        """Group the writes made inside the block so the backend can persist them once.
+
+        The default writes each change immediately; backends override this to
+        buffer changes and commit them when the block exits.
+        """
+        yield self
+
+    @property
+    def object_cache(self) -> IdentityMap:
+        """Identity map of the domain objects handed out by this repository (see `IdentityMap`)."""
+        cache = self.__dict__.get("_object_cache")
+        if cache is None:
+            cache = self.__dict__.setdefault("_object_cache", IdentityMap(self.object_cache_size))
+        return cache
+
+    def get_object_by_id(self, record_id: str):
+        """Return a domain object created by the factory for the record id, or None.
+
+        Objects are cached in `object_cache`: repeated calls return the same
+        instance until the record is updated or deleted, so treat it as read-only.
+        """
+        cache = self.object_cache
+        self._sync_object_cache()
+        obj = cache.get(record_id)
+        if obj is not None:
+            return obj
+        generation = cache.generation
+        record = self.read_by_id(record_id)
+        if not record:
+            return None
+
+        try:
+            obj = _factory().create_from_record(record)
+        except Exception:
+            logger.exception("Failed to build domain object from record id=%s", record_id)
+            return None
+        cache.put(record_id, obj, generation)
+        return obj
+
+    def read_by_ids(self, record_ids) -> dict:
+        """Return {record_id: record} for the ids that exist."""
+        found = {}
+        for rid in record_ids:
+            record = self.read_by_id(rid)
+            if record is not None:
+                found[rid] = record
+        return found
+
+    def get_objects_by_ids(self, record_ids, lazy=False) -> dict:
+        """Return {record_id: domain object} for several ids resolved in one batch.
+
+        Ids that are missing or cannot be built into a domain object are omitted.
+        With `lazy=True` the objects are `LazyObject` proxies built on first use.
+        """
+        cache = self.object_cache
+        self._sync_object_cache()
+        objects = {}
+        missing = set()
+        for rid in record_ids:
+            obj = cache.get(rid)
+            if obj is not None:
+                objects[rid] = obj
+            else:
+                missing.add(rid)
+        if not missing:
+            return objects
+        generation = cache.generation
+        found = self.read_by_ids(missing)
+        for rid, obj in zip(found, _factory().hydrate_many(found.values(), lazy=lazy, strict=False)):
+            if obj is not None:
+                objects[rid] = obj
+                cache.put(rid, obj, generation)
+        return objects
+
+    def _sync_object_cache(self):
+        """Drop cached domain objects that other writers may have made stale.
+
+        Writes made through this repository evict their records themselves;
+        backends override this to detect changes made by other processes.
+        """
+
+    @staticmethod
+    def _make_record(item_dict: dict, type_: str = None) -> dict:
+        """Wrap item data in a structured record, accepting items that already are records."""
+        if "id" in item_dict and "data" in item_dict:
+            return item_dict
+        return {
+            "id": uuid.uuid4().hex,
+            "type": type_ or item_dict.get("type") or "generic",
+            "data": item_dict,
+        }
+
+    def _select(self, targets) -> list:
+        """Resolve bulk targets (ids or a predicate) to a list of (record_id, record or None).
+
+        Repeated ids are resolved once, at their first position, so each
+        record is changed, tracked and reported once.
+        """
+        if callable(targets):
+            return [(r.get("id"), r) for r in self.read_all() if targets(r)]
+        return [(rid, self.read_by_id(rid)) for rid in dict.fromkeys(targets)]
+
+    @staticmethod
+    def _new_data_for(record, targets, new_data) -> dict:
+        if isinstance(targets, dict):
+            return targets[record["id"]]
+        if callable(new_data):
+            return new_data(record)
+        if new_data is None:
+            raise ValueError("new_data is required unless targets maps ids to data")
+        return new_data
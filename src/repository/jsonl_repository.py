@@ -0,0 +1,336 @@
+import json
+import os
+import logging
+import threading
+from contextlib import contextmanager
+from .irepository import IRepository
+from .atomic import atomic_write
+from .change_feed import ChangeFeed, reset_entry
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows has no fcntl; run without locking
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+
+class JsonlRepository(IRepository):
+    """Append-only JSON Lines repository.
+
+    Every change is appended to the log as one line, numbered with the next
+    sequence number under an exclusive lock on the log file:
+        {"seq": 1, "op": "create", "record": {"id": ..., "type": ..., "data": {...}}}
+        {"seq": 2, "op": "update", "record": {...}}
+        {"seq": 3, "op": "delete", "id": ..., "type": ...}
+    Entries written before numbering ({"op": "put"} without "seq") are
+    numbered by their position in the log.
+
+    The current state is rebuilt into an in-memory index when the log is
+    opened. Later entries supersede earlier ones; `compact` rewrites the log
+    keeping only the live records, behind a {"seq": n, "op": "compacted"}
+    marker. The log doubles as the change feed read by `changes_since`.
+    """
+
+    def __init__(self, filename=None):
+        if filename is None:
+            repo_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+            filename = os.path.join(repo_root, "data.jsonl")
+
+        self.filename = filename
+        self._records = {}
+        self._by_type = {}
+        # Number of log entries that no longer describe a live record
+        self._superseded = 0
+        # Sequence number of the last entry applied
+        self._seq = 0
+        # Byte offset up to which the log has been applied, and the file's inode
+        self._offset = 0
+        self._inode = None
+        # Serializes log replay when the repository is read from several threads
+        self._refresh_lock = threading.Lock()
+        if not os.path.exists(self.filename):
+            os.makedirs(os.path.dirname(self.filename) or ".", exist_ok=True)
+            open(self.filename, "a", encoding="utf-8").close()
+        self._refresh()
+
+    def create(self, item_dict: dict, type_: str = None) -> str:
+        logger.info("Creating record of type=%s", type_)
+        self._refresh()
+        record = self._make_record(item_dict, type_)
+        self._append([{"op": "create", "record": record}])
+        logger.debug("Created record id=%s", record["id"])
+        return record["id"]
+
+    def read_all(self) -> list:
+        logger.debug("Reading all records from %s", self.filename)
+        self._refresh()
+        return list(self._records.values())
+
+    def read_by_id(self, record_id: str) -> dict:
+        logger.debug("Reading record by id=%s", record_id)
+        self._refresh()
+        return self._records.get(record_id)
+
+    def read_by_ids(self, record_ids) -> dict:
+        self._refresh()
+        records = self._records
+        return {rid: records[rid] for rid in record_ids if rid in records}
+
+    def iter_records(self, type_: str = None):
+        self._refresh()
+        source = self._records if type_ is None else self._by_type.get(type_, {})
+        yield from list(source.values())
+
+    def update(self, record_id: str, new_data: dict) -> bool:
+        logger.info("Updating record id=%s", record_id)
+        self._refresh()
+        record = self._records.get(record_id)
+        if record is None:
+            logger.debug("No record updated for id=%s", record_id)
+            return False
+        updated = {"id": record_id, "type": record.get("type"), "data": new_data}
+        self._append([{"op": "update", "record": updated}])
+        logger.debug("Updated record id=%s", record_id)
+        return True
+
+    def delete(self, record_id: str) -> bool:
+        logger.info("Deleting record id=%s", record_id)
+        self._refresh()
+        record = self._records.get(record_id)
+        if record is None:
+            logger.debug("No record deleted for id=%s", record_id)
+            return False
+        self._append([{"op": "delete", "id": record_id, "type": record.get("type")}])
+        logger.debug("Deleted record id=%s", record_id)
+        return True
+
+    def find_by_type(self, type_: str) -> list:
+        self._refresh()
+        return list(self._by_type.get(type_, {}).values())
+
+    def create_many(self, items, type_: str = None) -> list:
+        """Create records for all items with a single append."""
+        new_records = [self._make_record(item, type_) for item in items]
+        logger.info("Creating %d records of type=%s", len(new_records), type_)
+        self._refresh()
+        self._append([{"op": "create", "record": r} for r in new_records])
+        return [r["id"] for r in new_records]
+
+    def update_many(self, targets, new_data=None) -> dict:
+        """Update several records with a single append."""
+        self._refresh()
+        results = {}
+        entries = []
+        for rid, record in self._select(targets):
+            results[rid] = record is not None
+            if record is not None:
+                data = self._new_data_for(record, targets, new_data)
+                entries.append({"op": "update", "record": {"id": rid, "type": record.get("type"), "data": data}})
+        logger.info("Updating %d records", len(entries))
+        if entries:
+            self._append(entries)
+        return results
+
+    def delete_many(self, targets) -> dict:
+        """Delete several records with a single append."""
+        self._refresh()
+        selected = self._select(targets)
+        results = {rid: record is not None for rid, record in selected}
+        entries = [{"op": "delete", "id": rid, "type": record.get("type")} for rid, record in selected if record is not None]
+        logger.info("Deleting %d records", len(entries))
+        if entries:
+            self._append(entries)
+        return results
+
+    def compact(self) -> int:
+        """Rewrite the log keeping only live records. Return the number of entries dropped.
+
+        The superseded changes are gone afterwards: the rewritten entries carry
+        the sequence number of the marker, and `changes_since` answers a
+        consumer that is behind it with a reset.
+        """
+        with self._log_locked():
+            self._refresh()
+            dropped = self._superseded
+            floor = self._seq
+            with atomic_write(self.filename) as f:
+                f.write(self._encode({"seq": floor, "op": "compacted"}))
+                for record in self._records.values():
+                    f.write(self._encode({"seq": floor, "op": "create", "record": record}))
+            self._superseded = 0
+            self._sync_position()
+        logger.info("Compacted %s: dropped %d superseded entries", self.filename, dropped)
+        return dropped
+
+    def import_json(self, json_path: str) -> int:
+        """Append every record from a `Repository` JSON array file. Return the count imported."""
+        with open(json_path, "r", encoding="utf-8") as f:
+            records = json.load(f)
+        self._refresh()
+        self._append([{"op": "update" if r.get("id") in self._records else "create", "record": r} for r in records])
+        logger.info("Imported %d records from %s", len(records), json_path)
+        return len(records)
+
+    @staticmethod
+    def _encode(entry):
+        return json.dumps(entry, separators=(",", ":"), ensure_ascii=False) + "\n"
+
+    def changes_since(self, seq: int = 0, limit: int = None) -> list:
+        """Return the change feed entries after sequence number `seq`, read from the log itself.
+
+        The start is found by binary search over the numbered entries (see
+        `ChangeFeed.since`). Behind a compaction marker the consumer gets a
+        reset entry instead of the changes compaction dropped.
+        """
+        changes = []
+        # Entries without a number only precede numbered ones, so they are only read when scanning from the start
+        position = 0
+        with open(self.filename, "rb") as f:
+            f.seek(ChangeFeed._offset_after(f, seq))
+            for raw in f:
+                if not raw.endswith(b"\n"):
+                    break
+                if not raw.strip():
+                    continue
+                try:
+                    entry = json.loads(raw)
+                except json.JSONDecodeError:
+                    continue
+                position = entry.get("seq", position + 1)
+                if position <= seq:
+                    continue
+                if entry.get("op") == "compacted":
+                    change = reset_entry(position)
+                    seq = position
+                else:
+                    change = self._change_for(position, entry)
+                    if change is None:
+                        continue
+                changes.append(change)
+                if limit is not None and len(changes) >= limit:
+                    break
+        return changes
+
+    @staticmethod
+    def _change_for(seq, entry):
+        """Translate a log entry into a change feed entry (None for unknown ops)."""
+        op = entry.get("op")
+        if op in ("put", "create", "update"):
+            record = entry["record"]
+            # Legacy puts may have created or replaced the record
+            return {"seq": seq, "op": "update" if op == "put" else op, "id": record.get("id"),
+                    "type": record.get("type"), "data": record.get("data")}
+        if op == "delete":
+            return {"seq": seq, "op": "delete", "id": entry.get("id"), "type": entry.get("type"), "data": None}
+        return None
+
+    def _append(self, entries):
+        with self._log_locked() as f:
+            # Number the entries after every entry already in the log
+            self._refresh()
+            seq = self._seq
+            numbered = []
+            for e in entries:
+                seq += 1
+                numbered.append({"seq": seq, **e})
+            payload = "".join(self._encode(e) for e in numbered)
+            if os.path.getsize(self.filename) > self._offset:
+                # Terminate a dangling partial line so our entries start on a fresh line
+                payload = "\n" + payload
+            try:
+                f.write(payload)
+                f.flush()
+            except Exception:
+                logger.exception("Failed to append to %s", self.filename)
+                raise
+        # Pick up our own entries (and any written concurrently by other processes)
+        self._refresh()
+
+    @contextmanager
+    def _log_locked(self):
+        """Hold an exclusive lock on the log file; yields it open for appending."""
+        while True:
+            f = open(self.filename, "a", encoding="utf-8")
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            # A compaction may have replaced the file while we waited
+            if os.fstat(f.fileno()).st_ino == os.stat(self.filename).st_ino:
+                break
+            f.close()
+        try:
+            yield f
+        finally:
+            f.close()
+
+    def _apply(self, entry):
+        op = entry.get("op")
+        # Entries from before numbering take their position in the log
+        self._seq = entry.get("seq", self._seq + 1)
+        if op in ("put", "create", "update"):
+            record = entry["record"]
+            rid = record.get("id")
+            old = self._records.get(rid)
+            if old is not None:
+                self.object_cache.discard(rid)
+                self._superseded += 1
+                if old.get("type") != record.get("type"):
+                    self._by_type.get(old.get("type"), {}).pop(rid, None)
+            self._records[rid] = record
+            self._by_type.setdefault(record.get("type"), {})[rid] = record
+        elif op == "delete":
+            rid = entry.get("id")
+            old = self._records.pop(rid, None)
+            self.object_cache.discard(rid)
+            # The delete marker itself is also dead weight after compaction
+            self._superseded += 2 if old is not None else 1
+            if old is not None:
+                self._by_type.get(old.get("type"), {}).pop(rid, None)
+        elif op != "compacted":
+            logger.warning("Ignoring unknown log entry op=%r in %s", op, self.filename)
+
+    def _reset(self):
+        self.object_cache.clear()
+        self._records = {}
+        self._by_type = {}
+        self._superseded = 0
+        self._seq = 0
+        self._offset = 0
+
+    def _sync_object_cache(self):
+        # Replaying the new tail of the log evicts every record it changes
+        self._refresh()
+
+    def _sync_position(self):
+        st = os.stat(self.filename)
+        self._offset = st.st_size
+        self._inode = st.st_ino
+
+    def _refresh(self):
+        """Apply log entries appended since the last refresh.
+
+        The log is replayed from scratch when it was replaced (compaction by
+        another process) or shrank; otherwise only the new tail is read.
+        """
+        with self._refresh_lock:
+            st = os.stat(self.filename)
+            if st.st_ino != self._inode or st.st_size < self._offset:
+                self._reset()
+                self._inode = st.st_ino
+            if st.st_size == self._offset:
+                return
+            with open(self.filename, "rb") as f:
+                f.seek(self._offset)
+                for raw in f:
+                    if not raw.endswith(b"\n"):
+                        # Incomplete trailing line (append in progress or interrupted); retry later
+                        break
+                    self._offset += len(raw)
+                    if not raw.strip():
+                        continue
+                    try:
+                        entry = json.loads(raw)
+                    except json.JSONDecodeError:
+                        logger.warning("Skipping invalid log entry before offset %d in %s", self._offset, self.filename)
+                        continue
+                    self._apply(entry)
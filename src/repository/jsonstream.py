@@ -0,0 +1,71 @@
+import json
+
+_WHITESPACE = " \t\r\n"
+
+
+def iter_json_array(f, chunk_size=1 << 16):
+    """Yield the elements of a top-level JSON array from a text file one at a time.
+
+    Only the element being decoded (plus one read chunk) is held in memory, so
+    arbitrarily large files can be walked with bounded memory. Raises
+    json.JSONDecodeError if the file is not a JSON array.
+    """
+    decoder = json.JSONDecoder()
+    buf = ""
+    pos = 0
+    eof = False
+
+    def fill():
+        nonlocal buf, pos, eof
+        chunk = f.read(chunk_size)
+        if not chunk:
+            eof = True
+        # Drop what has already been consumed so the buffer stays small
+        buf = buf[pos:] + chunk
+        pos = 0
+
+    def skip_whitespace():
+        nonlocal pos
+        while True:
+            while pos < len(buf) and buf[pos] in _WHITESPACE:
+                pos += 1
+            if pos < len(buf) or eof:
+                return
+            fill()
+
+    skip_whitespace()
+    if pos >= len(buf):
+        # Empty file: no records
+        return
+    if buf[pos] != "[":
+        raise json.JSONDecodeError("Expecting '['", buf, pos)
+    pos += 1
+
+    first = True
+    while True:
+        skip_whitespace()
+        if pos >= len(buf):
+            raise json.JSONDecodeError("Unterminated array", buf, pos)
+        if buf[pos] == "]":
+            return
+        if not first:
+            if buf[pos] != ",":
+                raise json.JSONDecodeError("Expecting ',' delimiter", buf, pos)
+            pos += 1
+            skip_whitespace()
+        while True:
+            try:
+                value, end = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                fill()
+                continue
+            if end == len(buf) and not eof:
+                # A scalar may continue in the next chunk; decode again with more input
+                fill()
+                continue
+            break
+        pos = end
+        first = False
+        yield value
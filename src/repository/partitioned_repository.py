@@ -0,0 +1,395 @@
+import os
+import re
+import json
+import logging
+from contextlib import ExitStack, contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from .irepository import IRepository
+from .atomic import atomic_write
+from .repository import Repository
+from .change_feed import ChangeFeed
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows has no fcntl; run without locking
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+MANIFEST = "manifest.json"
+CHANGES = "changes.jsonl"
+MANIFEST_FORMAT = 1
+_UNKNOWN = object()
+
+
+def _partition_filename(type_, taken) -> str:
+    """A file name for the partition of `type_` that is safe on every platform and not in `taken`."""
+    base = re.sub(r"[^A-Za-z0-9_-]", "_", type_) if type_ else "_untyped"
+    name = base + ".json"
+    n = 1
+    while name in taken:
+        n += 1
+        name = f"{base}-{n}.json"
+    return name
+
+
+class PartitionedRepository(IRepository):
+    """Repository split into one `Repository` JSON file per record type.
+
+    `<directory>/manifest.json` maps each record type to its partition file:
+        {"format": 1, "partitions": [{"type": "user", "file": "user.json"}, ...]}
+
+    Type-scoped calls (`find_by_type`, `find_by_field`, `iter_records(type_)`,
+    `query(type_)`) only open the partition of that type. Calls that need every
+    partition (`read_all`, lookups by id of records whose type is not yet known)
+    load the partitions concurrently on a thread pool. Each partition keeps the
+    locking, caching, sidecars and domain object cache of `Repository`; writes
+    spanning several types are one write per partition, not one transaction.
+
+    Keyword options (indexes, codec, snapshot, aggregates) are passed to every
+    partition's `Repository`. All partitions record their changes in one feed,
+    `<directory>/changes.jsonl`, whose appends are serialized across partitions
+    and processes by `changes.jsonl.lock`, so sequence numbers are global.
+    Pass `changes=False` to disable it.
+    """
+
+    def __init__(self, directory=None, max_workers=None, **options):
+        if directory is None:
+            repo_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+            directory = os.path.join(repo_root, "data")
+
+        self.directory = directory
+        # The manifest stands in for the data file (e.g. for the daemon state file name)
+        self.filename = os.path.join(directory, MANIFEST)
+        self.max_workers = max_workers or min(8, os.cpu_count() or 4)
+        # One change feed shared by every partition
+        self.change_feed = None
+        if options.get("changes", True):
+            feed_path = os.path.join(directory, CHANGES)
+            self.change_feed = ChangeFeed(feed_path, lock_path=feed_path + ".lock")
+        self._options = {**options, "changes": self.change_feed or False}
+        self._partitions = {}
+        self._manifest_stamp = None
+        # Record id -> type for records seen so far, so id lookups open one partition
+        self._locations = {}
+        self._executor = None
+        self._deferred_stack = None
+        os.makedirs(directory, exist_ok=True)
+        if not os.path.exists(self.filename):
+            self._write_manifest([])
+        self._refresh_manifest()
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    @property
+    def types(self) -> list:
+        """Record types that have a partition, in manifest order."""
+        self._refresh_manifest()
+        return list(self._partitions)
+
+    def partition(self, type_: str):
+        """Return the `Repository` holding records of `type_`, or None if there is none."""
+        self._refresh_manifest()
+        return self._partitions.get(type_)
+
+    def changes_since(self, seq: int = 0, limit: int = None) -> list:
+        """Return the entries of the shared change feed after `seq` (see `IRepository.changes_since`)."""
+        if self.change_feed is None:
+            return super().changes_since(seq, limit)
+        return self.change_feed.since(seq, limit)
+
+    def create(self, item_dict: dict, type_: str = None) -> str:
+        record = self._make_record(item_dict, type_)
+        rid = self._partition_for_write(record.get("type")).create(record)
+        self._locations[rid] = record.get("type")
+        return rid
+
+    def create_many(self, items, type_: str = None) -> list:
+        """Create records with one write per partition; return the new ids in order."""
+        records = [self._make_record(item, type_) for item in items]
+        by_type = {}
+        for r in records:
+            by_type.setdefault(r.get("type"), []).append(r)
+        for rec_type, group in by_type.items():
+            self._partition_for_write(rec_type).create_many(group)
+            for r in group:
+                self._locations[r["id"]] = rec_type
+        return [r["id"] for r in records]
+
+    def read_all(self) -> list:
+        logger.debug("Reading all partitions in %s", self.directory)
+        self._refresh_manifest()
+        records = []
+        for part in self._map(lambda p: p.read_all(), list(self._partitions.values())):
+            records.extend(part)
+        return records
+
+    def read_by_id(self, record_id: str) -> dict:
+        return self.read_by_ids([record_id]).get(record_id)
+
+    def read_by_ids(self, record_ids) -> dict:
+        return {rid: record for rid, (_, record) in self._find(record_ids).items()}
+
+    def iter_records(self, type_: str = None):
+        """Yield records one partition at a time (only the partition of `type_` when given)."""
+        self._refresh_manifest()
+        if type_ is not None:
+            part = self._partitions.get(type_)
+            if part is not None:
+                yield from part.iter_records()
+            return
+        for part in list(self._partitions.values()):
+            yield from part.iter_records()
+
+    def update(self, record_id: str, new_data: dict) -> bool:
+        found = self._find([record_id]).get(record_id)
+        if found is None:
+            return False
+        return found[0].update(record_id, new_data)
+
+    def delete(self, record_id: str) -> bool:
+        found = self._find([record_id]).get(record_id)
+        if found is None:
+            return False
+        self._locations.pop(record_id, None)
+        return found[0].delete(record_id)
+
+    def update_many(self, targets, new_data=None) -> dict:
+        """Update several records with one write per partition involved."""
+        if callable(targets):
+            results = {}
+            for part in self._map(lambda p: p.update_many(targets, new_data), list(self._partitions.values())):
+                results.update(part)
+            return results
+        ids = list(targets)
+        found = self._find(ids)
+        results = {rid: False for rid in ids}
+        for part, group in self._group(found, ids).items():
+            subset = {rid: targets[rid] for rid in group} if isinstance(targets, dict) else group
+            results.update(part.update_many(subset, new_data))
+        return results
+
+    def delete_many(self, targets) -> dict:
+        """Delete several records with one write per partition involved."""
+        if callable(targets):
+            results = {}
+            for part in self._map(lambda p: p.delete_many(targets), list(self._partitions.values())):
+                results.update(part)
+        else:
+            ids = list(targets)
+            found = self._find(ids)
+            results = {rid: False for rid in ids}
+            for part, group in self._group(found, ids).items():
+                results.update(part.delete_many(group))
+        for rid, deleted in results.items():
+            if deleted:
+                self._locations.pop(rid, None)
+        return results
+
+    def find_by_type(self, type_: str) -> list:
+        part = self.partition(type_)
+        return part.find_by_type(type_) if part is not None else []
+
+    def find_by_field(self, type_: str, field: str, value) -> list:
+        part = self.partition(type_)
+        return part.find_by_field(type_, field, value) if part is not None else []
+
+    def query(self, type_: str = None, where=None, order_by: str = None, limit: int = None, offset: int = 0) -> list:
+        if type_ is None:
+            return super().query(None, where, order_by, limit, offset)
+        part = self.partition(type_)
+        if part is None:
+            return []
+        return part.query(type_, where, order_by, limit, offset)
+
+    def summary(self) -> dict:
+        """Sum the materialized aggregates of every partition."""
+        self._refresh_manifest()
+        merged = {}
+        for part in self._map(lambda p: p.summary(), list(self._partitions.values())):
+            for name, values in part.items():
+                totals = merged.setdefault(name, {})
+                for key, value in values.items():
+                    totals[key] = totals.get(key, 0) + value
+        return merged
+
+    def rebuild_aggregates(self) -> dict:
+        self._refresh_manifest()
+        self._map(lambda p: p.rebuild_aggregates(), list(self._partitions.values()))
+        return self.summary()
+
+    def convert(self, codec: str) -> int:
+        """Rewrite every partition with another codec. Return the record count."""
+        self._refresh_manifest()
+        return sum(self._map(lambda p: p.convert(codec), list(self._partitions.values())))
+
+    def write_snapshot(self) -> int:
+        """Regenerate every partition's memory-mapped snapshot. Return the record count."""
+        self._refresh_manifest()
+        return sum(self._map(lambda p: p.write_snapshot(), list(self._partitions.values())))
+
+    @contextmanager
+    def deferred(self):
+        """Defer the writes of every partition (see `Repository.deferred`); each is persisted once on exit."""
+        if self._deferred_stack is not None:
+            yield self
+            return
+        with ExitStack() as stack:
+            self._refresh_manifest()
+            for part in list(self._partitions.values()):
+                stack.enter_context(part.deferred())
+            self._deferred_stack = stack
+            try:
+                yield self
+            finally:
+                self._deferred_stack = None
+
+    def get_object_by_id(self, record_id: str):
+        """Return the domain object for the record id, cached by its partition's identity map."""
+        found = self._find([record_id]).get(record_id)
+        return found[0].get_object_by_id(record_id) if found else None
+
+    def get_objects_by_ids(self, record_ids, lazy=False) -> dict:
+        ids = list(record_ids)
+        objects = {}
+        for part, group in self._group(self._find(set(ids)), ids).items():
+            objects.update(part.get_objects_by_ids(group, lazy=lazy))
+        return objects
+
+    @classmethod
+    def split(cls, source: IRepository, directory: str, **options) -> dict:
+        """Copy every record of `source` into a new partitioned layout in `directory`.
+
+        Records are streamed from `source` and each partition is written once.
+        Refuses to write into a directory whose manifest already lists partitions.
+        Return {type: record count}.
+        """
+        target = cls(directory, **options)
+        if target.types:
+            raise ValueError(f"{target.filename} already lists partitions; split into an empty directory")
+        by_type = {}
+        for r in source.iter_records():
+            by_type.setdefault(r.get("type"), []).append(r)
+        for rec_type, group in by_type.items():
+            target._partition_for_write(rec_type).create_many(group)
+        logger.info("Split %d records into %d partitions in %s", sum(map(len, by_type.values())), len(by_type), directory)
+        return {rec_type: len(group) for rec_type, group in by_type.items()}
+
+    def _find(self, record_ids) -> dict:
+        """Return {record_id: (partition, record)} for the ids that exist.
+
+        Ids whose type is remembered are read from that partition; the rest are
+        looked up in every partition concurrently.
+        """
+        self._refresh_manifest()
+        found = {}
+        known = {}
+        unknown = set()
+        for rid in record_ids:
+            part = self._partitions.get(self._locations.get(rid, _UNKNOWN))
+            if part is None:
+                unknown.add(rid)
+            else:
+                known.setdefault(part, set()).add(rid)
+        for part, ids in known.items():
+            records = part.read_by_ids(ids)
+            for rid, record in records.items():
+                found[rid] = (part, record)
+            # Moved or deleted by another process: search everywhere
+            unknown.update(ids.difference(records))
+        if unknown:
+            parts = list(self._partitions.values())
+            if len(unknown) == 1:
+                # A single id: read_by_id loads (and keeps) the partition cache or uses its snapshot
+                rid = next(iter(unknown))
+
+                def lookup(p):
+                    record = p.read_by_id(rid)
+                    return {rid: record} if record is not None else {}
+            else:
+                def lookup(p):
+                    return p.read_by_ids(unknown)
+            for part, records in zip(parts, self._map(lookup, parts)):
+                for rid, record in records.items():
+                    found.setdefault(rid, (part, record))
+        for rid, (_, record) in found.items():
+            self._locations[rid] = record.get("type")
+        return found
+
+    @staticmethod
+    def _group(found, order) -> dict:
+        """Group the found ids by partition, in the caller's `order` (so each partition writes them in that order)."""
+        groups = {}
+        for rid in dict.fromkeys(order):
+            if rid in found:
+                groups.setdefault(found[rid][0], []).append(rid)
+        return groups
+
+    def _map(self, fn, partitions) -> list:
+        """Apply `fn` to each partition on the thread pool; return the results in order."""
+        if len(partitions) <= 1:
+            return [fn(p) for p in partitions]
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="partition")
+        return list(self._executor.map(fn, partitions))
+
+    def _partition_for_write(self, type_):
+        """Return the partition of `type_`, adding it to the manifest if needed."""
+        self._refresh_manifest()
+        part = self._partitions.get(type_)
+        if part is not None:
+            return part
+        with self._manifest_lock():
+            # Another process may have added it since we last read the manifest
+            self._refresh_manifest()
+            if type_ not in self._partitions:
+                entries = self._read_manifest()
+                taken = {e["file"] for e in entries}
+                entries.append({"type": type_, "file": _partition_filename(type_, taken)})
+                self._write_manifest(entries)
+                logger.info("Added partition for type=%s to %s", type_, self.filename)
+                self._refresh_manifest()
+        part = self._partitions[type_]
+        if self._deferred_stack is not None:
+            self._deferred_stack.enter_context(part.deferred())
+        return part
+
+    def _refresh_manifest(self):
+        """Open the partitions listed in the manifest if it changed since it was last read."""
+        try:
+            st = os.stat(self.filename)
+        except FileNotFoundError:
+            return
+        stamp = (st.st_mtime_ns, st.st_size, st.st_ino)
+        if stamp == self._manifest_stamp:
+            return
+        for entry in self._read_manifest():
+            if entry["type"] not in self._partitions:
+                path = os.path.join(self.directory, entry["file"])
+                self._partitions[entry["type"]] = Repository(path, **self._options)
+        self._manifest_stamp = stamp
+
+    def _read_manifest(self) -> list:
+        with open(self.filename, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest.get("format") != MANIFEST_FORMAT:
+            raise ValueError(f"Unsupported manifest format in {self.filename}: {manifest.get('format')!r}")
+        return manifest.get("partitions") or []
+
+    def _write_manifest(self, entries):
+        with atomic_write(self.filename, fsync=True) as f:
+            json.dump({"format": MANIFEST_FORMAT, "partitions": entries}, f, indent=2, ensure_ascii=False)
+
+    @contextmanager
+    def _manifest_lock(self):
+        with open(self.filename + ".lock", "a+", encoding="utf-8") as lock:
+            if fcntl is not None:
+                fcntl.flock(lock.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock.fileno(), fcntl.LOCK_UN)
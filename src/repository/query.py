@@ -0,0 +1,115 @@
+import heapq
+import operator
+from itertools import islice
+
+# Comparison operators accepted in `where` conditions
+OPERATORS = {
+    "=": operator.eq,
+    "!=": operator.ne,
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+}
+
+
+def normalize_where(where) -> list:
+    """Turn `where` into a list of (field, op, value) conditions on record data.
+
+    Accepts None, a {field: value} dict (equality) or an iterable of
+    (field, op, value) tuples. Raises ValueError for unknown operators.
+    """
+    if not where:
+        return []
+    if isinstance(where, dict):
+        return [(field, "=", value) for field, value in where.items()]
+    conditions = []
+    for field, op, value in where:
+        if op not in OPERATORS:
+            raise ValueError(f"Unknown operator: {op} (choose from {', '.join(OPERATORS)})")
+        conditions.append((field, op, value))
+    return conditions
+
+
+def matches(record, conditions) -> bool:
+    """True if the record's data satisfies every condition.
+
+    A record missing a field, or holding a value that cannot be compared with
+    the condition's value (e.g. a number against a string with `<`), does not match.
+    """
+    data = record.get("data") or {}
+    for field, op, value in conditions:
+        if field not in data:
+            return False
+        try:
+            if not OPERATORS[op](data[field], value):
+                return False
+        except TypeError:
+            return False
+    return True
+
+
+def parse_order(order_by):
+    """Split "field" / "-field" into (field, descending)."""
+    if order_by.startswith("-"):
+        return order_by[1:], True
+    return order_by, False
+
+
+def sort_key(record, field, descending=False):
+    """Sort key for ordering records by data[field].
+
+    Numbers sort before strings (as in SQLite) and records without the field
+    come last in either direction.
+    """
+    value = (record.get("data") or {}).get(field)
+    if value is None:
+        return (1,)
+    if isinstance(value, (int, float)):
+        rank = 0
+    elif isinstance(value, str):
+        rank = 1
+    else:
+        # Lists/objects have no natural order; keep them after strings
+        rank, value = 2, repr(value)
+    if descending:
+        return (0, -rank, _Reversed(value))
+    return (0, rank, value)
+
+
+class _Reversed:
+    """Wrap a value to invert its ordering (strings cannot be negated)."""
+
+    __slots__ = ("value",)
+
+    def __init__(self, value):
+        self.value = value
+
+    def __lt__(self, other):
+        return other.value < self.value
+
+    def __eq__(self, other):
+        return self.value == other.value
+
+
+def select(records, conditions, order_by=None, limit=None, offset=0) -> list:
+    """Filter, order and page an iterable of records.
+
+    Without `order_by` the input is consumed only until offset + limit matches
+    are found; with it and a limit, only the best offset + limit are kept
+    (heap selection) instead of sorting every match.
+    """
+    if limit is not None and limit < 0 or offset < 0:
+        raise ValueError("limit and offset must not be negative")
+    matching = (r for r in records if matches(r, conditions)) if conditions else iter(records)
+    stop = None if limit is None else offset + limit
+    if order_by is None:
+        return list(islice(matching, offset, stop))
+    field, descending = parse_order(order_by)
+
+    def key(r):
+        return sort_key(r, field, descending)
+
+    # Both keep input order among equal keys, so pages are stable
+    ordered = sorted(matching, key=key) if stop is None else heapq.nsmallest(stop, matching, key=key)
+    return ordered[offset:]
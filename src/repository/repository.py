@@ -1,80 +1,240 @@
-import json
+import io
 import os
-import uuid
+import struct
 import logging
+from contextlib import contextmanager
 from .irepository import IRepository
+from .atomic import atomic_write
+from .change_feed import ChangeFeed
+from .codecs import HEADER_SIZE, detect_codec, get_codec
+from .aggregates import AGGREGATES, Aggregates
+from .field_index import DEFAULT_FIELD_INDEXES, FieldIndex
+from .query import normalize_where, select
+from .jsonstream import iter_json_array
+from .snapshot import Snapshot, write_snapshot
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows has no fcntl; run without locking
+    fcntl = None
 
 logger = logging.getLogger(__name__)
 
 
+class _Sidecar:
+    """A structure derived from the records (field index, aggregates) persisted next to the data file.
+
+    `data` implements add/remove/rebuild/save(path, stamp)/load(path, stamp);
+    `stamp` is the data file stamp it currently reflects (None: unknown).
+    """
+
+    __slots__ = ("data", "path", "label", "stamp")
+
+    def __init__(self, data, path, label):
+        self.data = data
+        self.path = path
+        self.label = label
+        self.stamp = None
+
+    def apply(self, changes):
+        for old, new in changes:
+            if old is not None:
+                self.data.remove(old)
+            if new is not None:
+                self.data.add(new)
+
+    def ensure(self, records, stamp):
+        """Make `data` match `records` (file state `stamp`), from the sidecar file or by rebuilding."""
+        if self.stamp is not None and self.stamp == stamp:
+            return
+        loaded = self.data.load(self.path, stamp)
+        if not loaded:
+            logger.debug("Rebuilding %s %s", self.label, self.path)
+            self.data.rebuild(records)
+        self.stamp = stamp
+        if not loaded:
+            self.save()
+
+    def save(self):
+        try:
+            self.data.save(self.path, self.stamp)
+        except OSError:
+            # A stale sidecar is ignored on load (its stamp no longer matches)
+            logger.warning("Failed to save %s %s", self.label, self.path, exc_info=True)
+
+
 class Repository(IRepository):
     """JSON file repository storing structured records:
     Each record: {"id": <id>, "type": <type>, "data": <dict>}
+
+    Parsed records are kept in memory together with an index by id and by
+    type. The cache is reused across calls and only reloaded when the file's
+    mtime/size changes on disk. Returned records are shared with the cache and
+    should be treated as read-only; use `update` to change them.
+
+    Concurrent processes coordinate through `<filename>.lock`: readers take a
+    shared `fcntl` lock, writers an exclusive one. Writes go to a temp file that
+    atomically replaces the data file, and bump a version counter kept in the
+    lock file so a writer whose snapshot went stale reloads and retries.
+
+    Declared secondary indexes on data fields (see `field_index`) are kept in
+    `<filename>.idx`, updated incrementally on every write and used by
+    `find_by_field`. Pass `indexes=()` to disable them.
+
+    Materialized aggregates (see `aggregates`: counts per type, schedules and
+    scheduled minutes per user, schedules per workout) are maintained the same
+    way in `<filename>.agg` and read with `aggregate` / `summary`.
+    Pass `aggregates=False` to disable them.
+
+    The on-disk format is pluggable (see `codecs`): it is detected from the
+    file header on load, and writes keep that format unless `codec` names
+    another one. New files default to pretty-printed JSON.
+
+    A memory-mapped snapshot (`<filename>.snap`, see `snapshot`) lets a process
+    with a cold cache answer `read_by_id` by binary search instead of parsing the
+    whole file. `snapshot=None` keeps an existing snapshot current after every
+    write, True always maintains one and False never uses one.
+
+    Inside `with repo.deferred():` writes only change the in-memory view and are
+    persisted together, with one file write, when the block exits.
+
+    Every created, updated and deleted record is appended, with the next
+    sequence number, to a change feed in `<filename>.changes.jsonl` (see
+    `change_feed`) under the write lock, once the data file has been replaced.
+    The lock file also records the data version the feed is complete up to; a
+    write the feed missed (a crash before the append, or a writer with the
+    feed disabled) is reported with a reset entry by the next commit, or when
+    a repository is opened. `changes_since(seq)` reads the feed back. Pass
+    `changes=False` to disable it, or a `ChangeFeed` to share one feed.
     """
 
-    def __init__(self, filename=None):
+    # How many times a write is retried after losing a race with another writer
+    max_retries = 10
+
+    def __init__(self, filename=None, indexes=DEFAULT_FIELD_INDEXES, codec=None, snapshot=None, aggregates=True, changes=True):
         # Default to a single data.json at the project root so behavior is deterministic
         if filename is None:
             repo_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
             filename = os.path.join(repo_root, "data.json")
 
         self.filename = filename
-        # Ensure the file exists and contains a JSON array
+        # In-memory cache: records in file order, plus id and type indexes
+        self._records = []
+        self._by_id = {}
+        self._by_type = {}
+        self._stamp = None
+        self._version = 0
+        self._lock_path = self.filename + ".lock"
+        # Structures derived from the records and kept in sidecar files (secondary
+        # field indexes, aggregates), and the changes made by the mutation in flight
+        self._index = FieldIndex(indexes) if indexes else None
+        self._index_sidecar = _Sidecar(self._index, self.filename + ".idx", "field index") if indexes else None
+        self._aggregates = Aggregates() if aggregates else None
+        self._aggregates_sidecar = _Sidecar(self._aggregates, self.filename + ".agg", "aggregates") if aggregates else None
+        self._sidecars = [sc for sc in (self._index_sidecar, self._aggregates_sidecar) if sc is not None]
+        self._pending = []
+        # Change feed, and the record changes not yet appended to it
+        if isinstance(changes, ChangeFeed):
+            self.change_feed = changes
+        else:
+            self.change_feed = ChangeFeed(self.filename + ".changes.jsonl") if changes else None
+        self._changes = []
+        # Codec used for writes (None: keep the format the file was loaded in)
+        self.codec = get_codec(codec) if codec else None
+        self._file_codec = None
+        self.snapshot = snapshot
+        self._snapshot_path = self.filename + ".snap"
+        self._snapshot = None
+        # Mutations applied in memory by an open `deferred()` block (None outside
+        # one), and the (version, stamp) they were applied on top of
+        self._deferred = None
+        self._deferred_base = None
+        # Ensure the file exists and contains an empty record list
         if not os.path.exists(self.filename):
             os.makedirs(os.path.dirname(self.filename), exist_ok=True)
-            with open(self.filename, "w", encoding="utf-8") as f:
-                json.dump([], f)
+            with open(self.filename, "wb") as f:
+                f.write((self.codec or get_codec("json")).encode([]))
+        self._reconcile_feed()
 
     def create(self, item_dict: dict, type_: str = None) -> str:
         logger.info("Creating record of type=%s", type_)
-        records = self._read()
         # If incoming item already looks like a full record, accept it
-        if "id" in item_dict and "data" in item_dict:
-            record = item_dict
-        else:
-            record = {
-                "id": uuid.uuid4().hex,
-                "type": type_ or item_dict.get("type") or "generic",
-                "data": item_dict,
-            }
+        record = self._make_record(item_dict, type_)
 
-        records.append(record)
-        try:
-            self._write(records)
-        except Exception:
-            logger.exception("Failed to write record to %s", self.filename)
-            raise
+        def mutate(records):
+            records.append(record)
+            self._track(None, record)
+            return records, record["id"]
+
+        self._transact(mutate)
         logger.debug("Created record id=%s", record["id"])
         return record["id"]
 
     def read_all(self) -> list:
         logger.debug("Reading all records from %s", self.filename)
-        return self._read()
+        return list(self._read())
 
     def read_by_id(self, record_id: str) -> dict:
         logger.debug("Reading record by id=%s", record_id)
-        records = self._read()
-        for r in records:
-            if r.get("id") == record_id:
-                return r
-        logger.debug("Record id=%s not found", record_id)
-        return None
+        if not self._is_fresh():
+            snap = self._open_snapshot()
+            if snap is not None:
+                return snap.get(record_id)
+        self._load()
+        record = self._by_id.get(record_id)
+        if record is None:
+            logger.debug("Record id=%s not found", record_id)
+        return record
+
+    def read_by_ids(self, record_ids) -> dict:
+        if not self._is_fresh():
+            snap = self._open_snapshot()
+            if snap is not None:
+                found = {}
+                for rid in record_ids:
+                    record = snap.get(rid)
+                    if record is not None:
+                        found[rid] = record
+                return found
+            # Cold cache: pick the wanted records out of one streaming pass
+            wanted = set(record_ids)
+            found = {}
+            for r in self._stream():
+                rid = r.get("id")
+                if rid in wanted and rid not in found:
+                    found[rid] = r
+            return found
+        by_id = self._by_id
+        return {rid: by_id[rid] for rid in record_ids if rid in by_id}
+
+    def iter_records(self, type_: str = None):
+        """Yield records one at a time.
+
+        Served from the in-memory cache when it is current; otherwise the file
+        is parsed incrementally so memory stays bounded regardless of file size.
+        """
+        if self._is_fresh():
+            source = self._records if type_ is None else self._by_type.get(type_, ())
+            # Iterate a snapshot so callers may write while iterating
+            yield from list(source)
+            return
+        for r in self._stream():
+            if type_ is None or r.get("type") == type_:
+                yield r
 
     def update(self, record_id: str, new_data: dict) -> bool:
         logger.info("Updating record id=%s", record_id)
-        records = self._read()
-        updated = False
-        for r in records:
-            if r.get("id") == record_id:
-                r["data"] = new_data
-                updated = True
-                break
+
+        def mutate(records):
+            record = self._by_id.get(record_id)
+            if record is None:
+                return None, False
+            self._track(dict(record), record)
+            record["data"] = new_data
+            return records, True
+
+        updated = self._transact(mutate)
         if updated:
-            try:
-                self._write(records)
-            except Exception:
-                logger.exception("Failed to write updated records to %s", self.filename)
-                raise
             logger.debug("Updated record id=%s", record_id)
         else:
             logger.debug("No record updated for id=%s", record_id)
@@ -82,50 +242,531 @@ class Repository(IRepository):
 
     def delete(self, record_id: str) -> bool:
         logger.info("Deleting record id=%s", record_id)
-        records = self._read()
-        before = len(records)
-        records = [r for r in records if r.get("id") != record_id]
-        after = len(records)
-        if after < before:
-            try:
-                self._write(records)
-            except Exception:
-                logger.exception("Failed to write records after delete to %s", self.filename)
-                raise
+
+        def mutate(records):
+            record = self._by_id.get(record_id)
+            if record is None:
+                return None, False
+            self._track(record, None)
+            return [r for r in records if r.get("id") != record_id], True
+
+        deleted = self._transact(mutate)
+        if deleted:
             logger.debug("Deleted record id=%s", record_id)
-            return True
-        logger.debug("No record deleted for id=%s", record_id)
-        return False
+        else:
+            logger.debug("No record deleted for id=%s", record_id)
+        return deleted
+
+    def create_many(self, items, type_: str = None) -> list:
+        """Create records for all items with a single read and a single write."""
+        new_records = [self._make_record(item, type_) for item in items]
+        logger.info("Creating %d records of type=%s", len(new_records), type_)
+
+        def mutate(records):
+            records.extend(new_records)
+            for r in new_records:
+                self._track(None, r)
+            return records, [r["id"] for r in new_records]
+
+        return self._transact(mutate)
+
+    def update_many(self, targets, new_data=None) -> dict:
+        """Update several records with a single read and a single write.
+
+        See `IRepository.update_many` for the accepted targets.
+        """
+
+        def mutate(records):
+            results = {}
+            for rid, record in self._select(targets):
+                if record is None:
+                    results[rid] = False
+                    continue
+                old = dict(record)
+                record["data"] = self._new_data_for(record, targets, new_data)
+                self._track(old, record)
+                results[rid] = True
+            logger.info("Updating %d records", sum(results.values()))
+            return (records if any(results.values()) else None), results
+
+        return self._transact(mutate)
+
+    def delete_many(self, targets) -> dict:
+        """Delete several records with a single read and a single write."""
+
+        def mutate(records):
+            selected = self._select(targets)
+            results = {rid: record is not None for rid, record in selected}
+            doomed = {rid for rid, found in results.items() if found}
+            for rid, record in selected:
+                if record is not None:
+                    self._track(record, None)
+            logger.info("Deleting %d records", len(doomed))
+            if not doomed:
+                return None, results
+            return [r for r in records if r.get("id") not in doomed], results
+
+        return self._transact(mutate)
 
     def find_by_type(self, type_: str) -> list:
-        records = self._read()
-        return [r for r in records if r.get("type") == type_]
+        self._load()
+        return list(self._by_type.get(type_, ()))
 
-    def _read(self):
+    def find_by_field(self, type_: str, field: str, value) -> list:
+        """Return records of `type_` whose data[field] equals value.
+
+        Uses the secondary index when (type_, field) is declared, otherwise scans.
+        """
+        if self._index is None or not self._index.covers(type_, field):
+            return super().find_by_field(type_, field, value)
+        self._sidecar_for_lookup(self._index_sidecar)
+        ids = self._index.lookup(type_, field, value)
+        found = self.read_by_ids(ids)
+        return [found[rid] for rid in ids if rid in found]
+
+    def query(self, type_: str = None, where=None, order_by: str = None, limit: int = None, offset: int = 0) -> list:
+        """Return the records matching a query, optionally ordered and paged (see `IRepository.query`).
+
+        An equality on an indexed field narrows the candidates to the index
+        entries (in index order) before the other conditions are checked;
+        otherwise records are streamed and the scan stops once the page is full.
+        """
+        conditions = normalize_where(where)
+        if type_ is not None and self._index is not None:
+            for i, (field, op, value) in enumerate(conditions):
+                if op == "=" and self._index.covers(type_, field):
+                    candidates = self.find_by_field(type_, field, value)
+                    return select(candidates, conditions[:i] + conditions[i + 1:], order_by, limit, offset)
+        return select(self.iter_records(type_), conditions, order_by, limit, offset)
+
+    def changes_since(self, seq: int = 0, limit: int = None) -> list:
+        """Return the change feed entries after sequence number `seq`, oldest first.
+
+        Read from `<filename>.changes.jsonl` without loading the data file.
+        """
+        if self.change_feed is None:
+            return super().changes_since(seq, limit)
+        return self.change_feed.since(seq, limit)
+
+    def aggregate(self, name: str, key) -> float:
+        """Return one materialized aggregate value, e.g. aggregate("schedules_per_user", user_id).
+
+        Served from `<filename>.agg` without parsing the data file when it is current.
+        """
+        if self._aggregates is None:
+            return super().aggregate(name, key)
+        if name not in AGGREGATES:
+            raise ValueError(f"Unknown aggregate: {name} (choose from {', '.join(AGGREGATES)})")
+        self._sidecar_for_lookup(self._aggregates_sidecar)
+        return self._aggregates.get(name, key)
+
+    def summary(self) -> dict:
+        """Return every materialized aggregate as {name: {key: value}}."""
+        if self._aggregates is None:
+            return super().summary()
+        self._sidecar_for_lookup(self._aggregates_sidecar)
+        return {name: dict(values) for name, values in self._aggregates.values.items()}
+
+    def rebuild_aggregates(self) -> dict:
+        """Recompute the aggregates from scratch, persist them and return `summary()`."""
+        if self._aggregates is None:
+            return super().summary()
+        self._load()
+        self._aggregates.rebuild(self._records)
+        self._aggregates_sidecar.stamp = self._stamp
+        self._aggregates_sidecar.save()
+        logger.info("Rebuilt aggregates for %s", self.filename)
+        return self.summary()
+
+    def convert(self, codec: str) -> int:
+        """Rewrite the data file with another codec and keep using it. Return the record count."""
+        self.codec = get_codec(codec)
+        count = self._transact(lambda records: (records, len(records)))
+        logger.info("Converted %s to %s (%d records)", self.filename, codec, count)
+        return count
+
+    def write_snapshot(self) -> int:
+        """Regenerate the memory-mapped snapshot from the current data. Return the record count."""
+        self._load()
+        write_snapshot(self._snapshot_path, self._records, self._stamp)
+        logger.info("Wrote snapshot %s (%d records)", self._snapshot_path, len(self._records))
+        return len(self._records)
+
+    @contextmanager
+    def deferred(self):
+        """Apply the writes made inside the block in memory and persist them once on exit.
+
+        Reads inside the block see the pending changes. If another process wrote
+        the file meanwhile, the buffered mutations are replayed on top of its
+        data before writing. An exception escaping the block discards them.
+        Nested blocks join the outermost one.
+        """
+        if self._deferred is not None:
+            yield self
+            return
+        self._deferred = []
         try:
-            with open(self.filename, "r", encoding="utf-8") as f:
-                return json.load(f)
-        except (json.JSONDecodeError, FileNotFoundError):
-            # If file is empty/corrupt or missing, return empty list
-            logger.warning("Returning empty record list for file %s (missing or invalid JSON)", self.filename)
-            return []
+            yield self
+            if self._deferred:
+                self._commit_deferred(list(self._deferred))
+        except BaseException:
+            self._invalidate()
+            self._reset_sidecars()
+            # Objects may have been built from the discarded view
+            self.object_cache.clear()
+            raise
+        finally:
+            self._deferred = None
+            self._pending = []
+            self._changes = []
 
-    def _write(self, data):
-        with open(self.filename, "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=4)
-        logger.debug("Wrote %d records to %s", len(data), self.filename)
-
-    def get_object_by_id(self, record_id: str):
-        """Return a domain object created by the factory for the record id, or None."""
-        record = self.read_by_id(record_id)
-        if not record:
+    def _file_stamp(self):
+        """Return a (mtime_ns, size, inode) tuple identifying the file contents, or None."""
+        try:
+            st = os.stat(self.filename)
+        except FileNotFoundError:
             return None
+        return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+    @contextmanager
+    def _locked(self, exclusive=False, blocking=True):
+        """Hold a shared or exclusive lock on the sidecar lock file.
+
+        Yields the open lock file, which also stores the write version counter
+        and the version the change feed is complete up to ("<version> <feed
+        version>"); with `blocking=False` yields None if the lock is taken.
+        Locking is skipped on platforms without `fcntl`.
+        """
+        with open(self._lock_path, "a+", encoding="utf-8") as lock:
+            if fcntl is not None:
+                flags = fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH
+                try:
+                    fcntl.flock(lock.fileno(), flags if blocking else flags | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    yield None
+                    return
+            try:
+                yield lock
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock.fileno(), fcntl.LOCK_UN)
+
+    @staticmethod
+    def _read_versions(lock):
+        """Return (data version, feed version) from the lock file; a missing feed version means in sync."""
+        lock.seek(0)
+        parts = lock.read().split()
+        version = int(parts[0]) if parts and parts[0].isdigit() else 0
+        feed_version = int(parts[1]) if len(parts) > 1 and parts[1].isdigit() else version
+        return version, feed_version
+
+    @classmethod
+    def _read_version(cls, lock):
+        return cls._read_versions(lock)[0]
+
+    @staticmethod
+    def _write_versions(lock, version, feed_version):
+        lock.seek(0)
+        lock.truncate()
+        lock.write(f"{version} {feed_version}")
+        lock.flush()
+
+    def _is_fresh(self):
+        """Return True if the cache matches the file on disk."""
+        if self._deferred:
+            # Pending deferred writes: the cache is the view to serve until they commit
+            return True
+        return self._stamp is not None and self._file_stamp() == self._stamp
+
+    def _stream(self):
+        """Parse the data file incrementally without populating the cache.
 
+        Only JSON text can be streamed; other codecs decode the whole file into the cache.
+        """
         try:
-            # Import here to avoid top-level circular imports
-            from models.factory import ObjectFactory
+            # The open handle keeps reading the same file even if a writer replaces it
+            with open(self.filename, "rb") as raw:
+                codec = detect_codec(raw.read(HEADER_SIZE))
+                if codec.streamable:
+                    raw.seek(0)
+                    yield from iter_json_array(io.TextIOWrapper(raw, encoding="utf-8"))
+                    return
+        except FileNotFoundError:
+            return
+        self._load()
+        yield from list(self._records)
 
-            return ObjectFactory.create_from_record(record)
+    def _load(self):
+        """Refresh the in-memory cache if the file changed since it was parsed."""
+        if self._is_fresh():
+            return
+        with self._locked() as lock:
+            # Re-stat under the lock so the stamp, version and contents agree
+            stamp = self._file_stamp()
+            version = self._read_version(lock)
+            try:
+                with open(self.filename, "rb") as f:
+                    raw = f.read()
+            except FileNotFoundError:
+                raw = b""
+        codec = detect_codec(raw[:HEADER_SIZE])
+        try:
+            records = codec.decode(raw)
+        except Exception:
+            # Never treat a corrupt file as empty: the next write would wipe it
+            logger.exception("Invalid %s data in %s; refusing to load", codec.name, self.filename)
+            raise
+        self._set_records(records, stamp)
+        self._version = version
+        self._file_codec = codec
+        logger.debug("Loaded %d records from %s (%s, version %d)", len(records), self.filename, codec.name, version)
+
+    def _transact(self, mutate):
+        """Apply `mutate` to the current records and persist the result.
+
+        `mutate(records)` returns (records_to_write or None, result). It runs
+        against the cached snapshot without holding any lock; the write then
+        takes the exclusive lock and only proceeds if nobody else wrote since
+        the snapshot was loaded (same version counter and file stamp).
+        Otherwise the snapshot is reloaded and the mutation retried.
+        Inside a `deferred()` block the mutation is only applied in memory.
+        """
+        if self._deferred is not None:
+            return self._defer(mutate)
+        for attempt in range(1, self.max_retries + 1):
+            self._load()
+            version, stamp = self._version, self._stamp
+            self._pending = []
+            self._changes = []
+            self._ensure_sidecars()
+            try:
+                records, result = mutate(self._records)
+            except Exception:
+                # Cached records may have been changed in place; force a reload next time
+                self._invalidate()
+                raise
+            if records is None:
+                return result
+            with self._locked(exclusive=True) as lock:
+                if self._read_version(lock) == version and self._file_stamp() == stamp:
+                    self._commit(lock, records, version)
+                    return result
+            logger.debug("Concurrent write to %s detected; retrying (attempt %d)", self.filename, attempt)
+            self._invalidate()
+        raise RuntimeError(f"Gave up writing {self.filename} after {self.max_retries} concurrent modifications")
+
+    def _commit(self, lock, records, version):
+        """Write `records` and bump the version; the caller holds the exclusive `lock`."""
+        base = self._stamp
+        changes, self._changes = self._changes, []
+        _, feed_version = self._read_versions(lock)
+        try:
+            self._write(records)
+        except Exception:
+            self._invalidate()
+            logger.exception("Failed to write records to %s", self.filename)
+            raise
+        self._version = version + 1
+        # Until the feed has the changes, the lock file says it lags behind the data
+        self._write_versions(lock, self._version, feed_version)
+        if self.change_feed is not None and self._append_changes(changes, reset=feed_version != version):
+            self._write_versions(lock, self._version, self._version)
+        self._apply_pending()
+        self._refresh_snapshot()
+        # Objects of records this write did not touch are still current
+        self.object_cache.advance(base, self._stamp)
+
+    def _defer(self, mutate):
+        """Apply `mutate` to the in-memory view of the open `deferred()` block."""
+        if not self._deferred:
+            self._load()
+            self._deferred_base = (self._version, self._stamp)
+            self._ensure_sidecars()
+            self._changes = []
+        self._pending = []
+        try:
+            records, result = mutate(self._records)
         except Exception:
-            logger.exception("Failed to build domain object from record id=%s", record_id)
-            return None
\ No newline at end of file
+            # The mutation may have changed cached records in place; rebuild the batch view
+            self._replay(list(self._deferred))
+            raise
+        if records is None:
+            self._pending = []
+        else:
+            self._deferred.append(mutate)
+            self._apply_deferred(records)
+        return result
+
+    def _apply_deferred(self, records):
+        """Update the id/type maps and sidecar structures for a deferred mutation's changes."""
+        changes, self._pending = self._pending, []
+        self._records = records
+        for old, new in changes:
+            if old is None:
+                self._by_id.setdefault(new.get("id"), new)
+                self._by_type.setdefault(new.get("type"), []).append(new)
+            elif new is None:
+                rid, type_ = old.get("id"), old.get("type")
+                self._by_id.pop(rid, None)
+                if type_ in self._by_type:
+                    self._by_type[type_] = [r for r in self._by_type[type_] if r.get("id") != rid]
+        for sidecar in self._sidecars:
+            sidecar.apply(changes)
+
+    def _replay(self, mutations):
+        """Reload the file and re-apply deferred `mutations` on top of it."""
+        self._deferred = []
+        self._changes = []
+        self._invalidate()
+        self._reset_sidecars()
+        self._load()
+        self._deferred_base = (self._version, self._stamp)
+        self._ensure_sidecars()
+        for mutate in mutations:
+            self._pending = []
+            records, _ = mutate(self._records)
+            if records is not None:
+                self._deferred.append(mutate)
+                self._apply_deferred(records)
+
+    def _commit_deferred(self, mutations):
+        """Persist the deferred block's view with one write, replaying it after concurrent writes."""
+        for attempt in range(1, self.max_retries + 1):
+            version, stamp = self._deferred_base
+            with self._locked(exclusive=True) as lock:
+                if self._read_version(lock) == version and self._file_stamp() == stamp:
+                    logger.info("Committing %d deferred writes to %s", len(mutations), self.filename)
+                    self._commit(lock, self._records, version)
+                    return
+            logger.debug("Concurrent write to %s detected; replaying deferred writes (attempt %d)", self.filename, attempt)
+            self._replay(mutations)
+        raise RuntimeError(f"Gave up writing {self.filename} after {self.max_retries} concurrent modifications")
+
+    def _sync_object_cache(self):
+        self.object_cache.validate(self._file_stamp())
+
+    def _open_snapshot(self):
+        """Return the snapshot if it describes the data file currently on disk, else None."""
+        if self.snapshot is False:
+            return None
+        try:
+            st = os.stat(self._snapshot_path)
+        except FileNotFoundError:
+            return None
+        file_id = (st.st_ino, st.st_mtime_ns, st.st_size)
+        if self._snapshot is None or self._snapshot.file_id != file_id:
+            if self._snapshot is not None:
+                self._snapshot.close()
+                self._snapshot = None
+            try:
+                self._snapshot = Snapshot(self._snapshot_path)
+            except (OSError, ValueError, struct.error):
+                logger.warning("Ignoring unreadable snapshot %s", self._snapshot_path, exc_info=True)
+                return None
+        if self._snapshot.stamp != self._file_stamp():
+            return None
+        return self._snapshot
+
+    def _refresh_snapshot(self):
+        """Regenerate the snapshot after a write when one is maintained."""
+        if self.snapshot is False or (self.snapshot is None and not os.path.exists(self._snapshot_path)):
+            return
+        try:
+            write_snapshot(self._snapshot_path, self._records, self._stamp)
+        except (OSError, TypeError, ValueError):
+            # The data file is already written; a stale snapshot is ignored on read (its stamp no longer matches)
+            logger.warning("Failed to refresh snapshot %s", self._snapshot_path, exc_info=True)
+
+    def _track(self, old, new):
+        """Record a change (old record -> new record) made by the current mutation."""
+        if old is not None:
+            self.object_cache.discard(old.get("id"))
+        if self._sidecars or self._deferred is not None:
+            self._pending.append((old, new))
+        if self.change_feed is not None:
+            self._changes.append((old, new))
+
+    def _append_changes(self, changes, reset=False) -> bool:
+        """Append committed changes to the feed, after a reset entry if it missed earlier writes.
+
+        Returns False if the append failed; the data write stands and the next
+        commit (or the next repository opened on the file) records a reset.
+        """
+        if reset:
+            logger.warning("Change feed %s missed earlier writes to %s; recording a reset", self.change_feed.path, self.filename)
+        try:
+            self.change_feed.append(changes, reset=reset)
+        except OSError:
+            logger.exception("Failed to record %d changes in %s", len(changes), self.change_feed.path)
+            return False
+        return True
+
+    def _reconcile_feed(self):
+        """Record a reset if the feed missed writes, e.g. a writer crashed between replace and append.
+
+        Skipped when another process holds the lock: its commit reconciles the feed itself.
+        """
+        if self.change_feed is None or not os.path.exists(self._lock_path):
+            return
+        with self._locked(exclusive=True, blocking=False) as lock:
+            if lock is None:
+                return
+            version, feed_version = self._read_versions(lock)
+            if feed_version != version and self._append_changes([], reset=True):
+                self._write_versions(lock, version, version)
+
+    def _apply_pending(self):
+        """Apply the committed mutation's changes to the sidecar structures and persist them."""
+        pending, self._pending = self._pending, []
+        for sidecar in self._sidecars:
+            sidecar.apply(pending)
+            sidecar.stamp = self._stamp
+            sidecar.save()
+
+    def _ensure_sidecars(self):
+        """Make the sidecar structures match the cached records."""
+        for sidecar in self._sidecars:
+            sidecar.ensure(self._records, self._stamp)
+
+    def _reset_sidecars(self):
+        for sidecar in self._sidecars:
+            sidecar.stamp = None
+
+    def _sidecar_for_lookup(self, sidecar):
+        """Bring `sidecar` up to date for the file on disk, preferring its file to parsing the data."""
+        stamp = self._file_stamp()
+        if sidecar.stamp is not None and sidecar.stamp == stamp:
+            return
+        if not self._is_fresh() and sidecar.data.load(sidecar.path, stamp):
+            sidecar.stamp = stamp
+            return
+        self._load()
+        sidecar.ensure(self._records, self._stamp)
+
+    def _set_records(self, records, stamp):
+        by_id = {}
+        by_type = {}
+        for r in records:
+            by_id.setdefault(r.get("id"), r)
+            by_type.setdefault(r.get("type"), []).append(r)
+        self._records = records
+        self._by_id = by_id
+        self._by_type = by_type
+        self._stamp = stamp
+
+    def _invalidate(self):
+        self._stamp = None
+
+    def _read(self):
+        """Return the cached list of records, reloading it if the file changed."""
+        self._load()
+        return self._records
+
+    def _write(self, data):
+        """Atomically replace the data file: write a temp file, fsync it, then os.replace."""
+        codec = self.codec or self._file_codec or get_codec("json")
+        with atomic_write(self.filename, mode="wb", fsync=True) as f:
+            f.write(codec.encode(data))
+        self._file_codec = codec
+        self._set_records(data, self._file_stamp())
+        logger.debug("Wrote %d records to %s (%s)", len(data), self.filename, codec.name)
@@ -0,0 +1,85 @@
+import os
+import json
+import mmap
+import struct
+from .atomic import atomic_write
+
+# Layout (little endian):
+#   header: MAGIC, format version, data file stamp (mtime_ns, size, inode), record count
+#   table:  one (id_offset, id_length, record_offset, record_length) entry per record, sorted by id
+#   ids and compact JSON record payloads, referenced by the table offsets
+MAGIC = b"FTSN"
+VERSION = 1
+_HEADER = struct.Struct("<4sB3xqqqQ")
+_ENTRY = struct.Struct("<QIQI")
+
+
+def write_snapshot(path, records, stamp):
+    """Write a read-optimized snapshot of `records` for the data file state `stamp`."""
+    # Sort on the id alone: the sort is stable, so duplicate ids keep their file order
+    items = sorted(((str(r.get("id")).encode("utf-8"), r) for r in records), key=lambda item: item[0])
+    # Keep the first record for duplicate ids, matching the repository's id index
+    unique = []
+    for rid, record in items:
+        if not unique or unique[-1][0] != rid:
+            unique.append((rid, record))
+
+    table_end = _HEADER.size + _ENTRY.size * len(unique)
+    entries = []
+    blobs = []
+    offset = table_end
+    for rid, record in unique:
+        payload = json.dumps(record, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+        entries.append(_ENTRY.pack(offset, len(rid), offset + len(rid), len(payload)))
+        blobs.append(rid)
+        blobs.append(payload)
+        offset += len(rid) + len(payload)
+
+    mtime_ns, size, inode = stamp
+    with atomic_write(path, mode="wb") as f:
+        f.write(_HEADER.pack(MAGIC, VERSION, mtime_ns, size, inode, len(unique)))
+        f.write(b"".join(entries))
+        f.write(b"".join(blobs))
+
+
+class Snapshot:
+    """Memory-mapped snapshot: `get` binary-searches the id table and decodes one record."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            st = os.fstat(f.fileno())
+            self.file_id = (st.st_ino, st.st_mtime_ns, st.st_size)
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, mtime_ns, size, inode, count = _HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != VERSION:
+            self._mm.close()
+            raise ValueError(f"Not a snapshot file: {path}")
+        self.stamp = (mtime_ns, size, inode)
+        self.count = count
+
+    def __len__(self):
+        return self.count
+
+    def close(self):
+        self._mm.close()
+
+    def _entry(self, i):
+        return _ENTRY.unpack_from(self._mm, _HEADER.size + _ENTRY.size * i)
+
+    def get(self, record_id):
+        """Return the record with `record_id`, or None."""
+        target = str(record_id).encode("utf-8")
+        mm = self._mm
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            id_off, id_len, rec_off, rec_len = self._entry(mid)
+            key = mm[id_off:id_off + id_len]
+            if key < target:
+                lo = mid + 1
+            elif key > target:
+                hi = mid
+            else:
+                return json.loads(mm[rec_off:rec_off + rec_len])
+        return None
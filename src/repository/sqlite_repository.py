@@ -0,0 +1,278 @@
+import json
+import os
+import sqlite3
+import logging
+from .irepository import IRepository
+from .field_index import DEFAULT_FIELD_INDEXES
+from .query import normalize_where, parse_order
+
+logger = logging.getLogger(__name__)
+
+# Statements are module constants so sqlite3's per-connection statement
+# cache compiles each one once and reuses the prepared statement.
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS records ("
+    " id TEXT PRIMARY KEY,"
+    " type TEXT NOT NULL,"
+    " data TEXT NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS records_type ON records(type)",
+    # Change feed filled by triggers, so every write path records its changes in the same transaction
+    "CREATE TABLE IF NOT EXISTS changes ("
+    " seq INTEGER PRIMARY KEY AUTOINCREMENT,"
+    " op TEXT NOT NULL,"
+    " id TEXT NOT NULL,"
+    " type TEXT NOT NULL,"
+    " data TEXT)",
+    "CREATE TRIGGER IF NOT EXISTS records_insert_change AFTER INSERT ON records BEGIN"
+    " INSERT INTO changes (op, id, type, data) VALUES ('create', NEW.id, NEW.type, NEW.data); END",
+    "CREATE TRIGGER IF NOT EXISTS records_update_change AFTER UPDATE ON records BEGIN"
+    " INSERT INTO changes (op, id, type, data) VALUES ('update', NEW.id, NEW.type, NEW.data); END",
+    "CREATE TRIGGER IF NOT EXISTS records_delete_change AFTER DELETE ON records BEGIN"
+    " INSERT INTO changes (op, id, type, data) VALUES ('delete', OLD.id, OLD.type, NULL); END",
+)
+_INSERT = "INSERT INTO records (id, type, data) VALUES (?, ?, ?)"
+# A true upsert (not INSERT OR REPLACE), so replacing a row fires the update trigger and keeps its rowid
+_UPSERT = (
+    "INSERT INTO records (id, type, data) VALUES (?, ?, ?)"
+    " ON CONFLICT(id) DO UPDATE SET type = excluded.type, data = excluded.data"
+)
+_SELECT_ALL = "SELECT id, type, data FROM records ORDER BY rowid"
+_SELECT_BY_ID = "SELECT id, type, data FROM records WHERE id = ?"
+_SELECT_BY_IDS = "SELECT id, type, data FROM records WHERE id IN ({params})"
+_MAX_PARAMS = 500
+_SELECT_BY_TYPE = "SELECT id, type, data FROM records WHERE type = ? ORDER BY rowid"
+_SELECT_BY_FIELD = "SELECT id, type, data FROM records WHERE type = ? AND json_extract(data, ?) = ? ORDER BY rowid"
+_UPDATE = "UPDATE records SET data = ? WHERE id = ?"
+_DELETE = "DELETE FROM records WHERE id = ?"
+_SELECT_CHANGES = "SELECT seq, op, id, type, data FROM changes WHERE seq > ? ORDER BY seq LIMIT ?"
+
+
+class SqliteRepository(IRepository):
+    """SQLite repository storing one row per record: (id, type, data as JSON text).
+
+    The database runs in WAL mode so readers do not block the writer.
+    Triggers append every insert, update and delete to the `changes` table,
+    whose AUTOINCREMENT key is the sequence number read by `changes_since`.
+    """
+
+    def __init__(self, filename=None):
+        if filename is None:
+            repo_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+            filename = os.path.join(repo_root, "data.db")
+
+        self.filename = filename
+        if filename != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(filename)), exist_ok=True)
+        # Usable from worker threads (e.g. AsyncRepositoryAdapter); SQLite serializes access itself
+        self._conn = sqlite3.connect(filename, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        with self._conn:
+            for stmt in _SCHEMA:
+                self._conn.execute(stmt)
+            # Partial expression indexes on the data fields used to look records up
+            for type_, field in DEFAULT_FIELD_INDEXES:
+                self._conn.execute(
+                    f"CREATE INDEX IF NOT EXISTS records_{type_}_{field} "
+                    f"ON records(json_extract(data, '$.{field}')) WHERE type = '{type_}'"
+                )
+
+    def close(self):
+        self._conn.close()
+
+    def create(self, item_dict: dict, type_: str = None) -> str:
+        logger.info("Creating record of type=%s", type_)
+        record = self._make_record(item_dict, type_)
+        try:
+            with self._conn:
+                self._conn.execute(_INSERT, self._to_row(record))
+        except sqlite3.Error:
+            logger.exception("Failed to insert record into %s", self.filename)
+            raise
+        logger.debug("Created record id=%s", record["id"])
+        return record["id"]
+
+    def read_all(self) -> list:
+        logger.debug("Reading all records from %s", self.filename)
+        return [self._from_row(row) for row in self._conn.execute(_SELECT_ALL)]
+
+    def read_by_id(self, record_id: str) -> dict:
+        logger.debug("Reading record by id=%s", record_id)
+        row = self._conn.execute(_SELECT_BY_ID, (record_id,)).fetchone()
+        return self._from_row(row) if row else None
+
+    def read_by_ids(self, record_ids) -> dict:
+        ids = list(record_ids)
+        found = {}
+        # Stay below SQLite's host parameter limit
+        for start in range(0, len(ids), _MAX_PARAMS):
+            chunk = ids[start:start + _MAX_PARAMS]
+            sql = _SELECT_BY_IDS.format(params=",".join("?" * len(chunk)))
+            for row in self._conn.execute(sql, chunk):
+                found[row[0]] = self._from_row(row)
+        return found
+
+    def iter_records(self, type_: str = None):
+        """Yield records straight from the cursor without building a list."""
+        cur = self._conn.execute(_SELECT_ALL) if type_ is None else self._conn.execute(_SELECT_BY_TYPE, (type_,))
+        for row in cur:
+            yield self._from_row(row)
+
+    def update(self, record_id: str, new_data: dict) -> bool:
+        logger.info("Updating record id=%s", record_id)
+        try:
+            with self._conn:
+                cur = self._conn.execute(_UPDATE, (self._dumps(new_data), record_id))
+        except sqlite3.Error:
+            logger.exception("Failed to update record id=%s in %s", record_id, self.filename)
+            raise
+        self.object_cache.discard(record_id)
+        return cur.rowcount > 0
+
+    def delete(self, record_id: str) -> bool:
+        logger.info("Deleting record id=%s", record_id)
+        try:
+            with self._conn:
+                cur = self._conn.execute(_DELETE, (record_id,))
+        except sqlite3.Error:
+            logger.exception("Failed to delete record id=%s from %s", record_id, self.filename)
+            raise
+        self.object_cache.discard(record_id)
+        return cur.rowcount > 0
+
+    def find_by_type(self, type_: str) -> list:
+        return [self._from_row(row) for row in self._conn.execute(_SELECT_BY_TYPE, (type_,))]
+
+    def find_by_field(self, type_: str, field: str, value) -> list:
+        if (type_, field) in DEFAULT_FIELD_INDEXES:
+            # Spell the path literally so the planner matches the partial expression index
+            sql = (
+                "SELECT id, type, data FROM records WHERE type = ? "
+                f"AND json_extract(data, '$.{field}') = ? ORDER BY rowid"
+            )
+            rows = self._conn.execute(sql, (type_, value))
+        else:
+            rows = self._conn.execute(_SELECT_BY_FIELD, (type_, f'$."{field}"', value))
+        return [self._from_row(row) for row in rows]
+
+    def query(self, type_: str = None, where=None, order_by: str = None, limit: int = None, offset: int = 0) -> list:
+        """Return the records matching a query (see `IRepository.query`), filtered, ordered and paged in SQL.
+
+        As in the default implementation, a field that is missing, or holds a
+        number where the condition has a string (or vice versa), does not match.
+        """
+        if limit is not None and limit < 0 or offset < 0:
+            raise ValueError("limit and offset must not be negative")
+        clauses, params = [], []
+        if type_ is not None:
+            clauses.append("type = ?")
+            params.append(type_)
+        for field, op, value in normalize_where(where):
+            expr, expr_params = self._field_expr(type_, field)
+            clauses.append(f"{expr} {op} ?")
+            params += expr_params + [value]
+            if op not in ("=", "!=") and isinstance(value, (int, float, str)):
+                # SQLite orders every number before every string; only compare like with like
+                kinds = "'text'" if isinstance(value, str) else "'integer', 'real'"
+                clauses.append(f"typeof({expr}) IN ({kinds})")
+                params += expr_params
+        sql = "SELECT id, type, data FROM records"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        if order_by is None:
+            sql += " ORDER BY rowid"
+        else:
+            field, descending = parse_order(order_by)
+            expr, expr_params = self._field_expr(type_, field)
+            # Records without the field last in either direction, then insertion order
+            sql += f" ORDER BY {expr} IS NULL, {expr} {'DESC' if descending else 'ASC'}, rowid"
+            params += expr_params * 2
+        if limit is not None or offset:
+            sql += " LIMIT ? OFFSET ?"
+            params += [-1 if limit is None else limit, offset]
+        return [self._from_row(row) for row in self._conn.execute(sql, params)]
+
+    @staticmethod
+    def _field_expr(type_, field):
+        """Return (SQL expression, params) for data[field].
+
+        Indexed fields spell the path literally so the planner matches the partial expression index.
+        """
+        if (type_, field) in DEFAULT_FIELD_INDEXES:
+            return f"json_extract(data, '$.{field}')", []
+        return "json_extract(data, ?)", [f'$."{field}"']
+
+    def create_many(self, items, type_: str = None) -> list:
+        """Insert records for all items in a single transaction."""
+        new_records = [self._make_record(item, type_) for item in items]
+        logger.info("Creating %d records of type=%s", len(new_records), type_)
+        with self._conn:
+            self._conn.executemany(_INSERT, (self._to_row(r) for r in new_records))
+        return [r["id"] for r in new_records]
+
+    def update_many(self, targets, new_data=None) -> dict:
+        """Update several records in a single transaction."""
+        results = {}
+        with self._conn:
+            for rid, record in self._select(targets):
+                if record is None:
+                    results[rid] = False
+                    continue
+                data = self._new_data_for(record, targets, new_data)
+                self._conn.execute(_UPDATE, (self._dumps(data), rid))
+                results[rid] = True
+        for rid, updated in results.items():
+            if updated:
+                self.object_cache.discard(rid)
+        logger.info("Updated %d records", sum(results.values()))
+        return results
+
+    def delete_many(self, targets) -> dict:
+        """Delete several records in a single transaction."""
+        results = {}
+        with self._conn:
+            for rid, record in self._select(targets):
+                results[rid] = record is not None and self._conn.execute(_DELETE, (rid,)).rowcount > 0
+        for rid, deleted in results.items():
+            if deleted:
+                self.object_cache.discard(rid)
+        logger.info("Deleted %d records", sum(results.values()))
+        return results
+
+    def import_json(self, json_path: str) -> int:
+        """Load every record from a `Repository` JSON array file in one transaction.
+
+        Records whose id already exists are replaced in place (recorded as
+        updates in the change feed). Return the count imported.
+        """
+        with open(json_path, "r", encoding="utf-8") as f:
+            records = json.load(f)
+        with self._conn:
+            self._conn.executemany(_UPSERT, (self._to_row(r) for r in records))
+        self.object_cache.clear()
+        logger.info("Imported %d records from %s", len(records), json_path)
+        return len(records)
+
+    def changes_since(self, seq: int = 0, limit: int = None) -> list:
+        """Return the change feed entries after sequence number `seq` (a range scan of the `changes` key)."""
+        rows = self._conn.execute(_SELECT_CHANGES, (seq, -1 if limit is None else limit))
+        return [
+            {"seq": row[0], "op": row[1], "id": row[2], "type": row[3], "data": None if row[4] is None else json.loads(row[4])}
+            for row in rows
+        ]
+
+    def _sync_object_cache(self):
+        # data_version changes whenever another connection commits to the database
+        self.object_cache.validate(self._conn.execute("PRAGMA data_version").fetchone()[0])
+
+    @staticmethod
+    def _dumps(data):
+        return json.dumps(data, separators=(",", ":"), ensure_ascii=False)
+
+    @classmethod
+    def _to_row(cls, record):
+        return (record["id"], record.get("type") or "generic", cls._dumps(record.get("data") or {}))
+
+    @staticmethod
+    def _from_row(row):
+        return {"id": row[0], "type": row[1], "data": json.loads(row[2])}
@@ -0,0 +1,179 @@
+import logging
+from array import array
+from datetime import datetime
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - numpy is optional; the pure-Python path is used instead
+    np = None
+
+logger = logging.getLogger(__name__)
+
+
+class SessionColumns:
+    """Scheduled sessions laid out as parallel columns, one row per schedule record.
+
+    - user_codes / week_codes: int codes into `users` / `weeks` (-1: undated session)
+    - minutes: the session length (schedule `duration`, else its workout's duration)
+    - calories: calories of the workout's exercises
+
+    Columns are `array`s; `numpy.frombuffer` wraps them without copying.
+    """
+
+    __slots__ = ("users", "weeks", "user_codes", "week_codes", "minutes", "calories")
+
+    def __init__(self):
+        self.users = []
+        self.weeks = []
+        self.user_codes = array("q")
+        self.week_codes = array("q")
+        self.minutes = array("d")
+        self.calories = array("d")
+
+    def __len__(self):
+        return len(self.user_codes)
+
+
+def _week_of(start):
+    """ISO week label ("2024-W07") of an ISO-8601 start time, or None."""
+    if not start:
+        return None
+    try:
+        year, week, _ = datetime.fromisoformat(start).isocalendar()
+    except (TypeError, ValueError):
+        logger.warning("Ignoring invalid schedule start %r", start)
+        return None
+    return f"{year}-W{week:02d}"
+
+
+def _number(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def load_sessions(repo) -> SessionColumns:
+    """Build session columns from one streaming pass over the repository."""
+    workout_minutes = {}
+    workout_exercises = {}
+    exercise_calories = {}
+    # Schedules are resolved after the pass since they may precede their workout
+    schedules = []
+    for r in repo.iter_records():
+        type_ = r.get("type")
+        data = r.get("data") or {}
+        if type_ == "schedule":
+            schedules.append(data)
+        elif type_ == "workout":
+            workout_minutes[r.get("id")] = _number(data.get("duration"))
+            workout_exercises[r.get("id")] = data.get("exercise_ids") or ()
+        elif type_ == "exercise":
+            exercise_calories[r.get("id")] = _number(data.get("calories"))
+
+    workout_calories = {
+        wid: sum(exercise_calories.get(eid, 0.0) for eid in eids)
+        for wid, eids in workout_exercises.items()
+    }
+    columns = SessionColumns()
+    user_lookup = {}
+    week_lookup = {}
+    for data in schedules:
+        user_id = data.get("user_id")
+        code = user_lookup.get(user_id)
+        if code is None:
+            code = user_lookup[user_id] = len(columns.users)
+            columns.users.append(user_id)
+        columns.user_codes.append(code)
+
+        week = _week_of(data.get("start"))
+        if week is None:
+            columns.week_codes.append(-1)
+        else:
+            week_code = week_lookup.get(week)
+            if week_code is None:
+                week_code = week_lookup[week] = len(columns.weeks)
+                columns.weeks.append(week)
+            columns.week_codes.append(week_code)
+
+        workout_id = data.get("workout_id")
+        duration = data.get("duration")
+        columns.minutes.append(_number(duration) if duration is not None else workout_minutes.get(workout_id, 0.0))
+        columns.calories.append(workout_calories.get(workout_id, 0.0))
+    logger.debug("Loaded %d sessions for %d users", len(columns), len(columns.users))
+    return columns
+
+
+def _rate(calories, minutes):
+    return calories / minutes if minutes else None
+
+
+def _totals(sessions, minutes, calories):
+    return {
+        "sessions": int(sessions),
+        "minutes": float(minutes),
+        "calories": float(calories),
+        "calories_per_minute": _rate(calories, minutes),
+    }
+
+
+def user_totals(columns: SessionColumns) -> dict:
+    """Return {user_id: {"sessions", "minutes", "calories", "calories_per_minute"}}."""
+    n = len(columns.users)
+    if np is not None and n:
+        codes = np.frombuffer(columns.user_codes, dtype=np.int64)
+        sessions = np.bincount(codes, minlength=n)
+        minutes = np.bincount(codes, weights=np.frombuffer(columns.minutes, dtype=np.float64), minlength=n)
+        calories = np.bincount(codes, weights=np.frombuffer(columns.calories, dtype=np.float64), minlength=n)
+    else:
+        sessions = [0] * n
+        minutes = [0.0] * n
+        calories = [0.0] * n
+        for code, m, c in zip(columns.user_codes, columns.minutes, columns.calories):
+            sessions[code] += 1
+            minutes[code] += m
+            calories[code] += c
+    return {user_id: _totals(sessions[i], minutes[i], calories[i]) for i, user_id in enumerate(columns.users)}
+
+
+def weekly_totals(columns: SessionColumns) -> dict:
+    """Return {user_id: {week: totals}} for sessions with a start time, weeks in order."""
+    n_weeks = len(columns.weeks)
+    if not n_weeks:
+        return {}
+    bins = {}
+    if np is not None:
+        weeks = np.frombuffer(columns.week_codes, dtype=np.int64)
+        dated = weeks >= 0
+        # One bin per (user, week) pair that has sessions: bincount over the dense
+        # users x weeks key space would allocate mostly-empty arrays at scale
+        keys = np.frombuffer(columns.user_codes, dtype=np.int64)[dated] * n_weeks + weeks[dated]
+        pairs, inverse = np.unique(keys, return_inverse=True)
+        sessions = np.bincount(inverse, minlength=len(pairs))
+        minutes = np.bincount(inverse, weights=np.frombuffer(columns.minutes, dtype=np.float64)[dated], minlength=len(pairs))
+        calories = np.bincount(inverse, weights=np.frombuffer(columns.calories, dtype=np.float64)[dated], minlength=len(pairs))
+        for key, s, m, c in zip(pairs.tolist(), sessions.tolist(), minutes.tolist(), calories.tolist()):
+            bins[key] = (s, m, c)
+    else:
+        for code, week, m, c in zip(columns.user_codes, columns.week_codes, columns.minutes, columns.calories):
+            if week < 0:
+                continue
+            key = code * n_weeks + week
+            s, total_m, total_c = bins.get(key, (0, 0.0, 0.0))
+            bins[key] = (s + 1, total_m + m, total_c + c)
+    result = {}
+    for key in sorted(bins):
+        user_id = columns.users[key // n_weeks]
+        result.setdefault(user_id, {})[columns.weeks[key % n_weeks]] = _totals(*bins[key])
+    return {user_id: dict(sorted(rollup.items())) for user_id, rollup in result.items()}
+
+
+def overall_totals(columns: SessionColumns) -> dict:
+    """Totals across every session."""
+    if np is not None:
+        minutes = float(np.frombuffer(columns.minutes, dtype=np.float64).sum())
+        calories = float(np.frombuffer(columns.calories, dtype=np.float64).sum())
+    else:
+        minutes = sum(columns.minutes)
+        calories = sum(columns.calories)
+    return _totals(len(columns), minutes, calories)
@@ -0,0 +1,261 @@
+import os
+import csv
+import json
+import time
+import uuid
+import logging
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from models.factory import ObjectFactory
+from repository.atomic import atomic_write
+
+logger = logging.getLogger(__name__)
+
+FORMATS = ("csv", "jsonl")
+# CSV columns holding the record id and type; every other column is a data field
+RESERVED_COLUMNS = ("id", "type")
+
+
+def detect_format(path: str) -> str:
+    """Guess the format from the file extension (.csv, .jsonl/.ndjson)."""
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".csv":
+        return "csv"
+    if ext in (".jsonl", ".ndjson"):
+        return "jsonl"
+    raise ValueError(f"Cannot tell the format of {path}; pass --format ({', '.join(FORMATS)})")
+
+
+def decode_cell(text: str):
+    """Decode a CSV cell: JSON literals (numbers, true/false, null, lists, objects, quoted strings), else the text itself.
+
+    NaN and +/-Infinity are not JSON, so cells spelling them stay text.
+    """
+    try:
+        return json.loads(text, parse_constant=_reject_constant)
+    except ValueError:
+        return text
+
+
+def _reject_constant(name):
+    raise ValueError(f"{name} is not a JSON value")
+
+
+def encode_cell(value) -> str:
+    """Inverse of `decode_cell`: plain text for strings that would not decode as JSON, JSON otherwise."""
+    if isinstance(value, str):
+        try:
+            json.loads(value, parse_constant=_reject_constant)
+        except ValueError:
+            return value
+    return json.dumps(value, ensure_ascii=False)
+
+
+def _to_record(row, fmt, default_type):
+    """Turn one parsed row into a record; raises ValueError/TypeError for invalid rows."""
+    if fmt == "csv":
+        if None in row:
+            raise ValueError("more cells than header columns")
+        rid = row.get("id") or None
+        rec_type = default_type or row.get("type") or None
+        # Empty (or missing trailing) cells leave the field out
+        data = {k: decode_cell(v) for k, v in row.items() if k not in RESERVED_COLUMNS and v not in ("", None)}
+    else:
+        item = json.loads(row)
+        if not isinstance(item, dict):
+            raise ValueError(f"expected a JSON object, got {type(item).__name__}")
+        if isinstance(item.get("data"), dict):
+            # Full record as written by `export`
+            rid, rec_type, data = item.get("id"), default_type or item.get("type"), item["data"]
+        else:
+            data = dict(item)
+            rid = data.pop("id", None)
+            rec_type = default_type or data.pop("type", None)
+    if not rec_type:
+        raise ValueError("missing record type (add a type column/key or pass --type)")
+    if rid is not None and not isinstance(rid, str):
+        raise ValueError(f"record id must be a string, got {rid!r}")
+    record = {"id": rid or uuid.uuid4().hex, "type": rec_type, "data": data}
+    if rec_type in ObjectFactory.registered_types():
+        # Building the domain object checks required and unknown fields
+        ObjectFactory.create_from_record(record)
+    return record, rid is not None
+
+
+def validate_chunk(rows, fmt, default_type=None):
+    """Parse and validate a chunk of (line number, raw row) pairs.
+
+    Runs in worker processes. Returns (accepted, rejects): (line number, record,
+    whether the id came from the input) tuples and {"line": n, "row": raw,
+    "error": reason} dicts.
+    """
+    accepted = []
+    rejects = []
+    for line, row in rows:
+        try:
+            accepted.append((line, *_to_record(row, fmt, default_type)))
+        except (ValueError, TypeError) as e:
+            rejects.append({"line": line, "row": row, "error": str(e)})
+    return accepted, rejects
+
+
+def iter_chunks(path, fmt, chunk_size):
+    """Stream the input as lists of (line number, raw row); raw rows are dicts for CSV, text lines for JSONL."""
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        if fmt == "csv":
+            reader = csv.DictReader(f)
+            rows = ((reader.line_num, row) for row in reader)
+        else:
+            rows = ((n, line.rstrip("\r\n")) for n, line in enumerate(f, 1) if line.strip())
+        chunk = []
+        for item in rows:
+            chunk.append(item)
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+
+class ImportStats:
+    __slots__ = ("rows", "accepted", "rejected", "started")
+
+    def __init__(self):
+        self.rows = 0
+        self.accepted = 0
+        self.rejected = 0
+        self.started = time.perf_counter()
+
+    @property
+    def rate(self) -> float:
+        elapsed = time.perf_counter() - self.started
+        return self.rows / elapsed if elapsed > 0 else 0.0
+
+
+def import_file(repo, path, fmt=None, default_type=None, chunk_size=10000, workers=None,
+                rejects_path=None, progress=None, dry_run=False):
+    """Import records from a CSV or JSONL file with a single `create_many` write.
+
+    The file is streamed in chunks that are parsed and validated (including
+    building the domain object for registered types) in a process pool;
+    `workers=0` validates in this process. Rows that fail validation, or whose
+    id already exists in `repo` or earlier in the file, are written to
+    `rejects_path` (JSONL) instead of aborting the import; a rejects file left
+    by an earlier run is removed first, so it only exists when this import
+    rejected rows. `progress(stats)` is called after every chunk. Returns the
+    `ImportStats`.
+    """
+    fmt = fmt or detect_format(path)
+    workers = (os.cpu_count() or 1) if workers is None else workers
+    stats = ImportStats()
+    records = []
+    seen = set()
+    # Ids supplied by the input, which may clash with records already stored: line number per id
+    given = {}
+    rejects_file = None
+    if rejects_path is not None:
+        try:
+            os.remove(rejects_path)
+        except FileNotFoundError:
+            pass
+
+    def reject(items):
+        nonlocal rejects_file
+        if not items:
+            return
+        stats.rejected += len(items)
+        if rejects_path is None:
+            return
+        if rejects_file is None:
+            rejects_file = open(rejects_path, "w", encoding="utf-8")
+        for item in items:
+            rejects_file.write(json.dumps(item, ensure_ascii=False) + "\n")
+
+    def accept(accepted, rejects):
+        for line, record, id_given in accepted:
+            rid = record["id"]
+            if rid in seen:
+                rejects.append({"line": line, "row": record, "error": f"duplicate id {rid} in input"})
+                continue
+            seen.add(rid)
+            if id_given:
+                given[rid] = line
+            records.append(record)
+        stats.accepted = len(records)
+        reject(rejects)
+
+    pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    try:
+        in_flight = deque()
+        for chunk in iter_chunks(path, fmt, chunk_size):
+            stats.rows += len(chunk)
+            if pool is None:
+                accept(*validate_chunk(chunk, fmt, default_type))
+            else:
+                in_flight.append(pool.submit(validate_chunk, chunk, fmt, default_type))
+                # Bound the chunks in flight so reading does not run far ahead of validation
+                if len(in_flight) < 2 * workers:
+                    continue
+                accept(*in_flight.popleft().result())
+            if progress:
+                progress(stats)
+        while in_flight:
+            accept(*in_flight.popleft().result())
+            if progress:
+                progress(stats)
+        # One lookup for every supplied id instead of one per chunk
+        existing = repo.read_by_ids(given) if given else {}
+        if existing:
+            reject([{"line": given[r["id"]], "row": r, "error": f"id {r['id']} already exists"} for r in records if r["id"] in existing])
+            records = [r for r in records if r["id"] not in existing]
+            stats.accepted = len(records)
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+        if rejects_file is not None:
+            rejects_file.close()
+    if records and not dry_run:
+        repo.create_many(records)
+    logger.info("Imported %d of %d rows from %s (%d rejected)", len(records), stats.rows, path, stats.rejected)
+    return stats
+
+
+def export_file(repo, path, fmt=None, type_=None, chunk_size=10000, progress=None) -> int:
+    """Stream records (optionally of one type) to a CSV or JSONL file; return the count.
+
+    JSONL holds one full record per line. CSV has `id`, `type` and one column
+    per data field (found with a first pass over the records), with non-text
+    values JSON-encoded so `import` restores them. The file is replaced atomically.
+    """
+    fmt = fmt or detect_format(path)
+    count = 0
+    with atomic_write(path) as f:
+        if fmt == "csv":
+            columns = {}
+            for r in repo.iter_records(type_):
+                columns.update(dict.fromkeys(r.get("data") or {}))
+            csv.writer(f, lineterminator="\n").writerow(list(RESERVED_COLUMNS) + list(columns))
+        buffer = []
+        for r in repo.iter_records(type_):
+            if fmt == "csv":
+                data = r.get("data") or {}
+                buffer.append([r.get("id"), r.get("type")] + [encode_cell(data[c]) if c in data else "" for c in columns])
+            else:
+                buffer.append(json.dumps(r, ensure_ascii=False) + "\n")
+            if len(buffer) >= chunk_size:
+                count += _flush(f, fmt, buffer)
+                if progress:
+                    progress(count)
+        count += _flush(f, fmt, buffer)
+    logger.info("Exported %d records to %s", count, path)
+    return count
+
+
+def _flush(f, fmt, buffer) -> int:
+    n = len(buffer)
+    if fmt == "csv":
+        csv.writer(f, lineterminator="\n").writerows(buffer)
+    else:
+        f.writelines(buffer)
+    buffer.clear()
+    return n
@@ -0,0 +1,189 @@
+import io
+import os
+import json
+import secrets
+import logging
+import threading
+import contextlib
+import http.client
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger(__name__)
+
+# Clients give up quickly on a dead daemon and fall back to running locally
+CONNECT_TIMEOUT = 0.5
+
+
+class CommandServer:
+    """Localhost HTTP daemon running CLI commands in one long-lived process.
+
+    `run_command(argv)` executes one command line and returns its exit status;
+    whatever it prints is captured and sent back to the client. Commands run
+    one at a time (stdout capture is process-wide) against whatever state the
+    callback keeps hot, typically an in-memory indexed repository.
+
+    The daemon advertises itself through a JSON state file holding its address
+    and a random token that clients must present, so only users who can read
+    the file can drive it.
+    """
+
+    def __init__(self, run_command, state_path, host="127.0.0.1", port=0):
+        self.run_command = run_command
+        self.state_path = state_path
+        self.token = secrets.token_hex(16)
+        self._lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self.httpd.daemon_threads = True
+
+    @property
+    def address(self):
+        return self.httpd.server_address[:2]
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, fmt, *args):
+                logger.debug("daemon: " + fmt, *args)
+
+            def _reply(self, code, payload):
+                body = json.dumps(payload).encode("utf-8")
+                self.send_response(code)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                if self.path != "/health":
+                    self._reply(404, {"error": "not found"})
+                    return
+                self._reply(200, {"status": "ok", "pid": os.getpid()})
+
+            def do_POST(self):
+                if self.path != "/run":
+                    self._reply(404, {"error": "not found"})
+                    return
+                if self.headers.get("X-Token") != server.token:
+                    self._reply(403, {"error": "bad token"})
+                    return
+                try:
+                    length = int(self.headers.get("Content-Length", 0))
+                    argv = json.loads(self.rfile.read(length))["argv"]
+                except (ValueError, KeyError, TypeError):
+                    self._reply(400, {"error": "expected {\"argv\": [...]}"})
+                    return
+                self._reply(200, server.execute(argv))
+
+        return Handler
+
+    def execute(self, argv):
+        """Run one command line, capturing its output. Return {"status", "output"}."""
+        buf = io.StringIO()
+        with self._lock, contextlib.redirect_stdout(buf), contextlib.redirect_stderr(buf):
+            try:
+                status = self.run_command(argv) or 0
+            except SystemExit as e:
+                # argparse errors and --help exit; report them instead of stopping the daemon
+                status = e.code if isinstance(e.code, int) else 1
+            except Exception as e:
+                logger.exception("Daemon command failed: %s", argv)
+                print(f"Error: {e}")
+                status = 1
+        return {"status": status, "output": buf.getvalue()}
+
+    def serve_forever(self):
+        host, port = self.address
+        state = {"host": host, "port": port, "pid": os.getpid(), "token": self.token}
+        fd = os.open(self.state_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+        logger.info("Daemon listening on %s:%d (state file %s)", host, port, self.state_path)
+        try:
+            self.httpd.serve_forever()
+        finally:
+            self.httpd.server_close()
+            try:
+                with open(self.state_path, "r", encoding="utf-8") as f:
+                    ours = json.load(f).get("token") == self.token
+            except (OSError, ValueError):
+                ours = False
+            if ours:
+                os.remove(self.state_path)
+            logger.info("Daemon stopped")
+
+    def shutdown(self):
+        self.httpd.shutdown()
+
+
+def _read_state(state_path):
+    try:
+        with open(state_path, "r", encoding="utf-8") as f:
+            state = json.load(f)
+        return state["host"], state["port"], state["token"]
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+
+def running_pid(state_path):
+    """Return the pid of the daemon described by `state_path` if it answers, else None."""
+    state = _read_state(state_path)
+    if state is None:
+        return None
+    host, port, _ = state
+    conn = http.client.HTTPConnection(host, port, timeout=CONNECT_TIMEOUT)
+    try:
+        conn.request("GET", "/health")
+        response = conn.getresponse()
+        if response.status != 200:
+            return None
+        return json.loads(response.read()).get("pid")
+    except (OSError, ValueError):
+        return None
+    finally:
+        conn.close()
+
+
+def forward(argv, state_path):
+    """Run `argv` on the daemon described by `state_path`.
+
+    Return {"status", "output"}, or None when no daemon accepts a connection
+    (the caller should then run the command itself). Once connected the
+    command may already have run, so any later failure is returned as an
+    error result (status 1) rather than None, and the caller must not retry
+    it locally.
+    """
+    state = _read_state(state_path)
+    if state is None:
+        return None
+    host, port, token = state
+    body = json.dumps({"argv": list(argv)})
+    conn = http.client.HTTPConnection(host, port, timeout=CONNECT_TIMEOUT)
+    try:
+        try:
+            conn.connect()
+        except OSError:
+            logger.debug("No daemon reachable at %s:%s; running locally", host, port)
+            return None
+        # Connected: the command itself may take as long as it needs
+        conn.sock.settimeout(None)
+        try:
+            conn.request("POST", "/run", body=body, headers={"Content-Type": "application/json", "X-Token": token})
+            response = conn.getresponse()
+            payload = response.read()
+            if response.status != 200:
+                logger.warning("Daemon rejected command %s (HTTP %d)", argv, response.status)
+                return _failure(f"The daemon at {host}:{port} rejected the command (HTTP {response.status}); it was not run.")
+            return json.loads(payload)
+        except (OSError, ValueError, http.client.HTTPException) as e:
+            logger.warning("Lost the daemon at %s:%s while it handled %s", host, port, argv, exc_info=True)
+            return _failure(
+                f"Lost the connection to the daemon at {host}:{port} ({e}); the command may or may not have run. "
+                "Check before retrying, or pass --no-daemon to run it here."
+            )
+    finally:
+        conn.close()
+
+
+def _failure(message):
+    return {"status": 1, "output": f"Error: {message}\n"}
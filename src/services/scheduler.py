@@ -1,13 +1,352 @@
+import heapq
+import uuid
+import random
 import logging
+import itertools
+from datetime import datetime, timedelta
 
 
 logger = logging.getLogger(__name__)
 
 
+def parse_time(value):
+    """Parse an ISO-8601 time into a naive local datetime (aware times are converted)."""
+    dt = value if isinstance(value, datetime) else datetime.fromisoformat(value)
+    if dt.tzinfo is not None:
+        dt = dt.astimezone().replace(tzinfo=None)
+    return dt
+
+
+class Session:
+    """One scheduled workout session for a user: [start, end) with duration in minutes."""
+
+    __slots__ = ("id", "user_id", "workout_id", "start", "duration", "end", "key", "active")
+
+    _seq = itertools.count()
+
+    def __init__(self, user_id, workout_id, start, duration, session_id=None):
+        self.id = session_id or uuid.uuid4().hex
+        self.user_id = user_id
+        self.workout_id = workout_id
+        self.start = parse_time(start)
+        self.duration = duration
+        self.end = self.start + timedelta(minutes=duration)
+        # Unique ordering key: sessions may share a start time
+        self.key = (self.start, next(self._seq))
+        self.active = True
+
+    def to_data(self):
+        """The `data` of this session's schedule record."""
+        return {
+            "user_id": self.user_id,
+            "workout_id": self.workout_id,
+            "start": self.start.isoformat(),
+            "duration": self.duration,
+        }
+
+    @classmethod
+    def from_record(cls, record):
+        """Build a session from a schedule record, or return None if it has no start time."""
+        data = record.get("data") or {}
+        if not data.get("start"):
+            return None
+        return cls(data.get("user_id"), data.get("workout_id"), data["start"], data.get("duration") or 0, record.get("id"))
+
+
+class ScheduleConflict(ValueError):
+    """Raised when a new session overlaps an existing session of the same user."""
+
+    def __init__(self, session, existing):
+        super().__init__(
+            f"Session at {session.start.isoformat()} overlaps schedule id={existing.id} "
+            f"({existing.start.isoformat()} - {existing.end.isoformat()})"
+        )
+        self.session = session
+        self.existing = existing
+
+
+class _Node:
+    __slots__ = ("session", "priority", "max_end", "left", "right")
+
+    def __init__(self, session, priority):
+        self.session = session
+        self.priority = priority
+        self.max_end = session.end
+        self.left = None
+        self.right = None
+
+
+def _update(node):
+    max_end = node.session.end
+    if node.left is not None and node.left.max_end > max_end:
+        max_end = node.left.max_end
+    if node.right is not None and node.right.max_end > max_end:
+        max_end = node.right.max_end
+    node.max_end = max_end
+
+
+def _split(node, key, inclusive=False):
+    """Split into (keys < key, or <= key when inclusive; the other keys)."""
+    if node is None:
+        return None, None
+    goes_left = node.session.key <= key if inclusive else node.session.key < key
+    if goes_left:
+        node.right, right = _split(node.right, key, inclusive)
+        _update(node)
+        return node, right
+    left, node.left = _split(node.left, key, inclusive)
+    _update(node)
+    return left, node
+
+
+def _merge(left, right):
+    """Merge two treaps where every key in `left` is below every key in `right`."""
+    if left is None:
+        return right
+    if right is None:
+        return left
+    if left.priority > right.priority:
+        left.right = _merge(left.right, right)
+        _update(left)
+        return left
+    right.left = _merge(left, right.left)
+    _update(right)
+    return right
+
+
+def _build(sessions, lo, hi, depth, levels, rng):
+    """Build a balanced treap from sessions[lo:hi] (sorted by key).
+
+    Depth d gets priorities in the d-th of `levels` equal slices of [0, 1),
+    highest at the root, so parents always outrank their children.
+    """
+    if lo >= hi:
+        return None
+    mid = (lo + hi) // 2
+    node = _Node(sessions[mid], 1.0 - (depth + rng.random()) / levels)
+    node.left = _build(sessions, lo, mid, depth + 1, levels, rng)
+    node.right = _build(sessions, mid + 1, hi, depth + 1, levels, rng)
+    _update(node)
+    return node
+
+
+class IntervalTree:
+    """Sessions in a treap ordered by start time, each node tracking the latest end below it.
+
+    Insert, remove and "does anything overlap [start, end)" run in O(log n)
+    expected time; listing overlaps costs O(log n + k).
+    """
+
+    def __init__(self):
+        self._root = None
+        self._size = 0
+        self._rng = random.Random()
+
+    def __len__(self):
+        return self._size
+
+    def insert(self, session):
+        left, right = _split(self._root, session.key)
+        self._root = _merge(_merge(left, _Node(session, self._rng.random())), right)
+        self._size += 1
+
+    def extend(self, sessions):
+        """Insert many sessions; an empty tree is built balanced in O(n log n) instead."""
+        if self._root is not None:
+            for session in sessions:
+                self.insert(session)
+            return
+        ordered = sorted(sessions, key=lambda s: s.key)
+        self._root = _build(ordered, 0, len(ordered), 0, max(1, len(ordered).bit_length()), self._rng)
+        self._size = len(ordered)
+
+    def remove(self, session) -> bool:
+        left, rest = _split(self._root, session.key)
+        found, right = _split(rest, session.key, inclusive=True)
+        self._root = _merge(left, right)
+        if found is None:
+            return False
+        self._size -= 1
+        return True
+
+    def first_overlap(self, start, end):
+        """Return a session overlapping [start, end), or None."""
+        node = self._root
+        while node is not None:
+            s = node.session
+            if s.start < end and s.end > start:
+                return s
+            # If the left subtree reaches past `start` and holds no overlap, nothing to the right does either
+            if node.left is not None and node.left.max_end > start:
+                node = node.left
+            else:
+                node = node.right
+        return None
+
+    def overlapping(self, start, end) -> list:
+        """Return every session overlapping [start, end), in start order."""
+        found = []
+
+        def visit(node):
+            # Skip subtrees that end before `start`, and right subtrees starting after `end`
+            if node is None or node.max_end <= start:
+                return
+            visit(node.left)
+            s = node.session
+            if s.start < end:
+                if s.end > start:
+                    found.append(s)
+                visit(node.right)
+
+        visit(self._root)
+        return found
+
+    def iter_from(self, start):
+        """Yield sessions starting at or after `start`, in start order."""
+        stack = []
+        node = self._root
+        while stack or node is not None:
+            if node is not None:
+                if node.session.start < start:
+                    node = node.right
+                    continue
+                stack.append(node)
+                node = node.left
+                continue
+            node = stack.pop()
+            yield node.session
+            node = node.right
+
+
 class Scheduler:
+    """Schedules sessions and answers "what's next" and "does this conflict".
+
+    Upcoming sessions sit in a min-heap by start time; each user's sessions
+    also sit in an `IntervalTree` for overlap checks on insert.
+    """
+
+    def __init__(self):
+        self._heap = []
+        self._trees = {}
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
     def schedule_workout(self, user, workout):
         # Use public attribute names from User and Workout
         user_name = getattr(user, "username", None) or getattr(user, "_name", "Unknown user")
         workout_name = getattr(workout, "name", None) or getattr(workout, "_title", "Unknown workout")
         logger.info("Scheduling workout '%s' for user '%s'", workout_name, user_name)
-        return f"{user_name} scheduled: {workout_name}"
\ No newline at end of file
+        return f"{user_name} scheduled: {workout_name}"
+
+    def load(self, records) -> int:
+        """Add the sessions of schedule records that have a start time, without conflict checks.
+
+        Return how many were added.
+        """
+        by_user = {}
+        for record in records:
+            session = Session.from_record(record)
+            if session is not None:
+                by_user.setdefault(session.user_id, []).append(session)
+        added = 0
+        for user_id, sessions in by_user.items():
+            tree = self._trees.get(user_id)
+            if tree is None:
+                tree = self._trees[user_id] = IntervalTree()
+            tree.extend(sessions)
+            self._heap.extend((s.key, s) for s in sessions)
+            added += len(sessions)
+        heapq.heapify(self._heap)
+        self._count += added
+        logger.debug("Loaded %d scheduled sessions", added)
+        return added
+
+    def conflicts(self, user_id, start, duration) -> list:
+        """Return the user's sessions overlapping a session of `duration` minutes at `start`."""
+        tree = self._trees.get(user_id)
+        if tree is None:
+            return []
+        start = parse_time(start)
+        return tree.overlapping(start, start + timedelta(minutes=duration))
+
+    def add_session(self, user_id, workout_id, start, duration, session_id=None, check_conflicts=True) -> Session:
+        """Schedule one session; raise ScheduleConflict if it overlaps one of the user's sessions."""
+        session = Session(user_id, workout_id, start, duration, session_id)
+        if check_conflicts:
+            self._check(session)
+        self._insert(session)
+        return session
+
+    def schedule_recurring(self, user_id, workout_id, start, duration, count, every=timedelta(days=7),
+                           skip_conflicts=False) -> list:
+        """Schedule `count` sessions `every` apart starting at `start`.
+
+        All-or-nothing: a conflict raises ScheduleConflict and adds no session,
+        unless `skip_conflicts` is set, in which case conflicting slots are left out.
+        """
+        start = parse_time(start)
+        added = []
+        for i in range(count):
+            session = Session(user_id, workout_id, start + every * i, duration)
+            try:
+                self._check(session)
+            except ScheduleConflict:
+                if skip_conflicts:
+                    continue
+                for s in added:
+                    self.remove_session(s)
+                raise
+            self._insert(session)
+            added.append(session)
+        logger.info("Scheduled %d recurring sessions for user %s", len(added), user_id)
+        return added
+
+    def remove_session(self, session) -> bool:
+        """Unschedule a session. Return False if it was not scheduled."""
+        tree = self._trees.get(session.user_id)
+        if not session.active or tree is None or not tree.remove(session):
+            return False
+        # The heap entry is dropped lazily when it reaches the top
+        session.active = False
+        self._count -= 1
+        return True
+
+    def next_sessions(self, n=1, now=None, user_id=None) -> list:
+        """Return up to `n` sessions starting at or after `now` (default: the current time)."""
+        now = datetime.now() if now is None else parse_time(now)
+        if user_id is not None:
+            tree = self._trees.get(user_id)
+            return list(itertools.islice(tree.iter_from(now), n)) if tree is not None else []
+        heap = self._heap
+        # Removed sessions are gone for good; past ones are only skipped, as `now` is the caller's choice
+        while heap and not heap[0][1].active:
+            heapq.heappop(heap)
+        # Walk the heap in order without changing it: a frontier of heap positions
+        # ordered by key, expanding to a position's children once it is visited
+        taken = []
+        frontier = [(heap[0][0], 0)] if heap else []
+        while frontier and len(taken) < n:
+            _, i = heapq.heappop(frontier)
+            session = heap[i][1]
+            if session.active and session.start >= now:
+                taken.append(session)
+            for child in (2 * i + 1, 2 * i + 2):
+                if child < len(heap):
+                    heapq.heappush(frontier, (heap[child][0], child))
+        return taken
+
+    def _check(self, session):
+        tree = self._trees.get(session.user_id)
+        existing = tree.first_overlap(session.start, session.end) if tree is not None else None
+        if existing is not None:
+            raise ScheduleConflict(session, existing)
+
+    def _insert(self, session):
+        tree = self._trees.get(session.user_id)
+        if tree is None:
+            tree = self._trees[session.user_id] = IntervalTree()
+        tree.insert(session)
+        heapq.heappush(self._heap, (session.key, session))
+        self._count += 1
@@ -0,0 +1,70 @@
+import pytest
+from repository.repository import Repository
+from services import analytics
+
+# Exercise the NumPy path too when it is installed
+ENGINES = [None] + ([analytics.np] if analytics.np is not None else [])
+
+
+@pytest.fixture
+def repo(tmp_path):
+    repo = Repository(str(tmp_path / "data.json"))
+    # A schedule may be stored before the workout it references
+    repo.create({"id": "s0", "type": "schedule", "data": {"user_id": "u1", "workout_id": "w1", "start": "2024-01-01T07:00"}})
+    repo.create_many([
+        {"id": "u1", "type": "user", "data": {"username": "amy", "age": 30}},
+        {"id": "u2", "type": "user", "data": {"username": "bob", "age": 41}},
+        {"id": "e1", "type": "exercise", "data": {"name": "Squat", "calories": 100}},
+        {"id": "e2", "type": "exercise", "data": {"name": "Row", "calories": 50}},
+        {"id": "w1", "type": "workout", "data": {"name": "Legs", "duration": 30, "exercise_ids": ["e1", "e2"]}},
+        {"id": "w2", "type": "workout", "data": {"name": "Walk", "duration": 60}},
+        {"id": "s1", "type": "schedule", "data": {"user_id": "u1", "workout_id": "w1", "start": "2024-01-03T07:00"}},
+        {"id": "s2", "type": "schedule", "data": {"user_id": "u1", "workout_id": "w2", "start": "2024-01-09T07:00", "duration": 45}},
+        {"id": "s3", "type": "schedule", "data": {"user_id": "u2", "workout_id": "w2"}},
+    ])
+    return repo
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_user_totals(repo, monkeypatch, engine):
+    monkeypatch.setattr(analytics, "np", engine)
+    totals = analytics.user_totals(analytics.load_sessions(repo))
+    assert totals["u1"] == {"sessions": 3, "minutes": 105.0, "calories": 300.0, "calories_per_minute": 300 / 105}
+    assert totals["u2"] == {"sessions": 1, "minutes": 60.0, "calories": 0.0, "calories_per_minute": 0.0}
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_weekly_totals_skip_undated_sessions(repo, monkeypatch, engine):
+    monkeypatch.setattr(analytics, "np", engine)
+    weekly = analytics.weekly_totals(analytics.load_sessions(repo))
+    assert list(weekly) == ["u1"]
+    assert list(weekly["u1"]) == ["2024-W01", "2024-W02"]
+    assert weekly["u1"]["2024-W01"]["sessions"] == 2
+    assert weekly["u1"]["2024-W01"]["calories"] == 300.0
+    assert weekly["u1"]["2024-W02"]["minutes"] == 45.0
+
+
+def test_overall_totals_and_empty_repository(repo, tmp_path):
+    assert analytics.overall_totals(analytics.load_sessions(repo))["sessions"] == 4
+    empty = analytics.load_sessions(Repository(str(tmp_path / "empty.json")))
+    assert analytics.user_totals(empty) == {}
+    assert analytics.weekly_totals(empty) == {}
+    assert analytics.overall_totals(empty)["calories_per_minute"] is None
+
+
+def test_numpy_weekly_totals_match_pure_python(monkeypatch):
+    np = pytest.importorskip("numpy")
+    columns = analytics.SessionColumns()
+    columns.users = ["u%d" % i for i in range(500)]
+    columns.weeks = ["2024-W%02d" % w for w in range(1, 53)]
+    # Sparse (user, week) pairs plus undated sessions
+    for i in range(2000):
+        columns.user_codes.append(i * 7 % 500)
+        columns.week_codes.append(-1 if i % 5 == 0 else i * 3 % 52)
+        columns.minutes.append(float(i % 60))
+        columns.calories.append(float(i % 13) * 10)
+
+    monkeypatch.setattr(analytics, "np", None)
+    expected = analytics.weekly_totals(columns)
+    monkeypatch.setattr(analytics, "np", np)
+    assert analytics.weekly_totals(columns) == expected
@@ -0,0 +1,162 @@
+import time
+import asyncio
+import threading
+from repository.repository import Repository
+from repository.async_repository import AsyncRepositoryAdapter
+
+
+class SlowRepository(Repository):
+    """Repository whose reads take a while and are counted."""
+
+    def __init__(self, filename):
+        super().__init__(filename)
+        self.reads = 0
+        self.active = 0
+        self.overlap = False
+        self._guard = threading.Lock()
+
+    def _enter(self):
+        with self._guard:
+            self.active += 1
+            if self.active > 1:
+                self.overlap = True
+
+    def _exit(self):
+        with self._guard:
+            self.active -= 1
+
+    def read_all(self):
+        self.reads += 1
+        time.sleep(0.05)
+        return super().read_all()
+
+    def create(self, item_dict, type_=None):
+        self._enter()
+        try:
+            time.sleep(0.01)
+            return super().create(item_dict, type_)
+        finally:
+            self._exit()
+
+
+def test_async_adapter_coalesces_concurrent_reads(tmp_path):
+    repo = SlowRepository(str(tmp_path / "data.json"))
+    repo.create({"username": "a", "age": 1}, type_="user")
+    adapter = AsyncRepositoryAdapter(repo)
+
+    async def scenario():
+        results = await asyncio.gather(*(adapter.read_all() for _ in range(10)))
+        assert all(len(r) == 1 for r in results)
+        await adapter.create({"username": "b", "age": 2}, type_="user")
+        # A read after a write is not served from the earlier in-flight call
+        return await adapter.read_all()
+
+    assert len(asyncio.run(scenario())) == 2
+    assert repo.reads == 2
+
+
+def test_async_adapter_serializes_writes(tmp_path):
+    repo = SlowRepository(str(tmp_path / "data.json"))
+    adapter = AsyncRepositoryAdapter(repo)
+
+    async def scenario():
+        ids = await asyncio.gather(*(adapter.create({"username": "u%d" % i, "age": i}, "user") for i in range(8)))
+        found = await adapter.call("find_by_field", "user", "username", "u3")
+        return ids, found
+
+    ids, found = asyncio.run(scenario())
+    assert len(set(ids)) == 8
+    assert not repo.overlap
+    assert len(repo.find_by_type("user")) == 8
+    assert [r["id"] for r in found] == [ids[3]]
+
+
+class ReadWriteTrackingRepository(SlowRepository):
+    """SlowRepository whose reads also count towards the overlap check."""
+
+    def read_all(self):
+        self._enter()
+        try:
+            return super().read_all()
+        finally:
+            self._exit()
+
+
+class QueryTrackingRepository(SlowRepository):
+    """SlowRepository recording how many queries run at once, and whether one overlaps a write."""
+
+    def __init__(self, filename):
+        super().__init__(filename)
+        self.queries = 0
+        self.max_queries = 0
+
+    def query(self, *args, **kwargs):
+        with self._guard:
+            self.queries += 1
+            self.max_queries = max(self.max_queries, self.queries)
+            if self.active:
+                self.overlap = True
+        try:
+            time.sleep(0.05)
+            return super().query(*args, **kwargs)
+        finally:
+            with self._guard:
+                self.queries -= 1
+
+    def create(self, item_dict, type_=None):
+        with self._guard:
+            if self.queries:
+                self.overlap = True
+        return super().create(item_dict, type_)
+
+
+def test_async_adapter_write_waits_for_read_scheduled_before_it(tmp_path):
+    repo = ReadWriteTrackingRepository(str(tmp_path / "data.json"))
+    adapter = AsyncRepositoryAdapter(repo)
+
+    async def scenario():
+        # Both tasks are scheduled before either runs
+        read = asyncio.ensure_future(adapter.read_all())
+        write = asyncio.ensure_future(adapter.create({"username": "w", "age": 1}, "user"))
+        return await asyncio.gather(read, write)
+
+    records, _ = asyncio.run(scenario())
+    assert not repo.overlap
+    assert records == []
+
+
+def test_async_adapter_coalesced_waiters_get_their_own_list(tmp_path):
+    repo = SlowRepository(str(tmp_path / "data.json"))
+    repo.create({"username": "a", "age": 1}, type_="user")
+    adapter = AsyncRepositoryAdapter(repo)
+
+    async def scenario():
+        return await asyncio.gather(adapter.read_all(), adapter.read_all())
+
+    first, second = asyncio.run(scenario())
+    assert repo.reads == 1
+    first.clear()
+    assert len(second) == 1
+
+
+def test_async_adapter_runs_queries_as_concurrent_reads(tmp_path):
+    repo = QueryTrackingRepository(str(tmp_path / "data.json"))
+    repo.create({"username": "a", "age": 1}, type_="user")
+    adapter = AsyncRepositoryAdapter(repo)
+
+    async def scenario():
+        # Different filters, so the calls are not coalesced into one
+        first = asyncio.ensure_future(adapter.call("query", "user", {"age": 1}))
+        second = asyncio.ensure_future(adapter.call("query", "user", {"age": 2}))
+        write = asyncio.ensure_future(adapter.create({"username": "b", "age": 2}, "user"))
+        results = await asyncio.gather(first, second, write)
+        summary = await adapter.call("summary")
+        records = await adapter.call("iter_records", "user")
+        return results, summary, records
+
+    (first, second, _), summary, records = asyncio.run(scenario())
+    assert [r["data"]["username"] for r in first] == ["a"] and second == []
+    assert repo.max_queries == 2
+    assert not repo.overlap
+    assert summary["types"] == {"user": 2}
+    assert len(records) == 2
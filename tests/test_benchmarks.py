@@ -0,0 +1,36 @@
+import os
+import sys
+import json
+import pytest
+
+BENCH_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "benchmarks"))
+if BENCH_DIR not in sys.path:
+    sys.path.insert(0, BENCH_DIR)
+
+import run as bench
+from datagen import generate_records
+
+
+@pytest.mark.parametrize("backend", sorted(bench.BACKENDS))
+def test_bench_backend_smoke(tmp_path, backend, capsys):
+    records = generate_records(200, seed=0)
+    results = bench.bench_backend(backend, 200, records, str(tmp_path))
+    ops = {r["op"] for r in results}
+    assert {"create_many", "read_by_id", "get_objects_by_ids", "delete_many", "changes_since_tail"} <= ops
+    assert all(r["backend"] == backend and r["size"] == 200 and r["n"] > 0 for r in results)
+
+
+def test_run_output_matches_committed_baseline_shape(tmp_path, capsys):
+    out = tmp_path / "latest.json"
+    assert bench.main(["--sizes", "200", "--output", str(out)]) == 0
+    with open(out, "r", encoding="utf-8") as f:
+        report = json.load(f)
+    with open(bench.DEFAULT_BASELINE, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+
+    assert report.keys() == baseline.keys()
+    assert report["meta"].keys() == baseline["meta"].keys()
+    assert {tuple(sorted(r)) for r in report["results"]} == {tuple(sorted(r)) for r in baseline["results"]}
+    # Every (backend, op) measured now has a baseline entry to compare against, and vice versa
+    assert {(r["backend"], r["op"]) for r in report["results"]} == {(r["backend"], r["op"]) for r in baseline["results"]}
+    assert {r["size"] for r in report["results"]} == {200}
@@ -0,0 +1,84 @@
+import json
+import pytest
+from repository.repository import Repository
+from services import bulk_io
+
+
+def _store(tmp_path, name="data.json"):
+    return Repository(str(tmp_path / name))
+
+
+@pytest.mark.parametrize("fmt", ["csv", "jsonl"])
+def test_export_then_import_round_trips(tmp_path, fmt):
+    source = _store(tmp_path)
+    source.create_many(
+        [
+            {"username": "007", "age": 30, "height": 1.8},
+            {"username": "ann", "age": 41},
+        ],
+        type_="user",
+    )
+    source.create({"name": "Run", "duration": 20, "exercise_ids": ["e1", "e2"]}, type_="workout")
+    source.create({"user_id": "u", "workout_id": "w", "start": "2030-01-01T08:00:00"}, type_="schedule")
+    path = str(tmp_path / f"out.{fmt}")
+    assert bulk_io.export_file(source, path) == 4
+
+    target = _store(tmp_path, "copy.json")
+    stats = bulk_io.import_file(target, path, workers=0)
+    assert (stats.rows, stats.accepted, stats.rejected) == (4, 4, 0)
+    assert target.read_all() == source.read_all()
+
+
+def test_import_rejects_invalid_rows(tmp_path):
+    path = tmp_path / "in.csv"
+    path.write_text(
+        "id,type,username,age\n"
+        ",user,neo,33\n"
+        ",user,bad,\n"
+        ",workout,x,1\n"
+        ",,nobody,3\n"
+        "dup,user,a,1\n"
+        "dup,user,b,2\n"
+        "taken,user,c,3\n",
+        encoding="utf-8",
+    )
+    repo = _store(tmp_path)
+    repo.create({"id": "taken", "type": "user", "data": {"username": "old", "age": 9}})
+    rejects = tmp_path / "rejects.jsonl"
+    progress = []
+    stats = bulk_io.import_file(repo, str(path), chunk_size=2, workers=2, rejects_path=str(rejects), progress=progress.append)
+
+    assert (stats.rows, stats.accepted, stats.rejected) == (7, 2, 5)
+    assert len(progress) >= 3
+    assert sorted(r["data"]["username"] for r in repo.find_by_type("user")) == ["a", "neo", "old"]
+    lines = [json.loads(line) for line in rejects.read_text(encoding="utf-8").splitlines()]
+    assert sorted(r["line"] for r in lines) == [3, 4, 5, 7, 8]
+
+
+def test_import_dry_run_and_default_type(tmp_path):
+    path = tmp_path / "in.jsonl"
+    path.write_text('{"username": "zed", "age": 5}\n\n[1, 2]\n', encoding="utf-8")
+    repo = _store(tmp_path)
+    stats = bulk_io.import_file(repo, str(path), default_type="user", workers=0, dry_run=True)
+    assert (stats.accepted, stats.rejected) == (1, 1)
+    assert repo.read_all() == []
+    with pytest.raises(ValueError):
+        bulk_io.import_file(repo, str(tmp_path / "in.txt"), workers=0)
+
+
+def test_clean_import_removes_stale_rejects(tmp_path):
+    path = tmp_path / "in.csv"
+    rejects = tmp_path / "in.csv.rejects.jsonl"
+    path.write_text("id,type,username,age\n,user,bad,\n", encoding="utf-8")
+    bulk_io.import_file(_store(tmp_path), str(path), workers=0, rejects_path=str(rejects))
+    assert rejects.exists()
+
+    path.write_text("id,type,username,age\n,user,fixed,3\n", encoding="utf-8")
+    stats = bulk_io.import_file(_store(tmp_path), str(path), workers=0, rejects_path=str(rejects))
+    assert stats.rejected == 0
+    assert not rejects.exists()
+
+
+def test_non_json_constants_stay_text():
+    assert [bulk_io.decode_cell(t) for t in ("NaN", "Infinity", "-Infinity", "1.5")] == ["NaN", "Infinity", "-Infinity", 1.5]
+    assert bulk_io.encode_cell("NaN") == "NaN"
@@ -0,0 +1,40 @@
+import pytest
+from repository.codecs import CODECS, detect_codec, get_codec
+from repository.repository import Repository
+
+RECORDS = [
+    {"id": "u1", "type": "user", "data": {"username": "zoë", "age": 30, "height": 170.5, "weight": None}},
+    {"id": "w1", "type": "workout", "data": {"name": "Row", "duration": 20}},
+]
+
+
+@pytest.mark.parametrize("name", sorted(CODECS))
+def test_codec_round_trip_and_detection(name):
+    codec = get_codec(name)
+    raw = codec.encode(RECORDS)
+    assert detect_codec(raw[:16]) is codec
+    assert codec.decode(raw) == RECORDS
+    assert get_codec(name).decode(get_codec(name).encode([])) == []
+
+
+def test_get_codec_rejects_unknown_name():
+    with pytest.raises(ValueError):
+        get_codec("yaml")
+
+
+@pytest.mark.parametrize("name", ["json-compact", "marshal", "pickle", "json-zlib", "json-lzma"])
+def test_repository_convert_keeps_records_and_format(tmp_path, name):
+    path = tmp_path / "data.json"
+    repo = Repository(str(path))
+    ids = repo.create_many([r["data"] for r in RECORDS], type_="user")
+
+    assert repo.convert(name) == 2
+    assert detect_codec(path.read_bytes()[:16]).name == name
+
+    # A new instance detects the format and keeps writing it
+    reopened = Repository(str(path))
+    assert [r["id"] for r in reopened.read_all()] == ids
+    assert [r["id"] for r in reopened.iter_records("user")] == ids
+    reopened.update(ids[0], {"username": "x", "age": 1})
+    assert detect_codec(path.read_bytes()[:16]).name == name
+    assert Repository(str(path)).read_by_id(ids[0])["data"]["username"] == "x"
@@ -0,0 +1,146 @@
+import os
+import json
+import time
+import socket
+import threading
+import http.client
+from repository.repository import Repository
+from repository.partitioned_repository import PartitionedRepository
+from logging_config import shutdown_logging
+from services import daemon
+
+
+def start_server(run_command, state_path):
+    server = daemon.CommandServer(run_command, str(state_path))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    for _ in range(100):
+        if os.path.exists(state_path):
+            break
+        time.sleep(0.01)
+    return server, thread
+
+
+def test_forward_runs_command_on_hot_repository(tmp_path):
+    repo = Repository(str(tmp_path / "data.json"))
+    calls = []
+
+    def run_command(argv):
+        calls.append(argv)
+        if argv[0] == "create":
+            print(repo.create({"username": argv[1]}, type_="user"))
+        else:
+            for r in repo.find_by_type("user"):
+                print(r["data"]["username"])
+        return 0
+
+    state = tmp_path / "data.json.serve.json"
+    server, thread = start_server(run_command, state)
+    try:
+        assert daemon.running_pid(str(state)) == os.getpid()
+        created = daemon.forward(["create", "alice"], str(state))
+        assert created["status"] == 0
+        assert repo.read_by_id(created["output"].strip())["data"] == {"username": "alice"}
+        assert daemon.forward(["list"], str(state)) == {"status": 0, "output": "alice\n"}
+        assert calls == [["create", "alice"], ["list"]]
+    finally:
+        server.shutdown()
+        thread.join(5)
+    assert not state.exists()
+    # Nothing listening any more: callers fall back to running locally
+    assert daemon.forward(["list"], str(state)) is None
+    assert daemon.running_pid(str(state)) is None
+
+
+def test_command_errors_are_reported_not_fatal(tmp_path):
+    def run_command(argv):
+        if argv == ["exit"]:
+            raise SystemExit(2)
+        raise RuntimeError("boom")
+
+    state = tmp_path / "serve.json"
+    server, thread = start_server(run_command, state)
+    try:
+        assert daemon.forward(["exit"], str(state))["status"] == 2
+        failed = daemon.forward(["x"], str(state))
+        assert failed["status"] == 1 and "boom" in failed["output"]
+        assert daemon.running_pid(str(state)) is not None
+    finally:
+        server.shutdown()
+        thread.join(5)
+
+
+def test_requests_without_token_are_rejected(tmp_path):
+    ran = []
+    state = tmp_path / "serve.json"
+    server, thread = start_server(lambda argv: ran.append(argv), state)
+    try:
+        host, port = server.address
+        conn = http.client.HTTPConnection(host, port, timeout=5)
+        conn.request("POST", "/run", body=json.dumps({"argv": ["list"]}))
+        assert conn.getresponse().status == 403
+        conn.close()
+        assert ran == []
+        assert os.stat(state).st_mode & 0o077 == 0
+    finally:
+        server.shutdown()
+        thread.join(5)
+
+
+def test_missing_state_file_means_no_daemon(tmp_path):
+    assert daemon.forward(["list"], str(tmp_path / "none.json")) is None
+
+
+def test_failure_after_sending_is_reported_not_rerun(tmp_path):
+    listener = socket.socket()
+    listener.bind(("127.0.0.1", 0))
+    listener.listen(1)
+    received = []
+
+    def hang_up():
+        # Read the request (as if the command ran), then drop the connection without answering
+        conn, _ = listener.accept()
+        received.append(conn.recv(65536))
+        conn.close()
+
+    thread = threading.Thread(target=hang_up, daemon=True)
+    thread.start()
+    state = tmp_path / "serve.json"
+    host, port = listener.getsockname()
+    state.write_text(json.dumps({"host": host, "port": port, "pid": 1, "token": "t"}), encoding="utf-8")
+    try:
+        result = daemon.forward(["create-user", "--username", "x", "--age", "1"], str(state))
+    finally:
+        thread.join(5)
+        listener.close()
+    assert received
+    # Not None: the caller must not run the write a second time locally
+    assert result["status"] == 1 and "may or may not have run" in result["output"]
+
+
+def test_forwarded_file_paths_are_made_absolute(tmp_path, monkeypatch):
+    import main
+
+    parts = tmp_path / "parts"
+    forwarded = []
+
+    def run_command(argv):
+        forwarded.append(argv)
+        return main.run_argv(argv)
+
+    elsewhere = tmp_path / "elsewhere"
+    elsewhere.mkdir()
+    (elsewhere / "items.json").write_text('[{"username": "ivy", "age": 3}]', encoding="utf-8")
+    main.repo = PartitionedRepository(str(parts))
+    server, thread = start_server(run_command, main.repo.filename + ".serve.json")
+    # The daemon's working directory is not the caller's
+    monkeypatch.chdir(elsewhere)
+    try:
+        argv = ["--partitions", str(parts), "--logfile", str(tmp_path / "ft.log"), "create-many", "--type", "user", "--file", "items.json"]
+        assert main.main(argv) == 0
+    finally:
+        shutdown_logging()
+        server.shutdown()
+        thread.join(5)
+    assert forwarded and forwarded[0][-1] == str(elsewhere / "items.json")
+    assert [r["data"]["username"] for r in PartitionedRepository(str(parts)).find_by_type("user")] == ["ivy"]
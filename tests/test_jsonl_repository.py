@@ -0,0 +1,90 @@
+import json
+from repository.jsonl_repository import JsonlRepository
+
+
+def test_jsonl_repository_crud_and_reopen(tmp_path):
+    path = tmp_path / "data.jsonl"
+    repo = JsonlRepository(str(path))
+    uid = repo.create({"username": "cy", "age": 27}, type_="user")
+    wid = repo.create({"name": "Legs", "duration": 50}, type_="workout")
+    assert repo.update(uid, {"username": "cy", "age": 28}) is True
+    assert repo.delete(wid) is True
+    assert repo.delete(wid) is False
+
+    # Each change is one appended line
+    assert len(path.read_text(encoding="utf-8").splitlines()) == 4
+
+    reopened = JsonlRepository(str(path))
+    assert reopened.read_by_id(uid)["data"]["age"] == 28
+    assert reopened.read_by_id(wid) is None
+    assert [r["id"] for r in reopened.find_by_type("user")] == [uid]
+    assert reopened.get_object_by_id(uid).username == "cy"
+
+
+def test_jsonl_repository_compact(tmp_path):
+    path = tmp_path / "data.jsonl"
+    repo = JsonlRepository(str(path))
+    uid = repo.create({"username": "di", "age": 40}, type_="user")
+    for age in range(41, 45):
+        repo.update(uid, {"username": "di", "age": age})
+    gone = repo.create({"name": "Tmp", "duration": 5}, type_="workout")
+    repo.delete(gone)
+
+    dropped = repo.compact()
+    assert dropped == 6
+    # The live record behind a marker holding the last sequence number
+    assert [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()] == [
+        {"seq": 7, "op": "compacted"},
+        {"seq": 7, "op": "create", "record": {"id": uid, "type": "user", "data": {"username": "di", "age": 44}}},
+    ]
+    assert JsonlRepository(str(path)).read_all() == [
+        {"id": uid, "type": "user", "data": {"username": "di", "age": 44}}
+    ]
+    # Consumers behind the compaction are told to resync; numbering continues after it
+    assert [c["op"] for c in repo.changes_since(3)] == ["reset"]
+    assert repo.changes_since(7) == []
+    repo.delete(uid)
+    assert [(c["seq"], c["op"], c["id"], c["type"]) for c in JsonlRepository(str(path)).changes_since(0)] == [
+        (7, "reset", None, None), (8, "delete", uid, "user")
+    ]
+
+
+def test_jsonl_repository_import_json(tmp_path):
+    src = tmp_path / "data.json"
+    records = [
+        {"id": "u1", "type": "user", "data": {"username": "ed", "age": 31}},
+        {"id": "w1", "type": "workout", "data": {"name": "Swim", "duration": 30}},
+    ]
+    src.write_text(json.dumps(records), encoding="utf-8")
+
+    repo = JsonlRepository(str(tmp_path / "data.jsonl"))
+    assert repo.import_json(str(src)) == 2
+    assert repo.read_all() == records
+
+
+def test_jsonl_repository_skips_partial_trailing_line(tmp_path):
+    path = tmp_path / "data.jsonl"
+    repo = JsonlRepository(str(path))
+    uid = repo.create({"username": "fay", "age": 22}, type_="user")
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"op": "put", "rec')
+
+    repo = JsonlRepository(str(path))
+    assert [r["id"] for r in repo.read_all()] == [uid]
+    wid = repo.create({"name": "Row", "duration": 15}, type_="workout")
+    assert [r["id"] for r in JsonlRepository(str(path)).read_all()] == [uid, wid]
+
+
+def test_jsonl_repository_numbers_legacy_entries_by_position(tmp_path):
+    path = tmp_path / "data.jsonl"
+    path.write_text(
+        '{"op": "put", "record": {"id": "u1", "type": "user", "data": {"username": "gil", "age": 20}}}\n'
+        '{"op": "delete", "id": "u1"}\n',
+        encoding="utf-8",
+    )
+    repo = JsonlRepository(str(path))
+    uid = repo.create({"username": "hal", "age": 21}, type_="user")
+    assert [(c["seq"], c["op"], c["id"]) for c in repo.changes_since(0)] == [
+        (1, "update", "u1"), (2, "delete", "u1"), (3, "create", uid)
+    ]
+    assert [c["seq"] for c in repo.changes_since(1, limit=1)] == [2]
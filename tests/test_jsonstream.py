@@ -0,0 +1,27 @@
+import io
+import json
+import pytest
+from repository.jsonstream import iter_json_array
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 7, 1 << 16])
+def test_iter_json_array_matches_json_load(chunk_size):
+    records = [
+        {"id": "a", "type": "user", "data": {"username": "éva [x], {y}", "age": 30}},
+        {"id": "b", "type": "workout", "data": {"name": "Run", "duration": 12345}},
+        12345,
+        "tail",
+    ]
+    text = json.dumps(records, indent=4)
+    assert list(iter_json_array(io.StringIO(text), chunk_size=chunk_size)) == records
+
+
+def test_iter_json_array_empty_inputs():
+    assert list(iter_json_array(io.StringIO(""))) == []
+    assert list(iter_json_array(io.StringIO(" [ ] "))) == []
+
+
+@pytest.mark.parametrize("text", ["{}", "[1, 2", "[1 2]", "[1,]"])
+def test_iter_json_array_rejects_invalid_input(text):
+    with pytest.raises(json.JSONDecodeError):
+        list(iter_json_array(io.StringIO(text), chunk_size=2))
@@ -0,0 +1,52 @@
+import logging
+import pytest
+import logging_config
+from logging_config import BoundedQueueHandler, SamplingFilter, configure_logging, shutdown_logging
+
+
+@pytest.fixture
+def restore_root_logger():
+    root = logging.getLogger()
+    handlers, level = list(root.handlers), root.level
+    yield
+    shutdown_logging()
+    for h in list(root.handlers):
+        root.removeHandler(h)
+    for h in handlers:
+        root.addHandler(h)
+    root.setLevel(level)
+
+
+def test_async_logging_flushes_on_shutdown(tmp_path, restore_root_logger):
+    configure_logging(log_dir=str(tmp_path), async_mode=True)
+    assert logging_config._listener is not None
+    for i in range(50):
+        logging.getLogger("repository.repository").info("record %d", i)
+    shutdown_logging()
+
+    lines = (tmp_path / "fitness_tracker.log").read_text(encoding="utf-8").splitlines()
+    assert len(lines) == 50
+    assert lines[-1].endswith("repository.repository: record 49")
+
+
+def test_bounded_queue_handler_drops_on_overflow():
+    import queue
+
+    handler = BoundedQueueHandler(queue.Queue(maxsize=2), overflow="drop")
+    logger = logging.getLogger("test.overflow")
+    for i in range(5):
+        handler.handle(logger.makeRecord(logger.name, logging.INFO, __file__, 1, "m %d", (i,), None))
+    assert handler.queue.qsize() == 2
+    assert handler.dropped == 3
+
+
+def test_sampling_filter_keeps_one_in_n_debug_records():
+    f = SamplingFilter({"repository": 10})
+
+    def record(name, level):
+        return logging.makeLogRecord({"name": name, "levelno": level})
+
+    kept = sum(f.filter(record("repository.repository", logging.DEBUG)) for _ in range(100))
+    assert kept == 10
+    assert all(f.filter(record("repository.repository", logging.INFO)) for _ in range(5))
+    assert all(f.filter(record("services.scheduler", logging.DEBUG)) for _ in range(5))
@@ -1,6 +1,7 @@
 import os
 import json
 import tempfile
+import pytest
 from models.user import User
 from models.workout import Workout
 from models.exercise import Exercise
@@ -84,3 +85,45 @@ def test_repository_get_object_by_id(tmp_path):
     assert obj is not None
     assert isinstance(obj, User)
     assert obj.username == "ellen"
+
+
+def test_factory_registry_accepts_new_models():
+    from models.factory import ObjectFactory
+
+    @ObjectFactory.register("meal")
+    class Meal:
+        def __init__(self, name, kcal):
+            self.name = name
+            self.kcal = kcal
+
+    try:
+        meal = ObjectFactory.create_from_record({"id": "m", "type": "meal", "data": {"name": "Oats", "kcal": 300}})
+        assert isinstance(meal, Meal) and meal.kcal == 300
+        assert ObjectFactory.create_object("meal", "Soup", 120).name == "Soup"
+    finally:
+        ObjectFactory._registry.pop("meal")
+    with pytest.raises(ValueError):
+        ObjectFactory.create_from_record({"type": "meal", "data": {}})
+
+
+def test_factory_hydrate_many_eager_and_lazy():
+    from models.factory import ObjectFactory, LazyObject
+
+    records = [
+        {"id": "1", "type": "user", "data": {"username": "dave", "age": 40}},
+        {"id": "2", "type": "workout", "data": {"name": "Legs", "duration": 50}},
+        {"id": "3", "type": "schedule", "data": {}},
+    ]
+    with pytest.raises(ValueError):
+        ObjectFactory.hydrate_many(records)
+    user, workout, missing = ObjectFactory.hydrate_many(records, strict=False)
+    assert user.username == "dave" and workout.duration == 50 and missing is None
+
+    lazy_user, lazy_workout = ObjectFactory.hydrate_many(records[:2], lazy=True)
+    assert isinstance(lazy_user, User) and isinstance(lazy_workout, Workout)
+    # Only isinstance sees through the proxy
+    assert type(lazy_user) is LazyObject
+    assert lazy_user._obj is None
+    assert "dave" in lazy_user.get_info()
+    lazy_user.age = 41
+    assert lazy_user.age == 41 and lazy_user._obj.age == 41
@@ -0,0 +1,80 @@
+import json
+import pytest
+from repository.repository import Repository
+from repository.partitioned_repository import PartitionedRepository
+
+
+def _source(tmp_path):
+    repo = Repository(str(tmp_path / "data.json"))
+    uid = repo.create({"username": "ann", "age": 30}, type_="user")
+    wid = repo.create({"name": "Run", "duration": 20}, type_="workout")
+    repo.create({"user_id": uid, "workout_id": wid}, type_="schedule")
+    repo.create({"user_id": uid, "workout_id": wid}, type_="schedule")
+    return repo, uid, wid
+
+
+def test_split_writes_one_partition_per_type(tmp_path):
+    source, uid, wid = _source(tmp_path)
+    target = tmp_path / "parts"
+    assert PartitionedRepository.split(source, str(target)) == {"user": 1, "workout": 1, "schedule": 2}
+
+    manifest = json.loads((target / "manifest.json").read_text(encoding="utf-8"))
+    assert [(p["type"], p["file"]) for p in manifest["partitions"]] == [
+        ("user", "user.json"), ("workout", "workout.json"), ("schedule", "schedule.json"),
+    ]
+    repo = PartitionedRepository(str(target))
+    assert sorted(r["id"] for r in repo.read_all()) == sorted(r["id"] for r in source.read_all())
+    assert repo.read_by_id(wid)["data"]["name"] == "Run"
+    assert len(repo.find_by_field("schedule", "user_id", uid)) == 2
+    with pytest.raises(ValueError):
+        PartitionedRepository.split(source, str(target))
+
+
+def test_find_by_type_only_opens_its_partition(tmp_path, monkeypatch):
+    source, uid, _ = _source(tmp_path)
+    PartitionedRepository.split(source, str(tmp_path / "parts"))
+    repo = PartitionedRepository(str(tmp_path / "parts"))
+    for type_ in ("user", "workout"):
+        monkeypatch.setattr(repo.partition(type_), "_load", lambda: pytest.fail("opened another partition"))
+    assert len(repo.find_by_type("schedule")) == 2
+    assert repo.find_by_type("exercise") == []
+
+
+def test_writes_are_routed_by_type(tmp_path):
+    repo = PartitionedRepository(str(tmp_path / "parts"))
+    uid, eid = repo.create_many([{"username": "bo", "age": 20, "type": "user"}, {"name": "Squat", "calories": 9, "type": "exercise"}])
+    assert repo.types == ["user", "exercise"]
+    assert repo.partition("exercise").read_by_id(eid)["data"]["name"] == "Squat"
+
+    # A second instance (e.g. another process) finds records by id in any partition
+    other = PartitionedRepository(str(tmp_path / "parts"))
+    assert other.update(uid, {"username": "bo", "age": 21}) is True
+    assert repo.get_object_by_id(uid).age == 21
+    assert other.delete_many([eid, "missing"]) == {eid: True, "missing": False}
+    assert repo.read_by_id(eid) is None
+
+    with repo.deferred():
+        wid = repo.create({"name": "Row", "duration": 15}, type_="workout")
+        assert repo.read_by_id(wid) is not None
+        assert other.read_by_id(wid) is None
+    assert other.read_by_id(wid)["data"]["duration"] == 15
+
+
+def test_partitions_share_one_change_feed(tmp_path):
+    directory = str(tmp_path / "parts")
+    first = PartitionedRepository(directory)
+    second = PartitionedRepository(directory)
+    uid = first.create({"username": "bea", "age": 41}, type_="user")
+    wid = second.create({"name": "Hike", "duration": 90}, type_="workout")
+    first.update(wid, {"name": "Hike", "duration": 95})
+    with second.deferred():
+        second.delete(uid)
+        sid = second.create({"user_id": uid, "workout_id": wid}, type_="schedule")
+
+    changes = PartitionedRepository(directory).changes_since(0)
+    # One sequence across partitions and processes, in commit order (a deferred block commits partition by partition)
+    assert [c["seq"] for c in changes] == [1, 2, 3, 4, 5]
+    assert [(c["op"], c["id"]) for c in changes[:3]] == [("create", uid), ("create", wid), ("update", wid)]
+    assert sorted((c["op"], c["id"]) for c in changes[3:]) == [("create", sid), ("delete", uid)]
+    assert first.partition("user").change_feed is first.change_feed
+    assert PartitionedRepository(directory, changes=False).partition("user").change_feed is None
@@ -0,0 +1,512 @@
+import os
+import sys
+import json
+import subprocess
+import multiprocessing
+import pytest
+from repository.repository import Repository
+from repository.jsonl_repository import JsonlRepository
+from repository.sqlite_repository import SqliteRepository
+from repository.partitioned_repository import PartitionedRepository
+from repository.identity_map import IdentityMap
+from repository.change_feed import ChangeFeed
+
+
+def test_repository_index_by_type(tmp_path):
+    repo = Repository(str(tmp_path / "data.json"))
+    uid = repo.create({"username": "amy", "age": 33}, type_="user")
+    wid = repo.create({"name": "Core", "duration": 20}, type_="workout")
+
+    assert [r["id"] for r in repo.find_by_type("user")] == [uid]
+    assert [r["id"] for r in repo.find_by_type("workout")] == [wid]
+    assert repo.find_by_type("schedule") == []
+
+    repo.delete(uid)
+    assert repo.find_by_type("user") == []
+    assert repo.read_by_id(wid)["data"]["name"] == "Core"
+
+
+def test_repository_reloads_when_file_changes(tmp_path):
+    path = tmp_path / "data.json"
+    repo = Repository(str(path))
+    repo.create({"username": "bo", "age": 19}, type_="user")
+    assert len(repo.read_all()) == 1
+
+    # Another process rewrites the file behind our back
+    external = [{"id": "ext", "type": "workout", "data": {"name": "Run", "duration": 30}}]
+    path.write_text(json.dumps(external), encoding="utf-8")
+
+    assert repo.read_by_id("ext")["data"]["name"] == "Run"
+    assert [r["id"] for r in repo.read_all()] == ["ext"]
+
+
+@pytest.mark.parametrize("backend", [Repository, JsonlRepository, SqliteRepository, PartitionedRepository])
+def test_bulk_create_update_delete(tmp_path, backend):
+    repo = backend(str(tmp_path / "store"))
+    ids = repo.create_many(
+        [{"username": "u%d" % i, "age": 20 + i} for i in range(5)] + [{"name": "Yoga", "duration": 40}],
+        type_="user",
+    )
+    assert len(ids) == 6 and len(repo.read_all()) == 6
+
+    results = repo.update_many({ids[0]: {"username": "first", "age": 1}, "missing": {}})
+    assert results == {ids[0]: True, "missing": False}
+    assert repo.read_by_id(ids[0])["data"]["username"] == "first"
+
+    results = repo.update_many(lambda r: r["data"].get("age", 0) >= 23, lambda r: {**r["data"], "senior": True})
+    assert results == {ids[3]: True, ids[4]: True}
+    assert repo.read_by_id(ids[4])["data"]["senior"] is True
+
+    assert repo.delete_many([ids[1], "missing"]) == {ids[1]: True, "missing": False}
+    assert repo.delete_many(lambda r: "name" in r["data"]) == {ids[5]: True}
+    assert [r["id"] for r in repo.read_all()] == [ids[0], ids[2], ids[3], ids[4]]
+
+
+def test_repository_bulk_calls_write_once(tmp_path, monkeypatch):
+    repo = Repository(str(tmp_path / "data.json"))
+    writes = []
+    original = repo._write
+    monkeypatch.setattr(repo, "_write", lambda data: (writes.append(len(data)), original(data)))
+
+    ids = repo.create_many([{"username": "x%d" % i, "age": i} for i in range(100)], type_="user")
+    repo.update_many(ids, {"username": "same", "age": 0})
+    repo.delete_many(ids[:50])
+    assert writes == [100, 100, 50]
+
+
+@pytest.mark.parametrize("backend", [Repository, JsonlRepository, SqliteRepository, PartitionedRepository])
+def test_get_objects_by_ids(tmp_path, backend):
+    repo = backend(str(tmp_path / "store"))
+    uid = repo.create({"username": "ivy", "age": 29}, type_="user")
+    wid = repo.create({"name": "Spin", "duration": 45}, type_="workout")
+    sid = repo.create({"user_id": uid, "workout_id": wid}, type_="schedule")
+
+    objects = repo.get_objects_by_ids([uid, wid, sid, "missing"])
+    # Schedules have no domain class and missing ids are skipped
+    assert set(objects) == {uid, wid}
+    assert objects[uid].username == "ivy"
+    assert objects[wid].name == "Spin"
+
+
+def _create_users(path, worker, count):
+    repo = Repository(path)
+    for i in range(count):
+        repo.create({"username": "w%d-%d" % (worker, i), "age": i}, type_="user")
+
+
+def test_repository_concurrent_writers_do_not_lose_records(tmp_path):
+    path = str(tmp_path / "data.json")
+    Repository(path)
+    ctx = multiprocessing.get_context("fork" if hasattr(os, "fork") else "spawn")
+    workers = [ctx.Process(target=_create_users, args=(path, w, 20)) for w in range(4)]
+    for p in workers:
+        p.start()
+    for p in workers:
+        p.join()
+        assert p.exitcode == 0
+    assert len(Repository(path).read_all()) == 80
+
+
+def test_repository_stale_writer_reloads_before_writing(tmp_path):
+    path = str(tmp_path / "data.json")
+    first = Repository(path)
+    second = Repository(path)
+    a = first.create({"username": "a", "age": 1}, type_="user")
+    assert second.read_all()[0]["id"] == a
+
+    b = first.create({"username": "b", "age": 2}, type_="user")
+    # `second` still holds the one-record snapshot; its write must not drop `b`
+    c = second.create({"username": "c", "age": 3}, type_="user")
+    assert [r["id"] for r in Repository(path).read_all()] == [a, b, c]
+
+
+def test_repository_refuses_to_load_corrupt_file(tmp_path):
+    path = tmp_path / "data.json"
+    path.write_text('[{"id": "x", "type": "user", "data": {', encoding="utf-8")
+    repo = Repository(str(path))
+    with pytest.raises(json.JSONDecodeError):
+        repo.create({"username": "z", "age": 1}, type_="user")
+    assert path.read_text(encoding="utf-8").startswith('[{"id": "x"')
+
+
+def test_repository_iter_records_streams_cold_file(tmp_path):
+    path = tmp_path / "data.json"
+    records = [{"id": str(i), "type": "user" if i % 2 else "workout", "data": {"n": i}} for i in range(10)]
+    path.write_text(json.dumps(records, indent=4), encoding="utf-8")
+
+    repo = Repository(str(path))
+    assert list(repo.iter_records()) == records
+    assert [r["id"] for r in repo.iter_records("user")] == ["1", "3", "5", "7", "9"]
+    assert set(repo.read_by_ids(["2", "4", "missing"])) == {"2", "4"}
+    # Streaming does not populate the cache
+    assert repo._stamp is None
+
+    repo.read_all()
+    assert [r["id"] for r in repo.iter_records("workout")] == ["0", "2", "4", "6", "8"]
+
+
+def test_repository_find_by_field_uses_persisted_index(tmp_path):
+    path = str(tmp_path / "data.json")
+    repo = Repository(path)
+    ann = repo.create({"username": "ann", "age": 30}, type_="user")
+    ben = repo.create({"username": "ben", "age": 30}, type_="user")
+    wid = repo.create({"name": "Box", "duration": 30}, type_="workout")
+    sid = repo.create({"user_id": ann, "workout_id": wid}, type_="schedule")
+    repo.update(ben, {"username": "benji", "age": 31})
+    repo.delete(sid)
+
+    assert [r["id"] for r in repo.find_by_field("user", "username", "ann")] == [ann]
+    assert repo.find_by_field("user", "username", "ben") == []
+    assert [r["id"] for r in repo.find_by_field("user", "username", "benji")] == [ben]
+    assert repo.find_by_field("schedule", "user_id", ann) == []
+    # Undeclared fields fall back to a scan
+    assert [r["id"] for r in repo.find_by_field("user", "age", 30)] == [ann]
+
+    # A new process answers from the sidecar index without rebuilding it
+    fresh = Repository(path)
+    fresh._index.rebuild = None
+    assert [r["id"] for r in fresh.find_by_field("workout", "name", "Box")] == [wid]
+
+
+def test_repository_index_rebuilt_after_external_change(tmp_path):
+    path = tmp_path / "data.json"
+    repo = Repository(str(path))
+    repo.create({"username": "cat", "age": 5}, type_="user")
+    assert len(repo.find_by_field("user", "username", "cat")) == 1
+
+    path.write_text(json.dumps([{"id": "x", "type": "user", "data": {"username": "dog", "age": 6}}]), encoding="utf-8")
+    assert repo.find_by_field("user", "username", "cat") == []
+    assert [r["id"] for r in Repository(str(path)).find_by_field("user", "username", "dog")] == ["x"]
+
+
+@pytest.mark.parametrize("backend", [JsonlRepository, SqliteRepository])
+def test_find_by_field_other_backends(tmp_path, backend):
+    repo = backend(str(tmp_path / "store"))
+    uid = repo.create({"username": "eve", "age": 44}, type_="user")
+    repo.create({"username": "fred", "age": 44}, type_="user")
+    assert [r["id"] for r in repo.find_by_field("user", "username", "eve")] == [uid]
+    assert len(repo.find_by_field("user", "age", 44)) == 2
+
+
+def test_repository_deferred_writes_once(tmp_path, monkeypatch):
+    path = str(tmp_path / "data.json")
+    repo = Repository(path)
+    keep = repo.create({"username": "keep", "age": 1}, type_="user")
+    writes = []
+    original = repo._write
+    monkeypatch.setattr(repo, "_write", lambda data: (writes.append(len(data)), original(data)))
+
+    with repo.deferred():
+        a = repo.create({"username": "a", "age": 2}, type_="user")
+        b = repo.create({"name": "Row", "duration": 10}, type_="workout")
+        assert repo.update(a, {"username": "a2", "age": 3})
+        assert repo.delete(keep)
+        # Reads inside the block see the pending changes; the file does not
+        assert repo.read_by_id(a)["data"]["username"] == "a2"
+        assert [r["id"] for r in repo.find_by_type("user")] == [a]
+        assert [r["id"] for r in repo.find_by_field("user", "username", "a2")] == [a]
+        assert [r["id"] for r in Repository(path).read_all()] == [keep]
+    assert writes == [2]
+    assert [r["id"] for r in Repository(path).read_all()] == [a, b]
+    assert [r["id"] for r in Repository(path).find_by_field("user", "username", "a2")] == [a]
+
+
+def test_repository_deferred_replays_after_concurrent_write(tmp_path):
+    path = str(tmp_path / "data.json")
+    repo = Repository(path)
+    with repo.deferred():
+        a = repo.create({"username": "a", "age": 1}, type_="user")
+        other = Repository(path).create({"username": "other", "age": 2}, type_="user")
+    assert [r["id"] for r in Repository(path).read_all()] == [other, a]
+
+
+def test_repository_deferred_discarded_on_error(tmp_path):
+    path = str(tmp_path / "data.json")
+    repo = Repository(path)
+    with pytest.raises(KeyError):
+        with repo.deferred():
+            repo.create({"username": "lost", "age": 1}, type_="user")
+            raise KeyError("stop")
+    assert repo.read_all() == []
+    assert repo.find_by_field("user", "username", "lost") == []
+
+
+def test_repository_aggregates_follow_writes(tmp_path):
+    path = str(tmp_path / "data.json")
+    repo = Repository(path)
+    uid = repo.create({"username": "ann", "age": 30}, type_="user")
+    wid = repo.create({"name": "Box", "duration": 30}, type_="workout")
+    s1 = repo.create({"user_id": uid, "workout_id": wid, "duration": 30}, type_="schedule")
+    repo.create({"user_id": uid, "workout_id": wid, "duration": 45}, type_="schedule")
+    repo.update(s1, {"user_id": uid, "workout_id": "other", "duration": 20})
+    with repo.deferred():
+        repo.create({"user_id": "u2", "workout_id": wid}, type_="schedule")
+
+    assert repo.aggregate("types", "schedule") == 3
+    assert repo.aggregate("schedules_per_user", uid) == 2
+    assert repo.aggregate("minutes_per_user", uid) == 65
+    assert repo.aggregate("schedules_per_workout", wid) == 2
+    assert repo.aggregate("schedules_per_workout", "missing") == 0
+    with pytest.raises(ValueError):
+        repo.aggregate("nope", uid)
+
+    # A new process answers from the sidecar without parsing the data file
+    fresh = Repository(path)
+    fresh._load = None
+    assert fresh.summary() == repo.summary()
+
+    repo.delete(uid)
+    repo.delete_many(lambda r: r["type"] == "schedule")
+    assert repo.summary() == {"types": {"workout": 1}, "schedules_per_user": {}, "minutes_per_user": {}, "schedules_per_workout": {}}
+
+
+@pytest.mark.parametrize("backend", [Repository, JsonlRepository, SqliteRepository, PartitionedRepository])
+def test_summary_matches_across_backends(tmp_path, backend):
+    repo = backend(str(tmp_path / "store"))
+    repo.create({"user_id": "u1", "workout_id": "w1", "duration": 30}, type_="schedule")
+    repo.create({"username": "ann", "age": 30}, type_="user")
+    assert repo.summary() == {
+        "types": {"schedule": 1, "user": 1},
+        "schedules_per_user": {"u1": 1},
+        "minutes_per_user": {"u1": 30},
+        "schedules_per_workout": {"w1": 1},
+    }
+    assert repo.aggregate("types", "user") == 1
+
+
+@pytest.mark.parametrize("backend", [Repository, JsonlRepository, SqliteRepository, PartitionedRepository])
+def test_bulk_delete_with_repeated_id_counts_it_once(tmp_path, backend):
+    repo = backend(str(tmp_path / "store"))
+    u1, u2 = repo.create_many([{"username": "ann", "age": 30}, {"username": "bob", "age": 31}], type_="user")
+    start = repo.changes_since(0)[-1]["seq"]
+    assert repo.delete_many([u1, u1]) == {u1: True}
+    assert [r["id"] for r in repo.find_by_type("user")] == [u2]
+    assert repo.summary()["types"] == {"user": 1}
+    assert [(c["op"], c["id"]) for c in repo.changes_since(start)] == [("delete", u1)]
+
+
+def test_repository_aggregates_rebuilt_after_external_change(tmp_path):
+    path = tmp_path / "data.json"
+    repo = Repository(str(path))
+    repo.create({"username": "cat", "age": 5}, type_="user")
+    assert repo.aggregate("types", "user") == 1
+    path.write_text(json.dumps([{"id": "x", "type": "workout", "data": {"name": "Row", "duration": 6}}]), encoding="utf-8")
+    assert repo.summary()["types"] == {"workout": 1}
+    assert repo.rebuild_aggregates()["types"] == {"workout": 1}
+
+
+@pytest.mark.parametrize("backend", [Repository, JsonlRepository, SqliteRepository, PartitionedRepository])
+def test_query_filters_orders_and_pages(tmp_path, backend):
+    repo = backend(str(tmp_path / "store"))
+    repo.create_many(
+        [
+            {"username": "ann", "age": 30},
+            {"username": "bob", "age": 25},
+            {"username": "cat", "age": "unknown"},
+            {"username": "dan"},
+            {"username": "eve", "age": 41},
+        ],
+        type_="user",
+    )
+    repo.create({"name": "Run", "age": 99}, type_="workout")
+
+    def names(records):
+        return [r["data"].get("username") for r in records]
+
+    assert names(repo.query("user", where={"username": "bob"})) == ["bob"]
+    # Mismatched kinds (a string age against a number) and missing fields never match
+    assert names(repo.query("user", where=[("age", ">=", 30)])) == ["ann", "eve"]
+    assert names(repo.query("user", where=[("age", "!=", 30)])) == ["bob", "cat", "eve"]
+    assert names(repo.query("user", where=[("username", "=", "ann"), ("age", "<", 30)])) == []
+    # Numbers before strings, records without the field last in both directions
+    assert names(repo.query("user", order_by="age")) == ["bob", "ann", "eve", "cat", "dan"]
+    assert names(repo.query("user", order_by="-age")) == ["cat", "eve", "ann", "bob", "dan"]
+    assert names(repo.query("user", order_by="age", limit=2, offset=1)) == ["ann", "eve"]
+    assert names(repo.query("user", limit=2, offset=3)) == ["dan", "eve"]
+    assert len(repo.query(where=[("age", ">", 40)])) == 2
+    with pytest.raises(ValueError):
+        repo.query("user", where=[("age", "~", 1)])
+
+
+def test_repository_query_uses_index_and_stops_early(tmp_path, monkeypatch):
+    repo = Repository(str(tmp_path / "data.json"))
+    repo.create_many([{"user_id": f"u{i % 3}", "workout_id": "w1", "duration": i} for i in range(9)], type_="schedule")
+    by_index = repo.query("schedule", where={"user_id": "u1", "duration": 4})
+    assert [r["data"]["duration"] for r in by_index] == [4]
+
+    fresh = Repository(repo.filename)
+    seen = []
+    original = fresh._stream
+
+    def counting_stream():
+        for r in original():
+            seen.append(r)
+            yield r
+
+    monkeypatch.setattr(fresh, "_stream", counting_stream)
+    assert [r["data"]["duration"] for r in fresh.query("schedule", limit=2)] == [0, 1]
+    assert len(seen) == 2
+
+
+@pytest.mark.parametrize("backend", [Repository, JsonlRepository, SqliteRepository])
+def test_identity_map_reuses_objects_until_they_change(tmp_path, backend):
+    path = str(tmp_path / "store")
+    repo = backend(path)
+    uid = repo.create({"username": "ann", "age": 30}, type_="user")
+    wid = repo.create({"name": "Run", "duration": 20}, type_="workout")
+
+    user = repo.get_object_by_id(uid)
+    assert repo.get_object_by_id(uid) is user
+    assert repo.get_objects_by_ids([uid, wid])[uid] is user
+    assert repo.object_cache.hits == 2 and repo.object_cache.misses == 2
+
+    # Writes that touch other records keep the object
+    repo.update(wid, {"name": "Run", "duration": 25})
+    assert repo.get_object_by_id(uid) is user
+    assert repo.get_object_by_id(wid).duration == 25
+
+    repo.update(uid, {"username": "ann", "age": 31})
+    assert repo.get_object_by_id(uid).age == 31
+
+    # Changes made by another writer are picked up too
+    other = backend(path)
+    other.update(uid, {"username": "ann", "age": 32})
+    assert repo.get_object_by_id(uid).age == 32
+
+    repo.delete(uid)
+    assert repo.get_object_by_id(uid) is None
+
+
+def test_identity_map_evicts_least_recently_used():
+    cache = IdentityMap(maxsize=2)
+    a, b, c = object(), object(), object()
+    cache.put("a", a)
+    cache.put("b", b)
+    assert cache.get("a") is a
+    cache.put("c", c)
+    assert "b" not in cache and cache.get("a") is a and cache.get("c") is c
+    # A put based on a read from before an invalidation is dropped
+    generation = cache.generation
+    cache.discard("a")
+    cache.put("a", a, generation)
+    assert "a" not in cache
+    assert cache.stats() == {"size": 1, "maxsize": 2, "hits": 3, "misses": 0}
+
+
+@pytest.mark.parametrize("backend", [Repository, JsonlRepository, SqliteRepository, PartitionedRepository])
+def test_change_feed_records_every_write_in_order(tmp_path, backend):
+    repo = backend(str(tmp_path / "store"))
+    uid = repo.create({"username": "cy", "age": 30}, type_="user")
+    ids = repo.create_many([{"name": "Row", "duration": 20}, {"name": "Ski", "duration": 50}], type_="workout")
+    repo.update(uid, {"username": "cy", "age": 31})
+    repo.update_many(ids, {"name": "Any", "duration": 1})
+    repo.delete_many([ids[0]])
+    repo.delete(uid)
+
+    changes = repo.changes_since(0)
+    assert [c["seq"] for c in changes] == list(range(1, 9))
+    assert [(c["op"], c["id"]) for c in changes] == [
+        ("create", uid), ("create", ids[0]), ("create", ids[1]), ("update", uid),
+        ("update", ids[0]), ("update", ids[1]), ("delete", ids[0]), ("delete", uid),
+    ]
+    assert changes[3]["data"] == {"username": "cy", "age": 31} and changes[3]["type"] == "user"
+    assert changes[-1]["data"] is None
+    # Consumers resume from the last seq they applied
+    assert [c["seq"] for c in repo.changes_since(6)] == [7, 8]
+    assert [c["seq"] for c in repo.changes_since(2, limit=2)] == [3, 4]
+    assert repo.changes_since(8) == []
+
+
+def test_change_feed_follows_commits_only(tmp_path, monkeypatch):
+    path = str(tmp_path / "data.json")
+    repo = Repository(path)
+    with pytest.raises(KeyError):
+        with repo.deferred():
+            repo.create({"username": "lost", "age": 1}, type_="user")
+            raise KeyError("stop")
+    assert repo.changes_since(0) == []
+
+    # A deferred block replayed after a concurrent write appends its changes once, after the other writer's
+    with repo.deferred():
+        a = repo.create({"username": "a", "age": 1}, type_="user")
+        b = Repository(path).create({"username": "b", "age": 2}, type_="user")
+    assert [(c["seq"], c["id"]) for c in Repository(path).changes_since(0)] == [(1, b), (2, a)]
+
+    reader = Repository(path)
+    seen = []
+
+    def fail(data):
+        # Another process polls the feed while this write is in progress
+        seen.extend(reader.changes_since(2))
+        raise OSError("disk full")
+
+    monkeypatch.setattr(repo, "_write", fail)
+    with pytest.raises(OSError):
+        repo.delete(a)
+    monkeypatch.undo()
+    assert seen == []
+    c = repo.create({"username": "c", "age": 3}, type_="user")
+    # The failed write never took a sequence number, so a consumer resuming from 2 sees the next real one
+    assert [(e["seq"], e["op"], e["id"]) for e in reader.changes_since(2)] == [(3, "create", c)]
+
+
+def test_change_feed_reports_missed_writes_with_a_reset(tmp_path, monkeypatch):
+    path = str(tmp_path / "data.json")
+    repo = Repository(path)
+    repo.create({"username": "a", "age": 1}, type_="user")
+
+    # Writers without the feed leave a gap that the next recorded commit reports
+    Repository(path, changes=False).create({"username": "b", "age": 2}, type_="user")
+    c = repo.create({"username": "c", "age": 3}, type_="user")
+    assert [(e["seq"], e["op"], e["id"]) for e in repo.changes_since(1)] == [(2, "reset", None), (3, "create", c)]
+
+    # A crash between replacing the data file and appending: the write stands, the feed lags behind
+    def crash(changes, reset=False):
+        raise OSError("killed")
+
+    monkeypatch.setattr(repo.change_feed, "append", crash)
+    d = repo.create({"username": "d", "age": 4}, type_="user")
+    monkeypatch.undo()
+    assert Repository(path).read_by_id(d) is not None
+    # Opening the repository repairs the feed; sequence numbers keep increasing
+    reopened = Repository(path)
+    assert [(e["seq"], e["op"]) for e in reopened.changes_since(3)] == [(4, "reset")]
+    e = reopened.create({"username": "e", "age": 5}, type_="user")
+    assert [(x["seq"], x["id"]) for x in repo.changes_since(4)] == [(5, e)]
+
+
+def _changed(old, new):
+    return [(None, {"id": "r%d" % i, "type": "user", "data": {"n": i}}) for i in range(old, new)]
+
+
+def test_change_feed_seeks_to_requested_seq(tmp_path):
+    feed = ChangeFeed(str(tmp_path / "feed.jsonl"))
+    assert feed.last_seq() == 0 and feed.since(0) == []
+    assert feed.append(_changed(0, 3000)) == 3000
+    assert feed.append(_changed(3000, 3001)) == 3001
+
+    assert [c["seq"] for c in feed.since(2995)] == list(range(2996, 3002))
+    assert feed.since(0, limit=1)[0]["id"] == "r0"
+    assert feed.since(3001) == []
+    # The start offset is found by binary search, not by scanning from the beginning
+    with open(feed.path, "rb") as f:
+        assert ChangeFeed._offset_after(f, 2995) > os.path.getsize(feed.path) // 2
+    # A partially written last line is not reported yet
+    with open(feed.path, "a", encoding="utf-8") as f:
+        f.write('{"seq": 3002, "op": "cre')
+    assert [c["seq"] for c in feed.since(3000)] == [3001]
+    # The next append replaces it
+    assert feed.append(_changed(3001, 3002)) == 3002
+    assert [(c["seq"], c["id"]) for c in feed.since(3000)] == [(3001, "r3000"), (3002, "r3001")]
+
+
+def test_importing_repositories_does_not_load_models():
+    code = (
+        "import sys\n"
+        "import repository.repository, repository.jsonl_repository, repository.sqlite_repository\n"
+        "import repository.partitioned_repository, repository.async_repository\n"
+        "print(sorted(m for m in sys.modules if m.split('.')[0] == 'models'))\n"
+    )
+    src = os.path.join(os.path.dirname(__file__), "..", "src")
+    out = subprocess.run([sys.executable, "-c", code], cwd=src, capture_output=True, text=True, check=True)
+    assert out.stdout.strip() == "[]"
@@ -0,0 +1,105 @@
+import random
+import pytest
+from datetime import datetime, timedelta
+from services.scheduler import IntervalTree, Scheduler, ScheduleConflict, Session
+
+T0 = datetime(2030, 1, 1, 8, 0)
+
+
+def test_add_session_rejects_overlaps_per_user():
+    s = Scheduler()
+    first = s.add_session("u1", "w1", T0, 60)
+    # Back-to-back sessions do not overlap ([start, end) intervals)
+    second = s.add_session("u1", "w1", T0 + timedelta(minutes=60), 30)
+    with pytest.raises(ScheduleConflict) as err:
+        s.add_session("u1", "w2", T0 + timedelta(minutes=30), 10)
+    assert err.value.existing is first
+    # Other users are independent
+    s.add_session("u2", "w1", T0 + timedelta(minutes=30), 10)
+    assert len(s) == 3
+    assert s.conflicts("u1", T0 + timedelta(minutes=50), 20) == [first, second]
+
+
+def test_schedule_recurring_is_all_or_nothing():
+    s = Scheduler()
+    blocker = s.add_session("u1", "w1", T0 + timedelta(days=14), 30)
+    with pytest.raises(ScheduleConflict):
+        s.schedule_recurring("u1", "w2", T0, 45, count=4)
+    assert len(s) == 1
+
+    added = s.schedule_recurring("u1", "w2", T0, 45, count=4, skip_conflicts=True)
+    assert [x.start for x in added] == [T0, T0 + timedelta(days=7), T0 + timedelta(days=21)]
+    assert s.next_sessions(10, now=T0, user_id="u1")[2] is blocker
+
+
+def test_next_sessions_skips_past_and_removed():
+    s = Scheduler()
+    past = s.add_session("u1", "w1", T0 - timedelta(days=1), 30)
+    a = s.add_session("u2", "w1", T0 + timedelta(hours=2), 30)
+    b = s.add_session("u1", "w1", T0 + timedelta(hours=1), 30)
+    c = s.add_session("u3", "w1", T0 + timedelta(hours=3), 30)
+    assert s.next_sessions(2, now=T0) == [b, a]
+    assert s.remove_session(b)
+    assert not s.remove_session(b)
+    assert s.next_sessions(5, now=T0) == [a, c]
+    assert s.next_sessions(5, now=T0, user_id="u1") == []
+    # An earlier `now` still sees sessions an earlier call already skipped as past
+    assert s.next_sessions(5, now=T0 - timedelta(days=2)) == [past, a, c]
+
+
+def test_next_sessions_with_non_monotonic_now():
+    s = Scheduler()
+    first = s.add_session("u1", "w1", "2024-01-01T09:00", 30)
+    second = s.add_session("u2", "w1", "2024-01-02T09:00", 30)
+    assert s.next_sessions(5, now="2024-01-03") == []
+    assert s.next_sessions(5, now="2023-12-31") == [first, second]
+    assert s.next_sessions(1, now="2024-01-01T12:00") == [second]
+    assert len(s) == 2
+
+
+def test_load_schedule_records():
+    records = [
+        {"id": "s1", "type": "schedule", "data": {"user_id": "u1", "workout_id": "w1", "start": "2030-01-01T08:00", "duration": 30}},
+        {"id": "s2", "type": "schedule", "data": {"user_id": "u1", "workout_id": "w1"}},
+    ]
+    s = Scheduler()
+    # Undated legacy schedules are skipped
+    assert s.load(records) == 1
+    assert s.next_sessions(1, now=T0)[0].id == "s1"
+    assert s.next_sessions(1, now=T0)[0].to_data() == {"user_id": "u1", "workout_id": "w1", "start": "2030-01-01T08:00:00", "duration": 30}
+    with pytest.raises(ScheduleConflict):
+        s.add_session("u1", "w1", "2030-01-01T08:15", 5)
+
+
+def test_interval_tree_matches_brute_force():
+    rng = random.Random(7)
+    tree = IntervalTree()
+    sessions = []
+    for _ in range(500):
+        session = Session("u", "w", T0 + timedelta(minutes=rng.randrange(10000)), rng.randrange(1, 300))
+        tree.insert(session)
+        sessions.append(session)
+    for session in sessions[::3]:
+        assert tree.remove(session)
+    live = [x for i, x in enumerate(sessions) if i % 3]
+    assert len(tree) == len(live)
+    for _ in range(200):
+        start = T0 + timedelta(minutes=rng.randrange(10000))
+        end = start + timedelta(minutes=rng.randrange(1, 120))
+        expected = sorted((x for x in live if x.start < end and x.end > start), key=lambda x: x.key)
+        assert tree.overlapping(start, end) == expected
+        assert (tree.first_overlap(start, end) is None) == (not expected)
+    assert list(tree.iter_from(T0)) == sorted(live, key=lambda x: x.key)
+
+
+def test_interval_tree_bulk_build_then_insert():
+    rng = random.Random(3)
+    sessions = [Session("u", "w", T0 + timedelta(minutes=rng.randrange(5000)), 20) for _ in range(300)]
+    tree = IntervalTree()
+    tree.extend(sessions[:200])
+    tree.extend(sessions[200:])
+    assert len(tree) == 300
+    assert list(tree.iter_from(T0)) == sorted(sessions, key=lambda x: x.key)
+    probe = T0 + timedelta(minutes=2500)
+    expected = sorted((x for x in sessions if x.start < probe + timedelta(minutes=30) and x.end > probe), key=lambda x: x.key)
+    assert tree.overlapping(probe, probe + timedelta(minutes=30)) == expected
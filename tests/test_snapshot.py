@@ -0,0 +1,56 @@
+from repository.repository import Repository
+from repository.snapshot import Snapshot, write_snapshot
+
+
+def test_snapshot_lookup(tmp_path):
+    records = [{"id": "%04d" % i, "type": "user", "data": {"username": "u%d" % i, "age": i}} for i in range(500, 0, -1)]
+    path = str(tmp_path / "data.snap")
+    write_snapshot(path, records, (1, 2, 3))
+
+    snap = Snapshot(path)
+    assert len(snap) == 500 and snap.stamp == (1, 2, 3)
+    assert snap.get("0001") == records[-1]
+    assert snap.get("0500") == records[0]
+    assert snap.get("0250")["data"]["age"] == 250
+    assert snap.get("9999") is None
+    snap.close()
+
+
+def test_repository_uses_snapshot_for_cold_reads(tmp_path):
+    path = str(tmp_path / "data.json")
+    repo = Repository(path)
+    ids = repo.create_many([{"username": "u%d" % i, "age": i} for i in range(20)], type_="user")
+    assert repo.write_snapshot() == 20
+
+    # A second write keeps the existing snapshot current
+    repo.update(ids[3], {"username": "changed", "age": 3})
+
+    cold = Repository(path)
+    cold._load = None  # any full parse would fail
+    assert cold.read_by_id(ids[3])["data"]["username"] == "changed"
+    assert cold.read_by_id("missing") is None
+    assert set(cold.read_by_ids([ids[0], ids[1], "missing"])) == {ids[0], ids[1]}
+    assert [r["id"] for r in cold.find_by_field("user", "username", "u7")] == [ids[7]]
+
+
+def test_repository_ignores_stale_snapshot(tmp_path):
+    path = str(tmp_path / "data.json")
+    repo = Repository(path, snapshot=False)
+    uid = repo.create({"username": "old", "age": 1}, type_="user")
+    repo.write_snapshot()
+    repo.update(uid, {"username": "new", "age": 2})
+
+    assert Repository(path).read_by_id(uid)["data"]["username"] == "new"
+
+
+def test_snapshot_keeps_first_of_duplicate_ids(tmp_path):
+    path = str(tmp_path / "data.json")
+    repo = Repository(path, snapshot=True)
+    repo.create({"id": "dup", "type": "user", "data": {"username": "first", "age": 1}})
+    # Storing a second record under the same id must not fail the write
+    repo.create({"id": "dup", "type": "user", "data": {"username": "second", "age": 2}})
+    assert len(repo.read_all()) == 2
+
+    cold = Repository(path)
+    cold._load = None
+    assert cold.read_by_id("dup")["data"]["username"] == "first"
@@ -0,0 +1,42 @@
+import json
+from repository.sqlite_repository import SqliteRepository
+
+
+def test_sqlite_repository_crud(tmp_path):
+    repo = SqliteRepository(str(tmp_path / "data.db"))
+    uid = repo.create({"username": "gus", "age": 35}, type_="user")
+    wid = repo.create({"name": "HIIT", "duration": 25}, type_="workout")
+
+    assert repo.read_by_id(uid) == {"id": uid, "type": "user", "data": {"username": "gus", "age": 35}}
+    assert [r["id"] for r in repo.read_all()] == [uid, wid]
+    assert [r["id"] for r in repo.find_by_type("workout")] == [wid]
+
+    assert repo.update(uid, {"username": "gus", "age": 36}) is True
+    assert repo.update("missing", {}) is False
+    assert repo.get_object_by_id(uid).age == 36
+
+    assert repo.delete(wid) is True
+    assert repo.delete(wid) is False
+    assert repo.find_by_type("workout") == []
+    assert repo._conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+
+def test_sqlite_repository_import_json(tmp_path):
+    src = tmp_path / "data.json"
+    records = [
+        {"id": "u1", "type": "user", "data": {"username": "hal", "age": 50}},
+        {"id": "s1", "type": "schedule", "data": {"user_id": "u1", "workout_id": "w1"}},
+    ]
+    src.write_text(json.dumps(records), encoding="utf-8")
+
+    repo = SqliteRepository(str(tmp_path / "data.db"))
+    assert repo.import_json(str(src)) == 2
+    assert repo.read_all() == records
+
+    # Re-importing replaces existing ids in place; the feed reports updates, not creates
+    records[0]["data"]["age"] = 51
+    records.append({"id": "w1", "type": "workout", "data": {"name": "Row", "duration": 20}})
+    src.write_text(json.dumps(records), encoding="utf-8")
+    assert repo.import_json(str(src)) == 3
+    assert repo.read_all() == records
+    assert [(c["seq"], c["op"], c["id"]) for c in repo.changes_since(2)] == [(3, "update", "u1"), (4, "update", "s1"), (5, "create", "w1")]
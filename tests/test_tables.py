@@ -0,0 +1,68 @@
+import pytest
+from models.user import User
+from models.workout import Workout
+from models.exercise import Exercise
+from models.tables import UserTable, WorkoutTable, ExerciseTable
+
+
+def test_models_use_slots():
+    for obj in (User("a", 1), Workout("b", 2), Exercise("c", 3)):
+        assert not hasattr(obj, "__dict__")
+
+
+def test_user_table_rows_match_model_output():
+    records = [
+        {"id": "u1", "type": "user", "data": {"username": "amy", "age": 30, "height": 170.5}},
+        {"id": "w1", "type": "workout", "data": {"name": "Run", "duration": 30}},
+        {"id": "u2", "type": "user", "data": {"username": "bob", "age": 41, "weight": 80}},
+    ]
+    users = UserTable.from_records(records)
+    assert len(users) == 2
+    assert [row.id for row in users] == ["u1", "u2"]
+    assert users[0].get_info() == User("amy", 30, height=170.5).get_info()
+    assert users[-1].get_info() == User("bob", 41, weight=80).get_info() == "User: bob, Age: 41, Height: N/A, Weight: 80"
+    assert users[1].to_dict() == {"username": "bob", "age": 41, "height": None, "weight": 80}
+    assert list(users.column("age")) == [30, 41]
+    with pytest.raises(IndexError):
+        users[2]
+
+
+def test_table_rows_keep_missing_ints_missing():
+    users = UserTable()
+    users.append("cal")
+    assert users[0].age is None
+    assert users[0].get_info() == User("cal", None).get_info()
+    workouts = WorkoutTable.from_records([{"id": "w1", "type": "workout", "data": {"name": "Open"}}])
+    assert workouts[0].to_dict() == {"name": "Open", "duration": None}
+
+
+def test_workout_and_exercise_tables_intern_repeated_strings():
+    workouts = WorkoutTable()
+    for i in range(100):
+        workouts.append("Leg Day", 45 + i % 2)
+    assert len(workouts.columns["name"].values) == 1
+    assert workouts[1].get_summary() == Workout("Leg Day", 46).get_summary()
+    assert sum(workouts.column("duration")) == 4550
+
+    exercises = ExerciseTable()
+    exercises.append("Pushup", calories=50)
+    assert exercises[0].burn_info() == Exercise("Pushup", 50).burn_info()
+
+
+def test_tables_round_trip_fractional_values():
+    exercises = ExerciseTable.from_records([
+        {"id": "e1", "type": "exercise", "data": {"name": "Jog", "calories": 12.5}},
+        {"id": "e2", "type": "exercise", "data": {"name": "Plank", "calories": 8}},
+        {"id": "e3", "type": "exercise", "data": {"name": "Rest"}},
+    ])
+    assert [row.to_dict()["calories"] for row in exercises] == [12.5, 8, None]
+    assert exercises[0].burn_info() == Exercise("Jog", 12.5).burn_info()
+    assert exercises[1].burn_info() == Exercise("Plank", 8).burn_info()
+
+    users = UserTable()
+    users.append("dee", 30.0, height=170.25)
+    assert users[0].to_dict() == {"username": "dee", "age": 30, "height": 170.25, "weight": None}
+    # Int columns refuse to drop a fractional part
+    with pytest.raises(ValueError):
+        users.append("eli", 30.5)
+    assert len(users) == 1 and all(len(column) == 1 for column in users.columns.values())